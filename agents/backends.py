@@ -0,0 +1,107 @@
+"""
+AI Backend Interfaces - what EnhancedComplianceAgent needs from its AI services
+
+LLM backends are shaped like the part of `genai.Client` ReguLens uses, so
+the real client works unchanged:
+
+    backend.models.generate_content(model=..., contents=prompt)
+        -> response with `.text` (and optionally `.usage_metadata`)
+
+Embedding backends embed a batch in one call:
+
+    backend.embed([(text, task_type), ...]) -> [vector, ...]
+
+Backends can also be picked with environment variables, which is how the
+app, CLI and batch workers are switched to the offline stand-ins:
+
+    REGULENS_LLM_BACKEND        gemini (default) | standin | record:<dir> | replay:<dir>
+    REGULENS_EMBEDDING_BACKEND  vertex (default) | standin | record:<dir> | replay:<dir>
+"""
+import os
+
+
+class LLMBackend:
+    """Interface for LLM backends (genai.Client already satisfies it)"""
+
+    name = 'llm'
+
+    @property
+    def models(self):
+        """Object exposing generate_content(model=..., contents=...)"""
+        raise NotImplementedError
+
+
+class EmbeddingBackend:
+    """Interface for embedding backends"""
+
+    name = 'embeddings'
+
+    def embed(self, items: list) -> list:
+        """
+        Embed a batch
+
+        Args:
+            items: List of (text, task_type) tuples
+
+        Returns:
+            One vector (list of floats) per item, in order
+        """
+        raise NotImplementedError
+
+
+def _parse_spec(value: str):
+    kind, _, path = value.partition(':')
+    return kind.strip().lower(), path.strip() or None
+
+
+def llm_backend_from_env(gemini_client=None):
+    """
+    Build the LLM backend selected by REGULENS_LLM_BACKEND
+
+    Args:
+        gemini_client: Real genai.Client used by 'gemini' and 'record'
+
+    Returns:
+        Backend, or `gemini_client` when the variable is unset
+    """
+    spec = os.getenv('REGULENS_LLM_BACKEND')
+    if not spec:
+        return gemini_client
+
+    from agents.standin_backends import StandInLLMBackend, RecordReplayLLMBackend
+
+    kind, path = _parse_spec(spec)
+    if kind == 'gemini':
+        return gemini_client
+    if kind == 'standin':
+        return StandInLLMBackend.from_env()
+    if kind in ('record', 'replay'):
+        return RecordReplayLLMBackend(path or '.regulens/recordings', mode=kind, inner=gemini_client)
+    raise ValueError(f"Unknown REGULENS_LLM_BACKEND: {spec}")
+
+
+def embedding_backend_from_env():
+    """
+    Build the embedding backend selected by REGULENS_EMBEDDING_BACKEND
+
+    Returns:
+        Backend, or None to use the default Vertex AI setup
+    """
+    spec = os.getenv('REGULENS_EMBEDDING_BACKEND')
+    if not spec:
+        return None
+
+    from agents.standin_backends import StandInEmbeddingBackend, RecordReplayEmbeddingBackend
+
+    kind, path = _parse_spec(spec)
+    if kind == 'vertex':
+        return None
+    if kind == 'standin':
+        return StandInEmbeddingBackend.from_env()
+    if kind in ('record', 'replay'):
+        inner = None
+        if kind == 'record':
+            from agents.vertex_ai_services import VertexAIEmbeddings
+            inner = VertexAIEmbeddings().backend
+        return RecordReplayEmbeddingBackend(path or '.regulens/recordings', mode=kind, inner=inner)
+    raise ValueError(f"Unknown REGULENS_EMBEDDING_BACKEND: {spec}")
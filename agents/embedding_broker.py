@@ -0,0 +1,173 @@
+"""
+Embedding Broker - process-wide single-flight and micro-batching for embeddings
+
+Concurrent Streamlit sessions embed overlapping text (often the same sample
+regulation) through separate VertexAIEmbeddings instances. The broker sits
+between them and the model:
+
+- identical (text, task_type) requests already in flight share one Future
+- requests from all threads are gathered into micro-batches that are
+  flushed when `max_batch_size` is reached or after `max_wait` seconds
+
+When no batch is in flight the first request is sent straight away, so a
+single sequential caller never pays the `max_wait` delay; batches only
+build up while the model is busy.
+"""
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class EmbeddingBroker:
+    """Coalesces and batches embedding requests from every thread"""
+
+    def __init__(self, embed_fn, max_batch_size: int = 32, max_wait: float = 0.02,
+                 max_concurrent_batches: int = 4):
+        """
+        Args:
+            embed_fn: Callable taking a list of (text, task_type) tuples and
+                returning one vector (list of floats) per item, in order
+            max_batch_size: Flush as soon as this many texts are queued
+            max_wait: Flush after the oldest queued text waited this long
+            max_concurrent_batches: Batches allowed in flight at once
+        """
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrent_batches = max_concurrent_batches
+
+        self._cond = threading.Condition()
+        self._inflight = {}     # (text, task_type) -> Future
+        self._pending = []      # keys waiting for the next batch
+        self._pending_since = None
+        self._active_batches = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_batches,
+            thread_name_prefix="regulens-embed"
+        )
+        self._flusher = threading.Thread(
+            target=self._run, name="regulens-embed-flusher", daemon=True
+        )
+        self._flusher.start()
+
+        self.stats = {
+            'requested': 0,
+            'coalesced': 0,
+            'batches': 0,
+            'texts_sent': 0,
+            'failed_batches': 0
+        }
+
+    def submit(self, texts: list, task_type: str = "SEMANTIC_SIMILARITY") -> list:
+        """Queue texts and return one Future per text"""
+        futures = []
+        with self._cond:
+            for text in texts:
+                key = (text, task_type)
+                self.stats['requested'] += 1
+
+                future = self._inflight.get(key)
+                if future is not None:
+                    self.stats['coalesced'] += 1
+                else:
+                    future = Future()
+                    self._inflight[key] = future
+                    self._pending.append(key)
+                    if self._pending_since is None:
+                        self._pending_since = time.monotonic()
+                futures.append(future)
+            self._cond.notify()
+        return futures
+
+    def embed(self, texts: list, task_type: str = "SEMANTIC_SIMILARITY",
+              timeout: float = None) -> list:
+        """
+        Embed texts, sharing work with every other caller
+
+        Returns:
+            List of vectors in the same order as `texts`
+        """
+        return [f.result(timeout=timeout) for f in self.submit(texts, task_type)]
+
+    def _run(self):
+        """Flusher loop: wait for a full batch or the oldest request's deadline"""
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                # Idle model: send immediately rather than waiting to batch
+                while len(self._pending) < self.max_batch_size and self._active_batches:
+                    remaining = self._pending_since + self.max_wait - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending[:self.max_batch_size]
+                self._pending = self._pending[self.max_batch_size:]
+                self._pending_since = time.monotonic() if self._pending else None
+                self.stats['batches'] += 1
+                self.stats['texts_sent'] += len(batch)
+                self._active_batches += 1
+
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: list):
+        """Call the model once for a batch and resolve its Futures"""
+        try:
+            vectors = self.embed_fn(batch)
+            if len(vectors) != len(batch):
+                raise ValueError(f"expected {len(batch)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            with self._cond:
+                self.stats['failed_batches'] += 1
+                self._active_batches -= 1
+                futures = [self._inflight.pop(key) for key in batch]
+                self._cond.notify()
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        with self._cond:
+            self._active_batches -= 1
+            futures = [self._inflight.pop(key) for key in batch]
+            self._cond.notify()
+        for future, vector in zip(futures, vectors):
+            future.set_result(vector)
+
+    def batch_rounds(self, n_texts: int) -> int:
+        """Batches one after another needed to embed n_texts with nothing else queued"""
+        batches = -(-n_texts // self.max_batch_size)
+        return max(1, -(-batches // self.max_concurrent_batches))
+
+    def get_stats(self) -> dict:
+        """Get batching statistics"""
+        with self._cond:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._inflight)
+        stats['avg_batch_size'] = (
+            round(stats['texts_sent'] / stats['batches'], 1) if stats['batches'] else 0.0
+        )
+        return stats
+
+
+# One broker per embedding model, shared by every session in the process
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker(model_name: str, embed_fn, **kwargs) -> EmbeddingBroker:
+    """
+    Get the shared broker for a model, creating it on first use
+
+    Args:
+        model_name: Embedding model name, e.g. 'text-embedding-004'. It must
+            identify the backend's configuration too: every caller with
+            the same name gets the first caller's embed_fn
+        embed_fn: Batch embedding callable (only used on creation)
+        **kwargs: EmbeddingBroker settings (only used on creation)
+    """
+    with _brokers_lock:
+        if model_name not in _brokers:
+            _brokers[model_name] = EmbeddingBroker(embed_fn, **kwargs)
+        return _brokers[model_name]
@@ -278,48 +278,123 @@
 
 import sys
 import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Only needed when run as a script; importing the module has no side effects
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 """
 Enhanced Compliance Agent with Gemini + Vertex AI
+
+Heavy dependencies (google-genai, scikit-learn, Vertex AI) are imported on
+first use and .env is loaded when the agent is created, so importing this
+module stays cheap for Streamlit reruns and fresh worker processes.
 """
 import os
-from dotenv import load_dotenv
-from google import genai
+import copy
+from utils.env import load_env
 from utils.document_utils import (
     extract_requirements,
     calculate_similarity,  # TF-IDF fallback
     categorize_risk,
-    generate_recommendation
+    classify_match,
+    combine_match_scores,
+    match_limits,
+    generate_recommendation,
+    generate_text,
+    MATCH_THRESHOLDS
 )
+from utils.deadline import AnalysisDeadline, DeadlineExceeded
+from utils.circuit_breaker import get_breaker
+from utils.metrics import RunMetrics
+from utils.profiling import profiled
+from utils.records import Gap, MatchCandidates
+from utils.dedup import cluster_duplicates
+from utils.recommendation_store import get_recommendation_store
+from utils.domain_idf import get_domain_idf
+from utils.numeric_facts import numeric_recommendation
+from agents.guarded_client import GuardedGeminiClient
+from agents.backends import LLMBackend, llm_backend_from_env, embedding_backend_from_env
+
+# Candidates kept per requirement for threshold tuning, even when top_k is 1
+TOP_K_CACHED = 5
 
 # Import Vertex AI service with multiple path attempts
 VERTEX_SERVICE_AVAILABLE = False
 VertexAIEmbeddings = None  # ← ADD THIS LINE
 
-load_dotenv()
-
 
 class EnhancedComplianceAgent:
     """
     Enhanced agent using Gemini AI + Vertex AI
     """
     
-    def __init__(self):
-        """Initialize with Gemini + Vertex AI"""
+    def __init__(self, metrics_hooks: list = None, llm_backend=None, embedding_backend=None,
+                 top_k: int = None, dedup: bool = True, recommendation_store=None,
+                 tfidf_engine: str = None, tfidf_model=None, lsa_model=None):
+        """
+        Initialize with Gemini + Vertex AI
+        
+        Args:
+            metrics_hooks: Optional MetricsHook collectors notified of stage
+                timings and counters for every run of this agent
+            llm_backend: LLMBackend to use instead of genai.Client (e.g. an
+                offline stand-in); defaults to REGULENS_LLM_BACKEND
+            embedding_backend: EmbeddingBackend to use instead of Vertex AI;
+                defaults to REGULENS_EMBEDDING_BACKEND
+            top_k: Number of best controls whose coverage is combined per
+                requirement (1 = best match only); defaults to REGULENS_TOP_K
+            dedup: Match near-duplicate requirements once and copy the result
+                to the rest of their cluster
+            recommendation_store: RecommendationStore for reusing generated
+                recommendations across similar gaps; defaults to the shared
+                store (see utils/recommendation_store.py), False disables it
+            tfidf_engine: TF-IDF fallback engine - 'pairwise' (a vectorizer
+                fitted per requirement/control pair) or 'hashing' (one
+                StreamingTfidf pass over all texts, see utils/hashing_tfidf.py);
+                defaults to REGULENS_TFIDF_ENGINE
+            tfidf_model: Fitted StreamingTfidf (or path to its .npz) whose
+                corpus document frequencies the hashing engine uses; defaults
+                to REGULENS_TFIDF_MODEL, otherwise fitted on each run's texts
+            lsa_model: Fitted LSAModel (or path to its .npz, see utils/lsa.py)
+                used for matching when Vertex AI is unavailable, before
+                falling back to TF-IDF; defaults to REGULENS_LSA_MODEL
+        """
+        load_env()
+        self.top_k = max(1, int(top_k or os.getenv('REGULENS_TOP_K') or 1))
+        self.dedup = dedup
+        self.tfidf_engine = (tfidf_engine or os.getenv('REGULENS_TFIDF_ENGINE') or 'pairwise').lower()
+        if self.tfidf_engine not in ('pairwise', 'hashing'):
+            raise ValueError(f"Unknown TF-IDF engine: {self.tfidf_engine}")
+        self.tfidf_model = tfidf_model or os.getenv('REGULENS_TFIDF_MODEL') or None
+        self.lsa_model = lsa_model or os.getenv('REGULENS_LSA_MODEL') or None
+        self.recommendation_store = (
+            get_recommendation_store() if recommendation_store is None
+            else recommendation_store or None
+        )
         self.gemini_key = os.getenv('GEMINI_API_KEY')
         self.project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         
         # Initialize Gemini
-        if self.gemini_key:
-            self.gemini_client = genai.Client(api_key=self.gemini_key)
+        if llm_backend is not None:
+            self.gemini_client = llm_backend
+            print(f"✅ LLM backend: {getattr(llm_backend, 'name', type(llm_backend).__name__)}")
+        elif self.gemini_key:
+            from google import genai
+            self.gemini_client = llm_backend_from_env(genai.Client(api_key=self.gemini_key))
             print("✅ Gemini AI initialized")
         else:
-            self.gemini_client = None
-            print("⚠️ Running without Gemini (rule-based mode)")
+            self.gemini_client = llm_backend_from_env()
+            if self.gemini_client is None:
+                print("⚠️ Running without Gemini (rule-based mode)")
         
+        if embedding_backend is None:
+            embedding_backend = embedding_backend_from_env()
         
-        if VERTEX_SERVICE_AVAILABLE and VertexAIEmbeddings is not None:
+        if embedding_backend is not None:
+            from agents.vertex_ai_services import VertexAIEmbeddings as BackendEmbeddings
+            self.vertex_service = BackendEmbeddings(backend=embedding_backend)
+            self.vertex_enabled = True
+        elif VERTEX_SERVICE_AVAILABLE and VertexAIEmbeddings is not None:
             print("🔍 DEBUG: Attempting to create VertexAIEmbeddings instance...")
             try:
                 self.vertex_service = VertexAIEmbeddings()
@@ -348,17 +423,161 @@ class EnhancedComplianceAgent:
         # Initialize Enhanced Similarity (placeholder for future)
         self.enhanced_similarity = False
         self.similarity_service = None
-        print(f"🔍 Semantic Matching: TF-IDF")
+        
+        # Unlimited until run_full_analysis sets a budget
+        self.deadline = AnalysisDeadline()
+        
+        # Replaced with a fresh instance at the start of every run
+        self.metrics_hooks = metrics_hooks
+        self.metrics = RunMetrics(metrics_hooks)
+        
+        # Process-wide breakers: once a service keeps failing, every run
+        # (and every session) goes straight to the local path until it recovers
+        self.gemini_breaker = get_breaker('gemini')
+        self.vertex_breaker = (
+            self.vertex_service.circuit_breaker if self.vertex_service else get_breaker('vertex-ai')
+        )
+        
+        # Last run's requirements, controls and top matches (for reclassify())
+        self.requirements = []
+        self.controls = []
+        self.match_candidates = None
+        self.representative = []
+        
+        # Streaming callback for the current run: on_stream(target, text),
+        # target is a requirement ID or 'executive_summary'
+        self.on_stream = None
     
-    def analyze_regulation(self, text: str, pages_data: list = None) -> dict:
-        """Extract requirements from regulation"""
-        print("\n🔍 [Step 1] Analyzing Regulatory Document...")
+    def _llm_client(self):
+        """
+        Gemini client bound to the run deadline and circuit breaker, or None
+        once the budget is spent or the breaker is open
+        """
+        if not self.gemini_client or self.deadline.expired() or self.gemini_breaker.is_open():
+            return None
+        return GuardedGeminiClient(
+            self.gemini_client,
+            deadline=self.deadline,
+            circuit_breaker=self.gemini_breaker,
+            metrics=self.metrics
+        )
+    
+    def get_status(self) -> dict:
+        """Get status information for the AI services"""
+        return {
+            'gemini': {
+                'enabled': self.gemini_client is not None,
+                'circuit_breaker': self.gemini_breaker.get_status()
+            },
+            'vertex_ai': (
+                self.vertex_service.get_status() if self.vertex_service
+                else {'enabled': False, 'circuit_breaker': self.vertex_breaker.get_status()}
+            )
+        }
+    
+    def _score_matrix(self, requirements: list, controls: list, use_vertex: bool):
+        """
+        Score every requirement against every control
+        
+        Returns:
+            (scores, method) - numpy array (requirements x controls) and
+            'vertex-ai', 'lsa' or 'tfidf'. If the Vertex batch fails, trips
+            the breaker or runs out of budget, the whole matrix is scored
+            with the local LSA model (when configured) or TF-IDF, so
+            thresholds stay consistent.
+        
+        Engines are tried in order: Vertex AI, the LSA model, the hashing
+        TF-IDF model (tfidf_engine='hashing'), then pairwise TF-IDF - which
+        uses the domain IDF only when REGULENS_DOMAIN_IDF points at one.
+        """
+        import numpy as np
+        
+        if use_vertex and not self.deadline.expired() and not self.vertex_breaker.is_open():
+            try:
+                self.metrics.incr('embedding_calls')
+                scores = self.deadline.call(
+                    self.vertex_service.get_similarity_matrix,
+                    [req['text'] for req in requirements],
+                    [ctrl['text'] for ctrl in controls]
+                )
+                self.metrics.incr('pairs_scored', scores.size)
+                return scores, 'vertex-ai'
+            except DeadlineExceeded:
+                print("   ⏱️ Time budget exhausted - switching to TF-IDF")
+            except Exception as e:
+                print(f"   ⚠️ Vertex AI unavailable ({e}) - using TF-IDF")
+            self.metrics.incr('fallbacks')
+        
+        if self.lsa_model is not None:
+            scores = self._lsa_scores(requirements, controls)
+            if scores is not None:
+                self.metrics.incr('pairs_scored', scores.size)
+                return scores, 'lsa'
+        
+        if self.tfidf_engine == 'hashing':
+            scores = self._hashing_scores(requirements, controls)
+            self.metrics.incr('pairs_scored', scores.size)
+            return scores, 'tfidf'
+        
+        domain_idf = get_domain_idf()
+        if domain_idf is not None:
+            scores = domain_idf.similarity_matrix(
+                [req['text'] for req in requirements],
+                [ctrl['text'] for ctrl in controls]
+            )
+            self.metrics.incr('pairs_scored', scores.size)
+            return scores, 'tfidf'
+        
+        scores = np.zeros((len(requirements), len(controls)), dtype=np.float32)
+        for i, req in enumerate(requirements):
+            for j, ctrl in enumerate(controls):
+                scores[i, j] = calculate_similarity(req['text'], ctrl['text'])
+        self.metrics.incr('pairs_scored', scores.size)
+        return scores, 'tfidf'
+    
+    def _lsa_scores(self, requirements: list, controls: list):
+        """Latent-space similarity matrix, or None if the LSA model can't be loaded"""
+        from utils.lsa import LSAModel
         
-        requirements = extract_requirements(
-            text, 
-            pages_data=pages_data,
-            document_name="Regulation"
+        if isinstance(self.lsa_model, str):
+            try:
+                self.lsa_model = LSAModel.load(self.lsa_model)
+                print(f"✅ LSA model loaded ({self.lsa_model.n_components} dimensions)")
+            except Exception as e:
+                print(f"   ⚠️ LSA model unavailable ({e}) - using TF-IDF")
+                self.lsa_model = None
+                return None
+        
+        return self.lsa_model.similarity(
+            [req['text'] for req in requirements],
+            [ctrl['text'] for ctrl in controls]
         )
+    
+    def _hashing_scores(self, requirements: list, controls: list):
+        """TF-IDF similarity matrix from the out-of-core hashing vectorizer"""
+        from utils.hashing_tfidf import StreamingTfidf
+        
+        if isinstance(self.tfidf_model, str):
+            self.tfidf_model = StreamingTfidf.load(self.tfidf_model)
+            print(f"✅ TF-IDF model loaded ({self.tfidf_model.n_documents} corpus clauses)")
+        
+        req_texts = [req['text'] for req in requirements]
+        ctrl_texts = [ctrl['text'] for ctrl in controls]
+        model = self.tfidf_model
+        if model is None:
+            model = StreamingTfidf().partial_fit(req_texts).partial_fit(ctrl_texts)
+        return model.similarity(req_texts, ctrl_texts)
+    
+    def analyze_regulation(self, text: str, pages_data: list = None, requirements: list = None) -> dict:
+        """Extract requirements from regulation (unless already extracted, e.g. prefetched)"""
+        print("\n🔍 [Step 1] Analyzing Regulatory Document...")
+        
+        if requirements is None:
+            requirements = extract_requirements(
+                text, 
+                pages_data=pages_data,
+                document_name="Regulation"
+            )
         
         print(f"   ✅ Extracted {len(requirements)} requirements")
         
@@ -368,15 +587,16 @@ class EnhancedComplianceAgent:
             'pages_data': pages_data
         }
     
-    def analyze_policy(self, text: str, pages_data: list = None) -> dict:
-        """Extract controls from policy"""
+    def analyze_policy(self, text: str, pages_data: list = None, controls: list = None) -> dict:
+        """Extract controls from policy (unless already extracted, e.g. prefetched)"""
         print("\n📋 [Step 2] Analyzing Internal Policy...")
         
-        controls = extract_requirements(
-            text,
-            pages_data=pages_data,
-            document_name="Internal Policy"
-        )
+        if controls is None:
+            controls = extract_requirements(
+                text,
+                pages_data=pages_data,
+                document_name="Internal Policy"
+            )
         
         print(f"   ✅ Extracted {len(controls)} controls")
         
@@ -387,7 +607,7 @@ class EnhancedComplianceAgent:
         }
     
     def map_gaps(self, regulation_result: dict, policy_result: dict) -> list:
-        """Map regulatory requirements to policy controls"""
+        """Map regulatory requirements to policy controls (one Gap record per requirement)"""
         print("\n🔗 [Step 3] Mapping Compliance Gaps...")
         
         requirements = regulation_result['requirements']
@@ -395,93 +615,271 @@ class EnhancedComplianceAgent:
         
         # Determine which similarity method to use
         if self.vertex_enabled:
-            print("   Using Vertex AI embeddings for semantic matching...")
+            print("   Trying embeddings for semantic matching (local fallback if they fail)...")
             use_vertex = True
+        elif self.lsa_model is not None:
+            print("   Using local LSA model for semantic matching...")
+            use_vertex = False
         else:
             print("   Using TF-IDF similarity (fallback mode)...")
             use_vertex = False
         
-        gaps = []
+        # Near-duplicate requirements are matched (and sent to the LLM) once,
+        # through the first occurrence of each cluster
+        with self.metrics.stage('map_gaps.dedup'):
+            self.representative = list(range(len(requirements)))
+            if self.dedup and requirements:
+                for cluster in cluster_duplicates([req['text'] for req in requirements]):
+                    for row in cluster:
+                        self.representative[row] = cluster[0]
+        unique_rows = sorted(set(self.representative))
+        if len(unique_rows) < len(requirements):
+            self.metrics.incr('duplicate_requirements', len(requirements) - len(unique_rows))
+            print(f"   🧬 {len(requirements) - len(unique_rows)} near-duplicate requirements share a match")
         
-        for req in requirements:
-            # Find best matching control
-            best_score = 0.0
-            best_match = None
-            
-            for ctrl in controls:
-                # Use Vertex AI if enabled, otherwise TF-IDF
-                if use_vertex:
-                    score = self.vertex_service.get_similarity(req['text'], ctrl['text'])
-                else:
-                    score = calculate_similarity(req['text'], ctrl['text'])
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = ctrl
-            
-            # Determine gap status (different thresholds for Vertex AI vs TF-IDF)
-            if use_vertex:
-                # Vertex AI is more accurate, use higher thresholds
-                if best_score >= 0.7:
-                    gap_status = 'COMPLIANT'
-                elif best_score >= 0.4:
-                    gap_status = 'PARTIAL'
-                else:
-                    gap_status = 'MISSING'
-            else:
-                # TF-IDF needs lower thresholds
-                if best_score >= 0.6:
-                    gap_status = 'COMPLIANT'
-                elif best_score >= 0.3:
-                    gap_status = 'PARTIAL'
-                else:
-                    gap_status = 'MISSING'
-            
-            # Calculate risk
-            risk_level = categorize_risk(gap_status, req['criticality'])
-            
-            # Generate AI-powered recommendation using Gemini
-            # Generate two-tier recommendations
-            recommendations = generate_recommendation(
-                gap_status=gap_status,
-                requirement_text=req['text'],
-                matched_control=best_match['text'] if best_match else None,
-                match_score=best_score,
-                gemini_client=self.gemini_client,
-                req_page=req.get('page_number'),
-                ctrl_page=best_match.get('page_number') if best_match else None,
-                req_doc="Regulation",
-                ctrl_doc="Your Policy"
+        # Score all pairs up front (Vertex AI if enabled and within budget),
+        # keeping each requirement's top matches for threshold tuning
+        with self.metrics.stage('map_gaps.scoring'):
+            scores, method = self._score_matrix(
+                [requirements[row] for row in unique_rows], controls, use_vertex
             )
-
-            # Handle both dict (new) and str (old fallback) formats
-            if isinstance(recommendations, dict):
-                quick_summary = recommendations.get('quick_summary', '')
-                detailed_plan = recommendations.get('detailed_plan', '')
-            else:
-                # Old format fallback
-                quick_summary = recommendations
-                detailed_plan = recommendations
-            
-            gaps.append({
-                'requirement_id': req['id'],
-                'requirement_text': req['text'],
-                'requirement_criticality': req['criticality'],
-                'matched_control': best_match['text'] if best_match else None,
-                'match_score': round(best_score, 2),
-                'gap_status': gap_status,
-                'risk_level': risk_level,
-                'quick_summary': quick_summary,
-                'detailed_plan': detailed_plan,
-                'matching_method': 'sentence-transformers' if self.enhanced_similarity else 'tfidf'
-            })
+        position = {row: i for i, row in enumerate(unique_rows)}
+        self.match_candidates = MatchCandidates.from_matrix(
+            scores[[position[rep] for rep in self.representative]],
+            [method] * len(requirements),
+            k=max(self.top_k, TOP_K_CACHED)
+        )
+        self.requirements = requirements
+        self.controls = controls
+        
+        gaps = [None] * len(requirements)
+        for row in unique_rows:
+            gaps[row] = self._build_gap(row)
+        for row, rep in enumerate(self.representative):
+            if rep != row:
+                gaps[row] = self._fan_out(gaps[rep], row)
         
         print(f"   ✅ Analyzed {len(gaps)} requirement-control pairs")
-        if use_vertex:
-            print("   ✅ Using Vertex AI text-embedding-004 model")
+        # The engine that actually scored the matrix (after any fallback)
+        print(f"   🔍 Semantic Matching: {self._engine_label(gaps, method == 'vertex-ai')}")
         
         return gaps
     
+    def _build_gap(self, row: int, thresholds: dict = None) -> Gap:
+        """
+        Classify one requirement's best match and generate its recommendation
+        
+        Args:
+            row: Requirement index into self.requirements / self.match_candidates
+            thresholds: Overrides for MATCH_THRESHOLDS
+        """
+        req = self.requirements[row]
+        best_match, supporting, best_score, method = self._match(row, thresholds)
+        
+        # Determine gap status (different thresholds for Vertex AI vs TF-IDF)
+        gap_status = classify_match(best_score, method, thresholds)
+        
+        # The LLM sees every clause that contributed to the match
+        matched_text = (
+            "\n\n".join(ctrl['text'] for ctrl in [best_match] + supporting) if best_match else None
+        )
+        
+        # Calculate risk
+        risk_level = categorize_risk(gap_status, req['criticality'])
+        
+        # Generate AI-powered recommendation using Gemini
+        # Generate two-tier recommendations
+        with self.metrics.stage('map_gaps.recommendations'):
+            recommendations = self._recommend(
+                gap_status, req, matched_text, best_score,
+                best_match.get('page_number') if best_match else None
+            )
+
+        # Handle both dict (new) and str (old fallback) formats
+        if isinstance(recommendations, dict):
+            quick_summary = recommendations.get('quick_summary', '')
+            detailed_plan = recommendations.get('detailed_plan', '')
+        else:
+            # Old format fallback
+            quick_summary = recommendations
+            detailed_plan = recommendations
+        
+        # 'gemini' = AI-generated, 'reused' = AI text stored for a similar gap,
+        # 'template' = rule-based fallback
+        recommendation_source = (
+            recommendations.get('source', 'template')
+            if isinstance(recommendations, dict) else 'template'
+        )
+        if self.gemini_client and gap_status != 'COMPLIANT' and recommendation_source == 'template':
+            self.metrics.incr('fallbacks')
+        
+        return Gap(
+            requirement_id=req['id'],
+            requirement_text=req['text'],
+            requirement_criticality=req['criticality'],
+            matched_control=best_match['text'] if best_match else None,
+            match_score=round(best_score, 2),
+            gap_status=gap_status,
+            risk_level=risk_level,
+            quick_summary=quick_summary,
+            detailed_plan=detailed_plan,
+            recommendation_source=recommendation_source,
+            matching_method=method,
+            supporting_controls=[ctrl['text'] for ctrl in supporting]
+        )
+    
+    def _recommend(self, gap_status: str, req, matched_text: str, match_score: float,
+                   ctrl_page: int = None):
+        """
+        Recommendation for one gap, reused from the recommendation store when
+        a similar gap already has a generated one
+        
+        Number mismatches of PARTIAL gaps are explained by rule first, and
+        the store only reuses plans whose requirement (and control) state
+        the same numbers as this gap.
+        """
+        if gap_status == 'PARTIAL' and matched_text:
+            numeric = numeric_recommendation(req['text'], matched_text, req.get('page_number'), ctrl_page)
+            if numeric:
+                return numeric
+        
+        store = self.recommendation_store if self.gemini_client and gap_status != 'COMPLIANT' else None
+        on_stream = self.on_stream
+        # Stored text is only reused for the backend that generated it
+        model = self.gemini_client.name if isinstance(self.gemini_client, LLMBackend) else 'gemini'
+        
+        if store:
+            reused = store.lookup(
+                gap_status, req['text'], matched_text, model=model,
+                req_page=req.get('page_number'), ctrl_page=ctrl_page
+            )
+            if reused:
+                self.metrics.incr('cache_hits')
+                return reused
+        
+        recommendations = generate_recommendation(
+            gap_status=gap_status,
+            requirement_text=req['text'],
+            matched_control=matched_text,
+            match_score=match_score,
+            gemini_client=self._llm_client(),
+            req_page=req.get('page_number'),
+            ctrl_page=ctrl_page,
+            req_doc="Regulation",
+            ctrl_doc="Your Policy",
+            on_stream=(lambda text: on_stream(req['id'], text)) if on_stream else None
+        )
+        
+        if store and isinstance(recommendations, dict) and recommendations.get('source') == 'gemini':
+            store.add(
+                gap_status, req['text'], recommendations, matched_control=matched_text,
+                model=model, req_page=req.get('page_number'), ctrl_page=ctrl_page
+            )
+        return recommendations
+    
+    def _fan_out(self, gap: Gap, row: int) -> Gap:
+        """Copy a cluster representative's result to a duplicate requirement"""
+        req = self.requirements[row]
+        return gap.replace(
+            requirement_id=req['id'],
+            requirement_text=req['text'],
+            requirement_criticality=req['criticality'],
+            risk_level=categorize_risk(gap.gap_status, req['criticality']),
+            duplicate_of=gap.requirement_id
+        )
+    
+    def _match(self, row: int, thresholds: dict = None):
+        """
+        Best control and match score for one requirement
+        
+        With top_k > 1, the other top controls scoring at or above the
+        PARTIAL threshold are returned as supporting controls and their
+        coverage is combined into the score (see combine_match_scores).
+        
+        Returns:
+            (best_match, supporting_controls, score, method)
+        """
+        ctrl_index, best_score, method = self.match_candidates.best(row)
+        if ctrl_index is None:
+            return None, [], best_score, method
+        if self.top_k == 1:
+            return self.controls[ctrl_index], [], best_score, method
+        
+        indices, scores = self.match_candidates.top(row, self.top_k)
+        partial = match_limits(method, thresholds)['PARTIAL']
+        supporting = [
+            self.controls[i] for i, score in zip(indices[1:], scores[1:]) if score >= partial
+        ]
+        return (self.controls[ctrl_index], supporting,
+                combine_match_scores(scores, method, thresholds), method)
+    
+    def preview_thresholds(self, current_statuses: list, thresholds: dict) -> dict:
+        """
+        Gap statuses under new thresholds, without generating anything
+        
+        Args:
+            current_statuses: Gap status of every gap from the last run, in
+                report order (e.g. GapTable.statuses())
+            thresholds: Same shape as MATCH_THRESHOLDS
+        
+        Returns:
+            dict with 'statuses' (one per gap) and 'changed' (row indices)
+        """
+        statuses = []
+        for row in range(len(self.match_candidates)):
+            _, _, score, method = self._match(row, thresholds)
+            statuses.append(classify_match(score, method, thresholds))
+        changed = [row for row, status in enumerate(statuses) if status != current_statuses[row]]
+        return {'statuses': statuses, 'changed': changed}
+    
+    def reclassify(self, report: dict, thresholds: dict, on_stream=None) -> dict:
+        """
+        Re-apply new match thresholds to the last run's cached scores
+        
+        Only gaps whose status changes get a new recommendation (and an LLM
+        call); the rest, and the executive summary when nothing changed, are
+        reused as-is.
+        
+        Args:
+            report: Report from this agent's last run_full_analysis()
+            thresholds: Same shape as MATCH_THRESHOLDS; methods left out keep
+                the report's thresholds
+            on_stream: Optional streaming callback (see run_full_analysis)
+        
+        Returns:
+            New report (time budget/diagnostics of the original run are kept)
+        """
+        if self.match_candidates is None:
+            raise ValueError("No cached scores - run run_full_analysis() first")
+        
+        # A copy, so later edits of the caller's dict (slider state) can't
+        # change the stored report
+        thresholds = copy.deepcopy({**report.get('thresholds', MATCH_THRESHOLDS), **thresholds})
+        gaps = list(report['all_gaps'])
+        changed = self.preview_thresholds([gap['gap_status'] for gap in gaps], thresholds)['changed']
+        print(f"\n🎚️ Reclassifying with new thresholds: {len(changed)} gaps changed status")
+        
+        # The original run's budget may be spent; regeneration gets a fresh one
+        self.deadline = AnalysisDeadline()
+        self.on_stream = on_stream
+        for row in changed:
+            if self.representative[row] == row:
+                gaps[row] = self._build_gap(row, thresholds)
+        for row in changed:
+            if self.representative[row] != row:
+                gaps[row] = self._fan_out(gaps[self.representative[row]], row)
+        
+        if changed:
+            new_report = self.generate_report(gaps)
+            for key in ('time_budget', 'circuit_breakers', 'performance'):
+                if key in report:
+                    new_report[key] = report[key]
+        else:
+            new_report = dict(report, all_gaps=gaps)
+        new_report['thresholds'] = thresholds
+        new_report['reclassified_gaps'] = len(changed)
+        return new_report
+    
     def generate_report(self, gaps: list) -> dict:
         """Generate compliance report with Gemini-powered summary"""
         print("\n📊 [Step 4] Generating Compliance Report...")
@@ -498,13 +896,22 @@ class EnhancedComplianceAgent:
         score = (compliant + partial * 0.5) / total * 100 if total > 0 else 0
         
         # Generate executive summary with Gemini
-        executive_summary = self._generate_executive_summary(
-            score, total, compliant, partial, missing, critical_risks, high_risks, gaps
-        )
+        with self.metrics.stage('generate_report.executive_summary'):
+            executive_summary, summary_source = self._generate_executive_summary(
+                score, total, compliant, partial, missing, critical_risks, high_risks, gaps
+            )
+        if self.gemini_client and summary_source == 'template':
+            self.metrics.incr('fallbacks')
         
         print(f"   ✅ Compliance Score: {score:.1f}%")
         print(f"   ✅ Critical Risks: {critical_risks}")
         
+        # Near-duplicate requirements that reused another requirement's result
+        clusters = {}
+        for g in gaps:
+            if g.get('duplicate_of'):
+                clusters.setdefault(g['duplicate_of'], [g['duplicate_of']]).append(g['requirement_id'])
+        
         # Check if Vertex AI was actually used
         vertex_used = any(
             g.get('matching_method') == 'vertex-ai'
@@ -522,21 +929,48 @@ class EnhancedComplianceAgent:
                 'high_risks': high_risks
             },
             'executive_summary': executive_summary,
+            'executive_summary_source': summary_source,
             'all_gaps': gaps,
+            'duplicate_clusters': [
+                {'representative': rep, 'members': members} for rep, members in clusters.items()
+            ],
             'technology_used': {
                 'gemini_ai': self.gemini_client is not None,
                 'vertex_ai': vertex_used,
-                'matching_engine': 'Vertex AI text-embedding-004' if vertex_used else 'TF-IDF'
+                'matching_engine': self._engine_label(gaps, vertex_used),
+                'top_k_controls': self.top_k
             }
         }
     
+    def _engine_label(self, gaps: list, vertex_used: bool) -> str:
+        """Name of the matching engine that scored the report's gaps"""
+        if vertex_used:
+            backend = getattr(self.vertex_service, 'backend', None)
+            if backend is None or backend.name == 'text-embedding-004':
+                return 'Vertex AI text-embedding-004'
+            return f"Embeddings ({backend.name})"
+        if any(g.get('matching_method') == 'lsa' for g in gaps):
+            return 'LSA (offline)'
+        if self.tfidf_engine == 'hashing':
+            return 'TF-IDF (hashing)'
+        domain_idf = get_domain_idf()
+        if domain_idf is not None:
+            return f"TF-IDF (domain IDF {domain_idf.version})"
+        return 'TF-IDF'
+    
     def _generate_executive_summary(self, score, total, compliant, partial, 
                                     missing, critical, high, gaps):
-        """Generate AI-powered executive summary"""
+        """
+        Generate AI-powered executive summary
+        
+        Returns:
+            (summary_text, source) where source is 'gemini' or 'template'
+        """
         
-        if not self.gemini_client:
-            # Fallback template
-            return f"Compliance score of {score:.1f}% indicates {'strong' if score >= 80 else 'moderate' if score >= 60 else 'weak'} compliance. Out of {total} requirements, {missing} are missing and {critical} pose critical risks requiring immediate action."
+        gemini_client = self._llm_client()
+        if not gemini_client:
+            # Fallback template (no Gemini, or time budget spent)
+            return f"Compliance score of {score:.1f}% indicates {'strong' if score >= 80 else 'moderate' if score >= 60 else 'weak'} compliance. Out of {total} requirements, {missing} are missing and {critical} pose critical risks requiring immediate action.", 'template'
         
         try:
             # Get top 3 critical gaps
@@ -568,37 +1002,86 @@ Write 3-4 concise sentences for CA firm executives:
 
 Be direct and professional."""
 
-            response = self.gemini_client.models.generate_content(
-                model='gemini-2.0-flash-exp',
-                contents=prompt
+            on_stream = self.on_stream
+            summary_text = generate_text(
+                gemini_client, prompt,
+                on_stream=(lambda text: on_stream('executive_summary', text)) if on_stream else None
             )
             
             print("   ✅ Gemini-generated executive summary")
-            return response.text.strip()
+            return summary_text, 'gemini'
             
         except Exception as e:
             print(f"   ⚠️ Gemini summary failed: {e}")
-            return f"Compliance score of {score:.1f}% with {critical} critical risks requiring immediate attention."
+            return f"Compliance score of {score:.1f}% with {critical} critical risks requiring immediate attention.", 'template'
     
+    @profiled('run_full_analysis')
     def run_full_analysis(self, regulation_text: str, policy_text: str,
-                     reg_pages_data: list = None, policy_pages_data: list = None) -> dict:
-        """Execute complete compliance analysis"""
+                     reg_pages_data: list = None, policy_pages_data: list = None,
+                     deadline_seconds: float = None, on_stream=None,
+                     reg_requirements: list = None, policy_controls: list = None) -> dict:
+        """
+        Execute complete compliance analysis
+        
+        Args:
+            deadline_seconds: Optional time budget for the whole run. Once it
+                is spent, recommendations and the executive summary switch to
+                the rule-based templates.
+            on_stream: Optional callback on_stream(target, text) receiving
+                quick summaries and the executive summary as they stream;
+                target is the requirement ID or 'executive_summary'. Without
+                it every Gemini call waits for the full response.
+            reg_requirements, policy_controls: Requirements/controls already
+                extracted from these texts (see utils/prefetch.py); steps 1
+                and 2 then skip extraction
+        """
         print("\n" + "="*60)
         print("🚀 ReguLens Enhanced Compliance Analysis")
         print("   Powered by: Gemini AI")
+        if deadline_seconds:
+            print(f"   Time budget: {deadline_seconds:.0f}s")
         print("="*60)
         
+        self.deadline = AnalysisDeadline(deadline_seconds)
+        self.metrics = RunMetrics(self.metrics_hooks)
+        self.on_stream = on_stream
+        
         # Step 1: Analyze regulation
-        reg_result = self.analyze_regulation(regulation_text, reg_pages_data)
+        with self.metrics.stage('analyze_regulation'):
+            reg_result = self.analyze_regulation(regulation_text, reg_pages_data, reg_requirements)
         
         # Step 2: Analyze policy
-        policy_result = self.analyze_policy(policy_text, policy_pages_data)
+        with self.metrics.stage('analyze_policy'):
+            policy_result = self.analyze_policy(policy_text, policy_pages_data, policy_controls)
         
         # Step 3: Map gaps
-        gaps = self.map_gaps(reg_result, policy_result)
+        with self.metrics.stage('map_gaps'):
+            gaps = self.map_gaps(reg_result, policy_result)
         
         # Step 4: Generate report
-        report = self.generate_report(gaps)
+        with self.metrics.stage('generate_report'):
+            report = self.generate_report(gaps)
+        
+        time_budget = self.deadline.to_dict(self.metrics.stage_seconds())
+        time_budget['ai_generated_gaps'] = len(
+            [g for g in gaps if g.get('recommendation_source') in ('gemini', 'reused')]
+        )
+        # Compliant gaps need no recommendation, so they are not "templated"
+        time_budget['templated_gaps'] = len([
+            g for g in gaps
+            if g.get('gap_status') in ('MISSING', 'PARTIAL') and g.get('recommendation_source') == 'template'
+        ])
+        report['time_budget'] = time_budget
+        report['thresholds'] = copy.deepcopy(MATCH_THRESHOLDS)
+        report['circuit_breakers'] = {
+            'gemini': self.gemini_breaker.get_status(),
+            'vertex_ai': self.vertex_breaker.get_status()
+        }
+        
+        if self.deadline.expired():
+            print(f"   ⏱️ Time budget exhausted - {time_budget['templated_gaps']} gaps use templated output")
+        
+        report['performance'] = self.metrics.finish()
         
         print("\n" + "="*60)
         print("✨ Analysis Complete!")
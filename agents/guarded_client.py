@@ -0,0 +1,133 @@
+"""
+Guarded Gemini client - routes every LLM call through the run's guards
+"""
+import time
+from utils.circuit_breaker import CircuitOpenError
+from utils.deadline import DeadlineExceeded
+
+
+class _GuardedModels:
+    """Mirrors `genai.Client.models` for the calls ReguLens makes"""
+
+    def __init__(self, owner):
+        self._owner = owner
+        # Only offer streaming when the wrapped client supports it
+        if hasattr(owner.client.models, 'generate_content_stream'):
+            self.generate_content_stream = self._generate_content_stream
+
+    def generate_content(self, **kwargs):
+        return self._owner._call(self._owner.client.models.generate_content, **kwargs)
+
+    def _generate_content_stream(self, **kwargs):
+        return self._owner._stream(self._owner.client.models.generate_content_stream, **kwargs)
+
+
+class GuardedGeminiClient:
+    """
+    Drop-in wrapper around `genai.Client`
+
+    `generate_recommendation` and the executive summary only use
+    `client.models.generate_content(...)` and
+    `client.models.generate_content_stream(...)`, so wrapping the client
+    keeps their signatures unchanged while every call respects the
+    deadline and the circuit breaker.
+    """
+
+    def __init__(self, client, deadline=None, circuit_breaker=None, metrics=None):
+        """
+        Args:
+            client: Underlying genai.Client
+            deadline: Optional AnalysisDeadline bounding each call
+            circuit_breaker: Optional CircuitBreaker for the Gemini service
+            metrics: Optional RunMetrics counting calls and tokens
+        """
+        self.client = client
+        self.deadline = deadline
+        self.circuit_breaker = circuit_breaker
+        self.metrics = metrics
+        self.models = _GuardedModels(self)
+
+    def _admit(self):
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError(f"{breaker.name} circuit is open")
+
+        if self.metrics is not None:
+            self.metrics.incr('llm_calls')
+
+    def _count_tokens(self, response):
+        usage = getattr(response, 'usage_metadata', None)
+        if self.metrics is not None and usage is not None:
+            self.metrics.incr('llm_tokens', getattr(usage, 'total_token_count', 0) or 0)
+
+    def _call(self, fn, **kwargs):
+        breaker = self.circuit_breaker
+        self._admit()
+
+        start = time.monotonic()
+        try:
+            if self.deadline is None:
+                result = fn(**kwargs)
+            else:
+                result = self.deadline.call(fn, **kwargs)
+        except DeadlineExceeded:
+            # Running out of budget says nothing about the service's health
+            if breaker is not None:
+                breaker.release()
+            raise
+        except Exception as e:
+            if breaker is not None:
+                breaker.record_failure(e)
+            raise
+
+        if breaker is not None:
+            breaker.record_success(time.monotonic() - start)
+
+        self._count_tokens(result)
+        return result
+
+    def _stream(self, fn, **kwargs):
+        """
+        Yield response chunks as they arrive
+
+        Each chunk is fetched within the remaining deadline; time to first
+        token is recorded as the 'llm_time_to_first_token' latency.
+        """
+        breaker = self.circuit_breaker
+        self._admit()
+
+        start = time.monotonic()
+        last_chunk = None
+        try:
+            chunks = fn(**kwargs) if self.deadline is None else self.deadline.call(fn, **kwargs)
+            chunks = iter(chunks)
+            while True:
+                if self.deadline is None:
+                    chunk = next(chunks, None)
+                else:
+                    chunk = self.deadline.call(next, chunks, None)
+                if chunk is None:
+                    break
+                if last_chunk is None and self.metrics is not None:
+                    self.metrics.observe('llm_time_to_first_token', time.monotonic() - start)
+                last_chunk = chunk
+                yield chunk
+        except DeadlineExceeded:
+            if breaker is not None:
+                breaker.release()
+            raise
+        except GeneratorExit:
+            # Consumer stopped early - not a service failure
+            if breaker is not None:
+                breaker.release()
+            raise
+        except Exception as e:
+            if breaker is not None:
+                breaker.record_failure(e)
+            raise
+
+        if breaker is not None:
+            breaker.record_success(time.monotonic() - start)
+
+        # Usage metadata arrives with the final chunk
+        self._count_tokens(last_chunk)
@@ -0,0 +1,366 @@
+"""
+Offline Stand-in AI Backends - for load, latency and air-gapped testing
+
+- StandInLLMBackend / StandInEmbeddingBackend: no network, configurable
+  latency distributions, injected errors and 429s, deterministic output
+- RecordReplay*Backend: capture real responses to disk once, then replay
+  them offline
+
+Stand-in settings can come from the environment (see `from_env()`):
+
+    REGULENS_STANDIN_LATENCY     e.g. "lognormal:0.8:0.5", "uniform:0.1:0.4",
+                                 "normal:0.5:0.1", "constant:0.2" (seconds)
+    REGULENS_STANDIN_ERROR_RATE  share of calls failing with a 5xx-style error
+    REGULENS_STANDIN_429_RATE    share of calls failing with a 429
+    REGULENS_STANDIN_SEED        random seed for latency and fault injection
+    REGULENS_STANDIN_CHUNK_INTERVAL  seconds between streamed LLM chunks
+"""
+import os
+import re
+import json
+import time
+import zlib
+import random
+import hashlib
+import threading
+import numpy as np
+
+from agents.backends import LLMBackend, EmbeddingBackend
+
+
+class StandInServiceError(Exception):
+    """Injected server-side failure (like a 500/503 from the real API)"""
+
+    code = 503
+
+
+class StandInRateLimitError(Exception):
+    """Injected quota error (like a 429 RESOURCE_EXHAUSTED from the real API)"""
+
+    code = 429
+
+
+class LatencyModel:
+    """Samples call latency from a named distribution"""
+
+    def __init__(self, distribution: str = 'constant', *params: float):
+        """
+        Args:
+            distribution: 'constant' (s), 'uniform' (low, high),
+                'normal' (mean, stddev) or 'lognormal' (median, sigma)
+            *params: Distribution parameters in seconds
+        """
+        if distribution not in ('constant', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.params = params or (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyModel':
+        """Parse "name:param:param", e.g. "lognormal:0.8:0.5" """
+        name, *params = spec.split(':')
+        return cls(name, *(float(p) for p in params))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == 'constant':
+            return self.params[0]
+        if self.distribution == 'uniform':
+            return rng.uniform(self.params[0], self.params[1])
+        if self.distribution == 'normal':
+            return max(0.0, rng.gauss(self.params[0], self.params[1]))
+        median, sigma = self.params[0], self.params[1]
+        return rng.lognormvariate(np.log(median), sigma) if median > 0 else 0.0
+
+
+class _FaultInjection:
+    """Shared latency + error/429 injection for both stand-ins"""
+
+    def __init__(self, latency: LatencyModel = None, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 0):
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'errors': 0, 'rate_limited': 0}
+
+    @staticmethod
+    def _env_kwargs() -> dict:
+        return {
+            'latency': LatencyModel.parse(os.getenv('REGULENS_STANDIN_LATENCY', 'constant:0')),
+            'error_rate': float(os.getenv('REGULENS_STANDIN_ERROR_RATE', '0')),
+            'rate_limit_rate': float(os.getenv('REGULENS_STANDIN_429_RATE', '0')),
+            'seed': int(os.getenv('REGULENS_STANDIN_SEED', '0')),
+        }
+
+    def _simulate_call(self, extra_latency: float = 0.0):
+        """Sleep for a sampled latency, then maybe raise an injected fault"""
+        with self._lock:
+            delay = self.latency.sample(self._rng) + extra_latency
+            roll = self._rng.random()
+            self.stats['calls'] += 1
+        time.sleep(delay)
+
+        if roll < self.rate_limit_rate:
+            with self._lock:
+                self.stats['rate_limited'] += 1
+            raise StandInRateLimitError("429 RESOURCE_EXHAUSTED (injected)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise StandInServiceError("503 UNAVAILABLE (injected)")
+
+
+class _StandInUsage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class _StandInResponse:
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        self.usage_metadata = _StandInUsage(len(prompt.split()), len(text.split()))
+
+
+class _StandInChunk:
+    def __init__(self, text: str, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+def _chunk_response(response, words_per_chunk: int = 4):
+    """Split a complete response into stream chunks (usage on the last one)"""
+    words = response.text.split(' ')
+    pieces = [' '.join(words[i:i + words_per_chunk]) for i in range(0, len(words), words_per_chunk)]
+    for i, piece in enumerate(pieces):
+        last = i == len(pieces) - 1
+        yield _StandInChunk(piece + ('' if last else ' '), response.usage_metadata if last else None)
+
+
+class _StandInModels:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def generate_content(self, model=None, contents=None, **kwargs):
+        prompt = contents if isinstance(contents, str) else str(contents)
+        self._backend._simulate_call()
+        return _StandInResponse(self._backend.respond(prompt), prompt)
+
+    def generate_content_stream(self, model=None, contents=None, **kwargs):
+        """Sampled latency before the first chunk, then chunk_interval between chunks"""
+        prompt = contents if isinstance(contents, str) else str(contents)
+        self._backend._simulate_call()
+        response = _StandInResponse(self._backend.respond(prompt), prompt)
+        for i, chunk in enumerate(_chunk_response(response)):
+            if i and self._backend.chunk_interval:
+                time.sleep(self._backend.chunk_interval)
+            yield chunk
+
+
+class StandInLLMBackend(_FaultInjection, LLMBackend):
+    """genai.Client stand-in with deterministic, prompt-derived output"""
+
+    name = 'standin-llm'
+
+    def __init__(self, chunk_interval: float = 0.0, **kwargs):
+        """
+        Args:
+            chunk_interval: Seconds between streamed chunks
+            latency: LatencyModel for each call (time to first chunk when streaming)
+            error_rate: Share of calls raising StandInServiceError
+            rate_limit_rate: Share of calls raising StandInRateLimitError
+            seed: Random seed for latency and fault injection
+        """
+        super().__init__(**kwargs)
+        self.chunk_interval = chunk_interval
+        self._models = _StandInModels(self)
+
+    @classmethod
+    def from_env(cls) -> 'StandInLLMBackend':
+        chunk_interval = float(os.getenv('REGULENS_STANDIN_CHUNK_INTERVAL', '0'))
+        return cls(chunk_interval=chunk_interval, **cls._env_kwargs())
+
+    @property
+    def models(self):
+        return self._models
+
+    def respond(self, prompt: str) -> str:
+        """Deterministic reply that still looks like the prompt's expected format"""
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        if 'remediation plan' in prompt:
+            return (f"**GAP ANALYSIS:**\nStand-in analysis {digest}.\n\n"
+                    f"**IMPLEMENTATION STEPS:**\n1. Update policy\n2. Train staff\n3. Verify\n\n"
+                    f"**TIMELINE:** 30 days")
+        if 'executive summary' in prompt:
+            return f"Stand-in executive summary {digest}: review the priority gaps listed in this report."
+        return f"🟡 UPDATE: Stand-in recommendation {digest} - align the policy with the regulation."
+
+
+class StandInEmbeddingBackend(_FaultInjection, EmbeddingBackend):
+    """
+    Deterministic fake embeddings
+
+    Each word is hashed to a fixed random direction, so texts sharing
+    words get similar vectors and scores behave like a (crude) semantic
+    model, with no network and identical results on every machine.
+    """
+
+    def __init__(self, dimensions: int = 256, per_item_latency: float = 0.0,
+                 name: str = None, **kwargs):
+        """
+        Args:
+            dimensions: Vector size
+            per_item_latency: Extra seconds per text in a batch
+            name: Broker key (stand-ins with the same name share batching);
+                defaults to one built from the settings, so stand-ins
+                configured differently never share a broker
+            **kwargs: Latency/fault settings (see StandInLLMBackend)
+        """
+        super().__init__(**kwargs)
+        self.dimensions = dimensions
+        self.per_item_latency = per_item_latency
+        self.name = name or (
+            f"standin-embeddings[{dimensions}d, "
+            f"latency={':'.join([self.latency.distribution, *map(str, self.latency.params)])}, "
+            f"per_item={per_item_latency}, errors={self.error_rate}, "
+            f"429={self.rate_limit_rate}, seed={self.seed}]"
+        )
+
+    @classmethod
+    def from_env(cls) -> 'StandInEmbeddingBackend':
+        return cls(**cls._env_kwargs())
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        seed = zlib.crc32(word.encode('utf-8'))
+        return np.random.default_rng(seed).standard_normal(self.dimensions)
+
+    def embed_text(self, text: str) -> list:
+        vector = np.zeros(self.dimensions)
+        for word in re.findall(r'[a-z0-9]+', text.lower()):
+            vector += self._word_vector(word)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed(self, items: list) -> list:
+        self._simulate_call(self.per_item_latency * len(items))
+        return [self.embed_text(text) for text, _ in items]
+
+
+class _Recording:
+    """Append-only JSONL store keyed by request hash"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['key']] = entry['value']
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha256('\x1f'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def put(self, key: str, value):
+        with self._lock:
+            self.entries[key] = value
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'value': value}, ensure_ascii=False) + '\n')
+
+
+class _RecordReplayModels:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def generate_content(self, model=None, contents=None, **kwargs):
+        backend = self._backend
+        prompt = contents if isinstance(contents, str) else str(contents)
+        key = _Recording.key(model, prompt)
+
+        if backend.mode == 'replay':
+            text = backend.recording.get(key)
+            if text is None:
+                raise KeyError(f"No recorded LLM response for prompt {key[:12]}")
+            return _StandInResponse(text, prompt)
+
+        response = backend.inner.models.generate_content(model=model, contents=contents, **kwargs)
+        backend.recording.put(key, response.text)
+        return response
+
+    def generate_content_stream(self, model=None, contents=None, **kwargs):
+        """Replays (or records) the complete response, split into chunks"""
+        prompt = contents if isinstance(contents, str) else str(contents)
+        response = self.generate_content(model=model, contents=contents, **kwargs)
+        yield from _chunk_response(_StandInResponse(response.text, prompt))
+
+
+class RecordReplayLLMBackend(LLMBackend):
+    """Records real LLM responses to disk, or replays them offline"""
+
+    name = 'record-replay-llm'
+
+    def __init__(self, directory: str, mode: str = 'replay', inner=None):
+        """
+        Args:
+            directory: Recording directory (llm.jsonl inside it)
+            mode: 'record' (call `inner` and save) or 'replay' (disk only)
+            inner: Real backend, required for 'record'
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"mode must be 'record' or 'replay', not {mode}")
+        if mode == 'record' and inner is None:
+            raise ValueError("record mode needs a real LLM backend (is GEMINI_API_KEY set?)")
+        self.mode = mode
+        self.inner = inner
+        self.recording = _Recording(os.path.join(directory, 'llm.jsonl'))
+        self._models = _RecordReplayModels(self)
+
+    @property
+    def models(self):
+        return self._models
+
+
+class RecordReplayEmbeddingBackend(EmbeddingBackend):
+    """Records real embeddings to disk, or replays them offline"""
+
+    def __init__(self, directory: str, mode: str = 'replay', inner=None):
+        """
+        Args:
+            directory: Recording directory (embeddings.jsonl inside it)
+            mode: 'record' (call `inner` and save) or 'replay' (disk only)
+            inner: Real EmbeddingBackend, required for 'record'
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"mode must be 'record' or 'replay', not {mode}")
+        if mode == 'record' and inner is None:
+            raise ValueError("record mode needs a working embedding backend (is Vertex AI configured?)")
+        self.mode = mode
+        self.inner = inner
+        self.recording = _Recording(os.path.join(directory, 'embeddings.jsonl'))
+        # Broker key: backends with other recordings or modes get their own broker
+        self.name = f"record-replay-embeddings[{mode}:{os.path.abspath(directory)}]"
+
+    def embed(self, items: list) -> list:
+        keys = [_Recording.key(text, task_type) for text, task_type in items]
+
+        if self.mode == 'replay':
+            vectors = [self.recording.get(key) for key in keys]
+            missing = sum(v is None for v in vectors)
+            if missing:
+                raise KeyError(f"{missing} of {len(items)} texts have no recorded embedding")
+            return vectors
+
+        vectors = self.inner.embed(items)
+        for key, vector in zip(keys, vectors):
+            self.recording.put(key, list(vector))
+        return vectors
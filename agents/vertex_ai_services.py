@@ -1,47 +1,101 @@
 import sys
 import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Only needed when run as a script; importing the module has no side effects
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 """
 Vertex AI Embeddings Service - Enhanced with better error handling
+
+The Vertex AI SDK is imported and .env is loaded when the first
+VertexAIEmbeddings is created, not when this module is imported.
 """
 import os
-from dotenv import load_dotenv
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Force reload environment
-load_dotenv(override=True)
+import time
+from utils.env import load_env
+from utils.document_utils import calculate_similarity
+from utils.circuit_breaker import CircuitOpenError, get_breaker
+from utils.quantized_embeddings import QuantizedEmbeddings
+from agents.embedding_broker import get_broker
+from agents.backends import EmbeddingBackend
 
-# Global flag
-VERTEX_AVAILABLE = False
+# Global flag (None until _import_vertex() has run)
+VERTEX_AVAILABLE = None
 VERTEX_ERROR = None
 
-try:
-    import vertexai
-    from vertexai.language_models import TextEmbeddingModel, TextEmbeddingInput
-    VERTEX_AVAILABLE = True
-    print("   ✅ Vertex AI packages imported")
-except ImportError as e:
-    VERTEX_ERROR = f"Import failed: {e}"
-    print(f"   ⚠️ Vertex AI packages not available: {e}")
+vertexai = None
+TextEmbeddingModel = None
+TextEmbeddingInput = None
+
+
+def _import_vertex() -> bool:
+    """Import the Vertex AI SDK on first use"""
+    global VERTEX_AVAILABLE, VERTEX_ERROR, vertexai, TextEmbeddingModel, TextEmbeddingInput
+    
+    if VERTEX_AVAILABLE is None:
+        try:
+            import vertexai
+            from vertexai.language_models import TextEmbeddingModel, TextEmbeddingInput
+            VERTEX_AVAILABLE = True
+            print("   ✅ Vertex AI packages imported")
+        except ImportError as e:
+            VERTEX_AVAILABLE = False
+            VERTEX_ERROR = f"Import failed: {e}"
+            print(f"   ⚠️ Vertex AI packages not available: {e}")
+    
+    return VERTEX_AVAILABLE
+
+
+class VertexEmbeddingBackend(EmbeddingBackend):
+    """EmbeddingBackend over a loaded Vertex AI TextEmbeddingModel"""
+    
+    name = 'text-embedding-004'
+    
+    def __init__(self, model):
+        self.model = model
+    
+    def embed(self, items: list) -> list:
+        """Embed a batch of (text, task_type) tuples in one API call"""
+        inputs = [
+            TextEmbeddingInput(text=text, task_type=task_type)
+            for text, task_type in items
+        ]
+        return [embedding.values for embedding in self.model.get_embeddings(inputs)]
 
 
 class VertexAIEmbeddings:
     """Vertex AI text embeddings for semantic matching"""
     
-    def __init__(self):
+    def __init__(self, circuit_breaker=None, backend: EmbeddingBackend = None):
+        """
+        Args:
+            circuit_breaker: Breaker guarding Vertex calls (defaults to the
+                process-wide 'vertex-ai' breaker)
+            backend: Use this EmbeddingBackend (e.g. an offline stand-in)
+                instead of connecting to Vertex AI
+        """
+        # Force reload environment
+        load_env(override=True)
+        
         self.project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         self.creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
         self.model = None
+        self.backend = None
         self.vertex_enabled = False
         self.error_message = None
+        self.circuit_breaker = circuit_breaker or get_breaker('vertex-ai')
+        self.broker = None
+        
+        if backend is not None:
+            self._use_backend(backend)
+            print(f"   ✅ Embeddings via backend: {backend.name}")
+            return
         
         print(f"\n   🔍 Initializing Vertex AI...")
         print(f"      Project ID: {self.project_id}")
         print(f"      Credentials: {self.creds_path}")
         
-        if not VERTEX_AVAILABLE:
+        if not _import_vertex():
             self.error_message = VERTEX_ERROR
             print(f"      ❌ Vertex AI unavailable: {VERTEX_ERROR}")
             return
@@ -68,7 +122,7 @@ class VertexAIEmbeddings:
             print(f"      Loading model: text-embedding-004")
             self.model = TextEmbeddingModel.from_pretrained("text-embedding-004")
             
-            self.vertex_enabled = True
+            self._use_backend(VertexEmbeddingBackend(self.model))
             print("      ✅ Vertex AI Embeddings ACTIVE")
             
         except Exception as e:
@@ -76,26 +130,45 @@ class VertexAIEmbeddings:
             print(f"      ❌ Vertex AI initialization failed: {e}")
             print(f"      Will use TF-IDF fallback")
     
-    def get_similarity(self, text1: str, text2: str) -> float:
-        """Calculate semantic similarity"""
-        if not self.vertex_enabled or not self.model:
+    def _use_backend(self, backend: EmbeddingBackend):
+        """Route embeddings through a backend via its process-wide broker"""
+        self.backend = backend
+        # Shared with every other session embedding with this backend
+        self.broker = get_broker(backend.name, backend.embed)
+        self.vertex_enabled = True
+    
+    def get_similarity(self, text1: str, text2: str, allow_fallback: bool = True) -> float:
+        """
+        Calculate semantic similarity
+        
+        Args:
+            allow_fallback: If False, raise instead of silently returning a
+                TF-IDF score, so callers can switch thresholds themselves
+        
+        Raises:
+            CircuitOpenError: If allow_fallback is False and the breaker is open
+        """
+        if not self.vertex_enabled or not self.backend:
             # Fallback
-            from utils.document_utils import calculate_similarity
+            if not allow_fallback:
+                raise CircuitOpenError(self.error_message or "Vertex AI not enabled")
+            return calculate_similarity(text1, text2)
+        
+        # Skip the network entirely while the breaker is open
+        if not self.circuit_breaker.allow_request():
+            if not allow_fallback:
+                raise CircuitOpenError("vertex-ai circuit is open")
             return calculate_similarity(text1, text2)
         
         try:
-            # Use Vertex AI
-            inputs = [
-                TextEmbeddingInput(text=text1, task_type="SEMANTIC_SIMILARITY"),
-                TextEmbeddingInput(text=text2, task_type="SEMANTIC_SIMILARITY")
-            ]
-            
-            embeddings = self.model.get_embeddings(inputs)
+            # Use Vertex AI (via the shared broker, so identical texts from
+            # concurrent sessions are embedded once and batched together)
+            start = time.monotonic()
+            values1, values2 = self.broker.embed([text1, text2], task_type="SEMANTIC_SIMILARITY")
+            self.circuit_breaker.record_success(time.monotonic() - start)
             
-            vec1 = np.array(embeddings[0].values).reshape(1, -1)
-            vec2 = np.array(embeddings[1].values).reshape(1, -1)
-            
-            similarity = cosine_similarity(vec1, vec2)[0][0]
+            vectors = QuantizedEmbeddings([values1, values2])
+            similarity = vectors.take([0]).dot(vectors.take([1]))[0, 0]
             
             # Normalize to 0-1
             similarity = (similarity + 1) / 2
@@ -103,10 +176,57 @@ class VertexAIEmbeddings:
             return float(similarity)
             
         except Exception as e:
+            self.circuit_breaker.record_failure(e)
+            if not allow_fallback:
+                raise
             print(f"      ⚠️ Vertex AI error during similarity: {e}")
-            from utils.document_utils import calculate_similarity
             return calculate_similarity(text1, text2)
     
+    def get_similarity_matrix(self, texts_a: list, texts_b: list):
+        """
+        Similarity of every text in texts_a to every text in texts_b
+        
+        Each distinct text is embedded once (in broker batches) instead of
+        once per pair, and all scores come from one float32 matrix product.
+        The vectors live only for this call, so they are not quantized:
+        that would lose precision without saving memory.
+        
+        Returns:
+            numpy array of shape (len(texts_a), len(texts_b)), scores 0-1
+        
+        Raises:
+            CircuitOpenError: If Vertex AI is not enabled or the breaker is open
+        """
+        import numpy as np
+        
+        if not self.vertex_enabled or not self.backend:
+            raise CircuitOpenError(self.error_message or "Vertex AI not enabled")
+        if not texts_a or not texts_b:
+            return np.zeros((len(texts_a), len(texts_b)), dtype=np.float32)
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError("vertex-ai circuit is open")
+        
+        unique_texts = list(dict.fromkeys(list(texts_a) + list(texts_b)))
+        try:
+            start = time.monotonic()
+            vectors = self.broker.embed(unique_texts, task_type="SEMANTIC_SIMILARITY")
+            # The breaker's latency threshold is per model call: a large
+            # matrix is many broker batches, so record the time per round
+            rounds = self.broker.batch_rounds(len(unique_texts))
+            self.circuit_breaker.record_success((time.monotonic() - start) / rounds)
+        except Exception as e:
+            self.circuit_breaker.record_failure(e)
+            raise
+        
+        vectors = QuantizedEmbeddings(vectors)
+        row = {text: i for i, text in enumerate(unique_texts)}
+        
+        matrix_a = vectors.take([row[t] for t in texts_a])
+        matrix_b = vectors.take([row[t] for t in texts_b])
+        
+        # Cosine similarity normalized to 0-1, as in get_similarity()
+        return (matrix_a.dot(matrix_b) + 1) / 2
+    
     def is_enabled(self) -> bool:
         """Check if Vertex AI is enabled"""
         return self.vertex_enabled
@@ -116,7 +236,9 @@ class VertexAIEmbeddings:
         return {
             'enabled': self.vertex_enabled,
             'error': self.error_message,
-            'project': self.project_id
+            'project': self.project_id,
+            'circuit_breaker': self.circuit_breaker.get_status(),
+            'embedding_broker': self.broker.get_stats() if self.broker else None
         }
 
 
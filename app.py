@@ -8,9 +8,75 @@ Powered by Gemini AI + Vertex AI
 """
 import streamlit as st
 from agents.enhanced_agent import EnhancedComplianceAgent
-import plotly.graph_objects as go
-import pandas as pd
-from utils.pdf_extractor import extract_text_from_pdf, is_pdf
+from utils.pdf_extractor import is_pdf
+from utils.prefetch import PrefetchCancelled, extract_document, get_prefetcher
+from utils.profiling import enable_profiling, last_profile_dir
+from utils.records import GapTable, RISK_LEVELS
+from utils.run_store import StoredGapTable, get_run_store
+from utils.document_utils import MATCH_THRESHOLDS
+
+
+def open_run(run_store, run_id: int):
+    """Show a stored run: the session keeps its ID, gaps are queried from SQLite"""
+    st.session_state.run_id = run_id
+    st.session_state.report = run_store.get_report(run_id)  # everything but the gaps
+    st.session_state.gap_table = StoredGapTable(run_store, run_id)
+
+
+def keep_report(report: dict, label: str = None):
+    """Show a new report, saving it to the run store when one is enabled"""
+    run_store = get_run_store()
+    if run_store is None:
+        st.session_state.run_id = None
+        st.session_state.report = report
+        st.session_state.gap_table = GapTable(report['all_gaps'])
+        return
+    names = st.session_state.get('document_names', (None, None))
+    open_run(run_store, run_store.save_run(report, *names, label=label))
+
+def prefetch_upload(role: str, uploaded_file):
+    """
+    Start background extraction of an upload as soon as it arrives
+
+    Releases the previous upload of this role (cancelling its extraction
+    if nobody else needs it) when the file is replaced or removed.
+
+    Returns:
+        Prefetch key, or None without a file
+    """
+    prefetcher = get_prefetcher()
+    state_key = f'prefetch_{role}'
+    file_id = None
+    if uploaded_file is not None:
+        file_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+    current = st.session_state.get(state_key)
+    if current is not None and current[0] == file_id:
+        return current[1]
+    if current is not None:
+        prefetcher.release(current[1])
+        del st.session_state[state_key]
+    if uploaded_file is None:
+        return None
+    key = prefetcher.submit(role, uploaded_file.name, uploaded_file.getvalue())
+    st.session_state[state_key] = (file_id, key)
+    return key
+
+
+def show_prefetch_status(prefetch_key: str):
+    status = get_prefetcher().status(prefetch_key)
+    if status == 'done':
+        document = get_prefetcher().result(prefetch_key)
+        st.caption(f"⚡ Ready: {len(document['requirements'])} clauses extracted in the background")
+    elif status in ('queued', 'running'):
+        st.caption("⏳ Extracting in the background...")
+
+
+def load_upload(role: str, uploaded_file, prefetch_key: str) -> dict:
+    """Prefetched document (waiting for it if needed), or a fresh extraction"""
+    try:
+        return get_prefetcher().result(prefetch_key)
+    except (KeyError, PrefetchCancelled):
+        return extract_document(role, uploaded_file.name, uploaded_file.getvalue())
 
 # Page config
 st.set_page_config(
@@ -45,6 +111,49 @@ with st.sidebar:
     st.markdown("### ⚙️ Configuration")
     st.info("💡 Using AI-powered analysis with Gemini")
     
+    time_budget = st.number_input(
+        "⏱️ Time budget (seconds, 0 = unlimited)",
+        min_value=0,
+        max_value=3600,
+        value=0,
+        step=30,
+        help="When the budget runs out, remaining gaps use rule-based recommendations"
+    )
+    
+    top_k = st.number_input(
+        "🧩 Policy clauses combined per requirement",
+        min_value=1,
+        max_value=5,
+        value=1,
+        help="Combine the coverage of the best k policy clauses, so a requirement "
+             "covered by several clauses together is not flagged PARTIAL"
+    )
+    
+    profile_toggle = st.checkbox(
+        "🔬 Profile this run",
+        value=False,
+        help="Write cProfile, allocation and flamegraph reports to .regulens/profiles"
+    )
+    
+    # Past analyses (see utils/run_store.py)
+    run_store = get_run_store()
+    past_runs = run_store.list_runs() if run_store else []
+    if past_runs:
+        st.markdown("---")
+        st.markdown("### 📚 Past Runs")
+        run_labels = {
+            run['run_id']: f"#{run['run_id']} {run['created_at'][:16].replace('T', ' ')} - "
+                           f"{run['compliance_score']:.0f}%" + (f" ({run['label']})" if run['label'] else "")
+            for run in past_runs
+        }
+        past_run_id = st.selectbox("Run", list(run_labels), format_func=run_labels.get)
+        if st.button("📂 Open run", use_container_width=True):
+            open_run(run_store, past_run_id)
+            # Cached scores belong to the last analysis, not this run
+            st.session_state.pop('agent', None)
+            for key in [k for k in st.session_state if str(k).startswith('threshold_')]:
+                del st.session_state[key]
+    
     st.markdown("---")
     st.markdown("### 📊 About")
     st.markdown("""
@@ -94,6 +203,11 @@ with col1:
         if uploaded_reg:
             file_type = "PDF" if is_pdf(uploaded_reg.name) else "Text"
             st.info(f"📎 {uploaded_reg.name} ({file_type}, {uploaded_reg.size / 1024:.1f} KB)")
+    
+    # Extraction starts on upload, not on Analyze
+    reg_prefetch = prefetch_upload('regulation', uploaded_reg)
+    if reg_prefetch:
+        show_prefetch_status(reg_prefetch)
 
 with col2:
     st.markdown("**📋 Internal Policy Document**")
@@ -120,6 +234,10 @@ with col2:
         if uploaded_policy:
             file_type = "PDF" if is_pdf(uploaded_policy.name) else "Text"
             st.info(f"📎 {uploaded_policy.name} ({file_type}, {uploaded_policy.size / 1024:.1f} KB)")
+    
+    policy_prefetch = prefetch_upload('policy', uploaded_policy)
+    if policy_prefetch:
+        show_prefetch_status(policy_prefetch)
 
 st.markdown("---")
 
@@ -142,50 +260,79 @@ if analyze_button:
         st.error("⚠️ Please select or upload both documents!")
     else:
         with st.spinner("🔄 Running AI-powered compliance analysis..."):
+            # Per-session toggle (Streamlit runs each session in its own thread)
+            enable_profiling(profile_toggle)
             try:
-                # Load regulation document
+                # Load regulation document (uploads were extracted in the
+                # background; this waits only if that is still running)
                 reg_pages_data = None
+                reg_requirements = None
                 if use_sample_reg:
                     with open('data/regulations/rbi_regulation.txt', 'r', encoding='utf-8') as f:
                         reg_text = f.read()
                 else:
-                    if is_pdf(uploaded_reg.name):
-                        st.info("📄 Extracting text from PDF with page tracking...")
-                        result = extract_text_from_pdf(uploaded_reg, track_pages=True)
-                        reg_text = result['text']
-                        reg_pages_data = result['pages']
-                        st.success(f"✅ Extracted {result['total_pages']} pages")
-                    else:
-                        reg_text = uploaded_reg.read().decode('utf-8')
+                    document = load_upload('regulation', uploaded_reg, reg_prefetch)
+                    reg_text = document['text']
+                    reg_pages_data = document['pages']
+                    reg_requirements = document['requirements']
+                    if document['total_pages']:
+                        st.success(f"✅ Extracted {document['total_pages']} pages")
                 
                 # Load policy document with page tracking
                 policy_pages_data = None
+                policy_controls = None
                 if use_sample_policy:
                     with open('data/policies/company_policy.txt', 'r', encoding='utf-8') as f:
                         policy_text = f.read()
                 else:
-                    if is_pdf(uploaded_policy.name):
-                        st.info("📄 Extracting text from PDF with page tracking...")
-                        result = extract_text_from_pdf(uploaded_policy, track_pages=True)
-                        policy_text = result['text']
-                        policy_pages_data = result['pages']
-                        st.success(f"✅ Extracted {result['total_pages']} pages")
+                    document = load_upload('policy', uploaded_policy, policy_prefetch)
+                    policy_text = document['text']
+                    policy_pages_data = document['pages']
+                    policy_controls = document['requirements']
+                    if document['total_pages']:
+                        st.success(f"✅ Extracted {document['total_pages']} pages")
+                
+                # Gemini output appears here as it streams in
+                live_recommendation = st.empty()
+                live_summary = st.empty()
+                
+                def show_stream(target, text):
+                    if target == 'executive_summary':
+                        live_summary.info(f"📝 {text}")
                     else:
-                        policy_text = uploaded_policy.read().decode('utf-8')
+                        live_recommendation.info(f"**{target}** - {text}")
                 
                 # Run analysis with page data
-                agent = EnhancedComplianceAgent()
+                agent = EnhancedComplianceAgent(top_k=top_k)
                 report = agent.run_full_analysis(
                     reg_text, 
                     policy_text,
                     reg_pages_data=reg_pages_data,
-                    policy_pages_data=policy_pages_data
+                    policy_pages_data=policy_pages_data,
+                    deadline_seconds=time_budget or None,
+                    on_stream=show_stream,
+                    reg_requirements=reg_requirements,
+                    policy_controls=policy_controls
+                )
+                live_recommendation.empty()
+                live_summary.empty()
+                
+                # Saved to the run store (or kept in session, with a columnar
+                # gap view built once per report)
+                st.session_state.document_names = (
+                    'RBI AML/KYC Master Direction 2024' if use_sample_reg else uploaded_reg.name,
+                    'FinTech Company AML Policy 2023' if use_sample_policy else uploaded_policy.name
                 )
+                keep_report(report)
                 
-                # Store in session
-                st.session_state.report = report
+                # Keep the agent (and its cached scores) for threshold tuning
+                st.session_state.agent = agent
+                for key in [k for k in st.session_state if str(k).startswith('threshold_')]:
+                    del st.session_state[key]
                 
                 st.success("✅ Analysis Complete!")
+                if profile_toggle and last_profile_dir():
+                    st.info(f"🔬 Profile written to `{last_profile_dir()}`")
                 
             except FileNotFoundError:
                 st.error("❌ Sample documents not found! Please upload custom documents.")
@@ -195,11 +342,19 @@ if analyze_button:
 
 # Display results
 if 'report' in st.session_state:
+    # Dashboard-only dependencies, loaded once there is something to show
+    import plotly.graph_objects as go
+    import pandas as pd
+    
     st.markdown("---")
     st.markdown("## 📊 Compliance Dashboard")
     
     report = st.session_state.report
     summary = report['summary']
+    if 'gap_table' not in st.session_state:
+        st.session_state.gap_table = GapTable(report['all_gaps'])
+    gap_table = st.session_state.gap_table
+    run_id = st.session_state.get('run_id')
     
     # Metrics row
     col1, col2, col3, col4 = st.columns(4)
@@ -237,6 +392,107 @@ if 'report' in st.session_state:
     st.markdown("---")
     st.markdown("### 📝 Executive Summary")
     st.info(report['executive_summary'])
+    
+    # Time budget breakdown
+    time_budget_info = report.get('time_budget')
+    if time_budget_info and time_budget_info.get('budget_seconds'):
+        with st.expander("⏱️ Time Budget", expanded=time_budget_info['expired']):
+            st.markdown(
+                f"**Used {time_budget_info['elapsed_seconds']:.1f}s of "
+                f"{time_budget_info['budget_seconds']:.0f}s** | "
+                f"AI-generated gaps: {time_budget_info['ai_generated_gaps']} | "
+                f"Templated gaps: {time_budget_info['templated_gaps']}"
+            )
+            for stage_name, stage in time_budget_info['stages'].items():
+                st.markdown(f"- `{stage_name}`: {stage['seconds']:.1f}s ({stage['share']:.0%} of budget)")
+            if time_budget_info['expired']:
+                st.warning("Budget ran out - some recommendations use rule-based templates")
+    
+    # Diagnostics - where the run spent its time
+    performance = report.get('performance')
+    if performance:
+        with st.expander(f"🩺 Diagnostics ({performance['total_wall_seconds']:.2f}s total)", expanded=False):
+            stage_rows = [
+                {
+                    'Stage': stage_name,
+                    'Wall (s)': stage['wall_seconds'],
+                    'CPU (s)': stage['cpu_seconds'],
+                    'Calls': stage['calls']
+                }
+                for stage_name, stage in performance['stages'].items()
+            ]
+            st.dataframe(pd.DataFrame(stage_rows), use_container_width=True, hide_index=True)
+            
+            counter_cols = st.columns(len(performance['counters']))
+            for col, (counter_name, value) in zip(counter_cols, performance['counters'].items()):
+                col.metric(counter_name.replace('_', ' ').title(), value)
+            
+            for latency_name, latency in performance.get('latencies', {}).items():
+                st.markdown(
+                    f"- `{latency_name}`: mean {latency['mean_seconds']:.2f}s "
+                    f"(min {latency['min_seconds']:.2f}s, max {latency['max_seconds']:.2f}s, "
+                    f"{latency['count']} calls)"
+                )
+    
+    # Circuit breakers that tripped during the run
+    for service_name, breaker in report.get('circuit_breakers', {}).items():
+        if breaker['trips'] or breaker['state'] != 'CLOSED':
+            st.warning(
+                f"🔌 {service_name} circuit {breaker['state']} after repeated failures "
+                f"({breaker['last_error']}) - local fallback was used"
+            )
+    # Threshold tuning - reclassify from the cached match scores, no re-run
+    agent = st.session_state.get('agent')
+    if agent is not None and agent.match_candidates is not None:
+        with st.expander("🎚️ Match Thresholds", expanded=False):
+            current = report.get('thresholds', MATCH_THRESHOLDS)
+            thresholds = {}
+            for method in sorted(set(agent.match_candidates.methods)):
+                limits = current.get(method, MATCH_THRESHOLDS[method])
+                col_a, col_b = st.columns(2)
+                with col_a:
+                    compliant = st.slider(
+                        f"{method}: COMPLIANT at or above",
+                        0.0, 1.0, float(limits['COMPLIANT']), 0.05,
+                        key=f"threshold_{method}_compliant"
+                    )
+                with col_b:
+                    partial = st.slider(
+                        f"{method}: PARTIAL at or above",
+                        0.0, 1.0, float(limits['PARTIAL']), 0.05,
+                        key=f"threshold_{method}_partial"
+                    )
+                thresholds[method] = {'COMPLIANT': compliant, 'PARTIAL': partial}
+            
+            if any(t['PARTIAL'] > t['COMPLIANT'] for t in thresholds.values()):
+                st.warning("PARTIAL threshold must not be above the COMPLIANT threshold")
+            else:
+                # Expander bodies run on every rerun, even collapsed: the
+                # preview is cached per report and thresholds, and needs
+                # only the gap statuses, not the gap rows
+                preview_key = (run_id or id(gap_table), repr(sorted(thresholds.items())))
+                cached = st.session_state.get('threshold_preview')
+                if cached is None or cached[0] != preview_key:
+                    cached = (preview_key, agent.preview_thresholds(gap_table.statuses(), thresholds))
+                    st.session_state.threshold_preview = cached
+                preview = cached[1]
+                statuses = preview['statuses']
+                st.markdown(
+                    f"**Preview:** {statuses.count('COMPLIANT')} compliant | "
+                    f"{statuses.count('PARTIAL')} partial | {statuses.count('MISSING')} missing - "
+                    f"**{len(preview['changed'])} gaps change status**"
+                )
+                if preview['changed'] and st.button("✅ Apply thresholds", key="apply_thresholds"):
+                    with st.spinner(f"🔄 Updating recommendations for {len(preview['changed'])} gaps..."):
+                        live_recommendation = st.empty()
+                        new_report = agent.reclassify(
+                            get_run_store().get_report(run_id, with_gaps=True) if run_id else report,
+                            thresholds,
+                            on_stream=lambda target, text: live_recommendation.info(f"**{target}** - {text}")
+                        )
+                    keep_report(new_report, label=f"reclassified from #{run_id}" if run_id else None)
+                    st.rerun()
+    
     # Charts
     st.markdown("---")
     st.markdown("### 📈 Compliance Breakdown")
@@ -278,12 +534,48 @@ if 'report' in st.session_state:
         )
         st.plotly_chart(fig_bar, use_container_width=True)
     
+    # Score trend and run comparison from the run store
+    history = get_run_store().list_runs() if run_id else []
+    if len(history) > 1:
+        with st.expander("📚 Run History", expanded=False):
+            trend = list(reversed(history))
+            fig_trend = go.Figure(data=[go.Scatter(
+                x=[run['created_at'] for run in trend],
+                y=[run['compliance_score'] for run in trend],
+                text=[f"#{run['run_id']}" for run in trend],
+                mode='lines+markers'
+            )])
+            fig_trend.update_layout(title="Compliance Score Trend", yaxis_title="Score (%)", height=300)
+            st.plotly_chart(fig_trend, use_container_width=True)
+            
+            other_runs = {
+                run['run_id']: f"#{run['run_id']} {run['created_at'][:16].replace('T', ' ')} - "
+                               f"{run['compliance_score']:.0f}%"
+                for run in history if run['run_id'] != run_id
+            }
+            compare_id = st.selectbox("Compare this run with", list(other_runs), format_func=other_runs.get)
+            changes = get_run_store().compare_runs(compare_id, run_id)
+            st.markdown(f"**{len(changes)} requirements changed status** (#{compare_id} → #{run_id})")
+            if changes:
+                st.dataframe(pd.DataFrame(changes), use_container_width=True, hide_index=True)
+    
     # Detailed Gap Analysis
     st.markdown("---")
     st.markdown("### 🎯 Detailed Gap Analysis")
     
+    # Near-duplicate requirements analyzed once per cluster
+    duplicate_clusters = report.get('duplicate_clusters') or []
+    if duplicate_clusters:
+        duplicate_count = sum(len(cluster['members']) - 1 for cluster in duplicate_clusters)
+        with st.expander(f"🧬 Duplicate Requirements ({duplicate_count} in {len(duplicate_clusters)} clusters)"):
+            for cluster in duplicate_clusters:
+                st.markdown(
+                    f"- `{cluster['representative']}` ← "
+                    + ", ".join(f"`{member}`" for member in cluster['members'][1:])
+                )
+    
     # Filter controls
-    col1, col2 = st.columns([2, 1])
+    col1, col2, col3 = st.columns([2, 2, 1])
     with col1:
         filter_status = st.multiselect(
             "Filter by Status:",
@@ -291,27 +583,43 @@ if 'report' in st.session_state:
             default=['MISSING', 'PARTIAL']
         )
     with col2:
+        filter_risk = st.multiselect(
+            "Filter by Risk:",
+            list(RISK_LEVELS),
+            default=list(RISK_LEVELS)
+        )
+    with col3:
         sort_by = st.selectbox(
             "Sort by:",
-            ['Risk Level', 'Match Score', 'Requirement ID']
+            list(GapTable.SORT_KEYS)
         )
+    search = st.text_input(
+        "🔍 Search requirements:",
+        placeholder="e.g. beneficial owner, retention",
+        help="Matches requirements containing words that start with every search term"
+    )
     
-    # Filter gaps
-    filtered_gaps = [g for g in report['all_gaps'] if g['gap_status'] in filter_status]
+    # Filter and sort gaps (precomputed sort orders, status/risk masks, word index)
+    selected = gap_table.select(filter_status, sort_by, filter_risk, search)
     
-    # Sort gaps
-    if sort_by == 'Risk Level':
-        filtered_gaps = sorted(
-            filtered_gaps,
-            key=lambda x: (['CRITICAL', 'HIGH', 'MEDIUM', 'LOW'].index(x['risk_level']))
-        )
-    elif sort_by == 'Match Score':
-        filtered_gaps = sorted(filtered_gaps, key=lambda x: x['match_score'])
+    # Pagination
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        page_size = st.selectbox("Gaps per page:", [10, 25, 50])
+    page_count = max(1, -(-len(selected) // page_size))
+    with col2:
+        page = st.number_input("Page:", min_value=1, max_value=page_count, value=1, step=1)
+    start = (min(int(page), page_count) - 1) * page_size
+    page_positions = selected[start:start + page_size]
     
     # Display gaps
-    st.markdown(f"**Showing {len(filtered_gaps)} gaps**")
+    if len(selected):
+        st.markdown(f"**Showing {start + 1}–{start + len(page_positions)} of {len(selected)} gaps** "
+                    f"(page {min(int(page), page_count)} of {page_count})")
+    else:
+        st.markdown("**No gaps match the filters**")
     
-    for i, gap in enumerate(filtered_gaps[:10]):  # Show top 10
+    for i, (index, gap) in enumerate(zip(page_positions, gap_table.rows(page_positions))):
         # Color code by risk
         if gap['risk_level'] == 'CRITICAL':
             badge_color = '🔴'
@@ -330,6 +638,15 @@ if 'report' in st.session_state:
             st.markdown(f"**Criticality:** {gap['requirement_criticality']}")
             st.markdown(f"**Gap Status:** {gap['gap_status']}")
             st.markdown(f"**Match Score:** {gap['match_score']:.0%}")
+            if gap.get('duplicate_of'):
+                st.markdown(f"**Duplicate of:** `{gap['duplicate_of']}` (analysis reused)")
+            if gap.get('recommendation_source'):
+                source_label = {
+                    'gemini': "🤖 AI-generated",
+                    'reused': "♻️ Reused from a similar gap",
+                    'rule-numeric': "🔢 Numeric mismatch check"
+                }.get(gap['recommendation_source'], "📄 Templated")
+                st.markdown(f"**Recommendation:** {source_label}")
             
             st.markdown("---")
             st.markdown("**📋 Regulatory Requirement:**")
@@ -338,6 +655,9 @@ if 'report' in st.session_state:
             if gap['matched_control']:
                 st.markdown("**✅ Matched Policy Control:**")
                 st.success(gap['matched_control'])
+                for supporting_control in gap.get('supporting_controls') or []:
+                    st.markdown("**➕ Also covered by:**")
+                    st.success(supporting_control)
             else:
                 st.warning("❌ No matching policy control found")
             
@@ -347,7 +667,9 @@ if 'report' in st.session_state:
             st.markdown("### 📌 Quick Action Summary")
             st.markdown("*For executives and decision-makers*")
             
-            quick_summary = gap.get('quick_summary', gap.get('recommendation', 'No summary available'))
+            # Recommendation texts are loaded only for the gaps shown
+            texts = gap_table.texts(index)
+            quick_summary = texts['quick_summary'] or 'No summary available'
             
             # Display with appropriate color based on severity
             if '🔴 CRITICAL' in quick_summary or 'CRITICAL' in quick_summary:
@@ -361,7 +683,7 @@ if 'report' in st.session_state:
             
             # TIER 2: Detailed Remediation Plan (Expandable)
             with st.expander("📋 **Detailed Remediation Plan** *(For compliance officers)*", expanded=False):
-                detailed_plan = gap.get('detailed_plan', gap.get('recommendation', 'No detailed plan available'))
+                detailed_plan = texts['detailed_plan'] or 'No detailed plan available'
                 
                 st.markdown(detailed_plan)
                 
@@ -384,16 +706,37 @@ if 'report' in st.session_state:
     col1, col2 = st.columns(2)
     
     with col1:
-        # Export as CSV
-        df = pd.DataFrame(report['all_gaps'])
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Full Report (CSV)",
-            data=csv,
-            file_name="regulens_compliance_report.csv",
-            mime="text/csv",
-            use_container_width=True
+        # Full report: streamed to a temporary file only when requested,
+        # and the bytes kept per run and format for later reruns
+        from utils.export import available_formats, export_archive
+        
+        export_format = st.selectbox(
+            "Format:",
+            available_formats(),
+            format_func=lambda fmt: fmt.upper()
+        )
+        split_texts = st.checkbox(
+            "Recommendation texts in a separate file",
+            help="Keeps the main file small; both files are downloaded as one .zip"
         )
+        export_run = run_id or id(gap_table)
+        exports = st.session_state.get('exports')
+        if exports is None or exports['run'] != export_run:
+            exports = st.session_state.exports = {'run': export_run, 'files': {}}
+        export = exports['files'].get((export_format, split_texts))
+        if export is None:
+            if st.button("📦 Prepare Full Report", use_container_width=True):
+                with st.spinner("Writing report..."):
+                    export = export_archive(gap_table, export_format, split_texts)
+                exports['files'][(export_format, split_texts)] = export
+        if export is not None:
+            st.download_button(
+                label=f"📥 Download Full Report ({export_format.upper()})",
+                data=export['data'],
+                file_name=export['file_name'],
+                mime=export['mime'],
+                use_container_width=True
+            )
     
     with col2:
         # Export summary as text
@@ -0,0 +1,179 @@
+"""
+Synthetic Regulation/Policy Generator for benchmarks
+
+Builds realistic documents of any size (10 to 100k clauses) by sampling
+clause templates from the sample documents under data/ and perturbing
+their amounts, deadlines and percentages. The same seed always produces
+the same documents.
+"""
+import os
+import re
+import random
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+REGULATION_TEMPLATE = os.path.join(DATA_DIR, 'regulations', 'rbi_regulation.txt')
+POLICY_TEMPLATE = os.path.join(DATA_DIR, 'policies', 'company_policy.txt')
+
+CLAUSES_PER_SECTION = 8
+
+# Clause heading, e.g. "3.2 Suspicious Transaction Reporting (STR)"
+_HEADING = re.compile(r'^\d+\.\d+\s+(.+)$')
+
+_AMOUNTS = ['INR 50,000', 'INR 2,00,000', 'INR 10,00,000', 'INR 25,000', 'INR 1,00,000', 'INR 5,00,000']
+_DAYS = [7, 10, 15, 30, 45, 60]
+_YEARS = [3, 5, 7, 8, 10]
+_PERCENTS = [10, 15, 20, 25, 30]
+
+
+def load_clause_templates(path: str) -> list:
+    """
+    Parse a sample document into (title, body) clause templates
+
+    A clause is a numbered heading line followed by its body lines up to
+    the next blank line.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.rstrip() for line in f]
+
+    templates = []
+    title, body = None, []
+    for line in lines + ['']:
+        match = _HEADING.match(line.strip())
+        if match:
+            title, body = match.group(1), []
+        elif not line.strip() or line.startswith('='):
+            if title and body:
+                templates.append((title, '\n'.join(body)))
+            title, body = None, []
+        elif title:
+            body.append(line.strip())
+    return templates
+
+
+def _perturb(text: str, rng: random.Random) -> str:
+    """Swap amounts, deadlines and percentages for random alternatives"""
+    text = re.sub(r'INR [\d,]+', lambda m: rng.choice(_AMOUNTS), text)
+    text = re.sub(r'\b\d+ days\b', lambda m: f"{rng.choice(_DAYS)} days", text)
+    text = re.sub(r'\b\d+ years\b', lambda m: f"{rng.choice(_YEARS)} years", text)
+    text = re.sub(r'\b\d+%', lambda m: f"{rng.choice(_PERCENTS)}%", text)
+    return text
+
+
+def _render(title: str, clauses: list) -> str:
+    """Lay clauses out as numbered sections like the sample documents"""
+    parts = [title, '']
+    for i, (clause_title, body) in enumerate(clauses):
+        section, item = divmod(i, CLAUSES_PER_SECTION)
+        if item == 0:
+            parts.append(f"SECTION {section + 1}: PART {section + 1}")
+            parts.append('')
+        parts.append(f"{section + 1}.{item + 1} {clause_title}")
+        # extract_requirements splits on sentence end + newline
+        parts.append(body if body.endswith('.') else body + '.')
+        parts.append('')
+    return '\n'.join(parts)
+
+
+def generate_documents(num_clauses: int, seed: int = 42, coverage: float = 0.6,
+                       exact_share: float = 0.5) -> dict:
+    """
+    Generate a matching regulation/policy pair
+
+    Args:
+        num_clauses: Number of regulation clauses
+        seed: Random seed (same seed -> same documents)
+        coverage: Share of regulation clauses the policy addresses at all
+        exact_share: Share of covered clauses copied with the same numbers
+            (the rest get different thresholds, i.e. PARTIAL candidates)
+
+    Returns:
+        dict with 'regulation' and 'policy' text
+    """
+    rng = random.Random(seed)
+    reg_templates = load_clause_templates(REGULATION_TEMPLATE)
+    policy_templates = load_clause_templates(POLICY_TEMPLATE)
+
+    reg_clauses = []
+    policy_clauses = []
+    for _ in range(num_clauses):
+        title, body = rng.choice(reg_templates)
+        body = _perturb(body, rng)
+        reg_clauses.append((title, body))
+
+        if rng.random() < coverage:
+            policy_body = body if rng.random() < exact_share else _perturb(body, rng)
+            policy_clauses.append((title, policy_body))
+        else:
+            policy_title, policy_body = rng.choice(policy_templates)
+            policy_clauses.append((policy_title, _perturb(policy_body, rng)))
+
+    rng.shuffle(policy_clauses)
+    return {
+        'regulation': _render('SYNTHETIC MASTER DIRECTION - KYC AND AML COMPLIANCE', reg_clauses),
+        'policy': _render('SYNTHETIC AML AND KYC POLICY', policy_clauses)
+    }
+
+
+def write_pdf(text: str, path: str, lines_per_page: int = 50, width: int = 95):
+    """
+    Write text as a multi-page PDF (Helvetica, no external dependencies)
+
+    Long lines are wrapped at `width` characters. Non-Latin-1 characters
+    are replaced, which is fine for benchmark input.
+    """
+    wrapped = []
+    for line in text.split('\n'):
+        while len(line) > width:
+            cut = line.rfind(' ', 0, width)
+            cut = cut if cut > 0 else width
+            wrapped.append(line[:cut])
+            line = line[cut:].lstrip()
+        wrapped.append(line)
+
+    pages = [wrapped[i:i + lines_per_page] for i in range(0, len(wrapped), lines_per_page)] or [[]]
+
+    def escape(s):
+        return s.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    # Object layout: 1 catalog, 2 pages, 3 font, then (page, content) pairs
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page_lines in pages:
+        stream_lines = ["BT", "/F1 10 Tf", "14 TL", "40 800 Td"]
+        for line in page_lines:
+            stream_lines.append(f"({escape(line)}) Tj T*")
+        stream_lines.append("ET")
+        stream = '\n'.join(stream_lines).encode('latin-1', 'replace')
+
+        page_num = len(objects) + 1
+        page_refs.append(f"{page_num} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_num + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, 'wb') as f:
+        f.write(bytes(out))
+
+
+if __name__ == "__main__":
+    docs = generate_documents(20)
+    print(docs['regulation'][:600])
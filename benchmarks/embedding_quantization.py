@@ -0,0 +1,98 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+Embedding Quantization Benchmark
+
+Embeds the clauses of a synthetic regulation/policy pair, then for each
+storage format (float32, float16, int8) reports memory per vector,
+all-pairs scoring and top-k search time, and the score error against
+float32 (see utils/quantized_embeddings.py).
+
+Uses the deterministic stand-in embedding backend by default, so results
+are reproducible offline; pass --vectors to evaluate saved real embeddings
+(.npy, one row per text).
+
+Usage:
+    python benchmarks/embedding_quantization.py --clauses 2000
+    python benchmarks/embedding_quantization.py --vectors embeddings.npy --output quant.json
+"""
+import json
+import time
+import argparse
+
+
+def _time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(vectors_a, vectors_b, repeat: int = 3, k: int = 5) -> dict:
+    """Memory, speed and score error of every storage format"""
+    from utils.quantized_embeddings import DTYPES, QuantizedEmbeddings, score_error
+
+    results = {}
+    for dtype in DTYPES:
+        matrix_a = QuantizedEmbeddings(vectors_a, dtype)
+        matrix_b = QuantizedEmbeddings(vectors_b, dtype)
+        result = score_error(vectors_a, vectors_b, dtype, k=k)
+        result['store_megabytes'] = round(matrix_b.nbytes / 1e6, 3)
+        result['dot_seconds'] = round(_time(lambda: matrix_a.dot(matrix_b), repeat), 4)
+        result['top_k_seconds'] = round(_time(lambda: matrix_b.top_k(matrix_a, k), repeat), 4)
+        results[dtype] = result
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='ReguLens embedding quantization benchmark')
+    parser.add_argument('--clauses', type=int, default=1000, help='Synthetic clauses per document')
+    parser.add_argument('--dimensions', type=int, default=768, help='Stand-in embedding size')
+    parser.add_argument('--vectors', help='Saved embeddings (.npy); split in half into queries/store')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the results as JSON')
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    if args.vectors:
+        vectors = np.load(args.vectors)
+        vectors_a, vectors_b = vectors[:len(vectors) // 2], vectors[len(vectors) // 2:]
+    else:
+        from agents.standin_backends import StandInEmbeddingBackend
+        from benchmarks.corpus import generate_documents
+        from utils.document_utils import extract_requirements
+
+        docs = generate_documents(args.clauses, seed=args.seed)
+        backend = StandInEmbeddingBackend(dimensions=args.dimensions)
+        vectors_a = [backend.embed_text(req['text']) for req in extract_requirements(docs['regulation'])]
+        vectors_b = [backend.embed_text(ctrl['text']) for ctrl in extract_requirements(docs['policy'])]
+    print(f"🔢 {len(vectors_a)} queries x {len(vectors_b)} stored vectors")
+
+    results = benchmark(vectors_a, vectors_b, repeat=args.repeat)
+    reference = results['float32']
+    # Per-pair float64 vectors, as scored before quantized storage
+    float64_bytes = 8 * len(vectors_a[0])
+    for dtype, result in results.items():
+        print(
+            f"   {dtype:<8} {result['bytes_per_vector']:>7.0f} B/vector "
+            f"({reference['bytes_per_vector'] / result['bytes_per_vector']:.1f}x smaller than float32, "
+            f"{float64_bytes / result['bytes_per_vector']:.1f}x than float64) | "
+            f"dot {result['dot_seconds'] * 1000:>7.1f} ms | top-k {result['top_k_seconds'] * 1000:>7.1f} ms | "
+            f"max error {result['max_abs_error']:.4f} | top-1 agreement {result['top1_agreement']:.1%}"
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
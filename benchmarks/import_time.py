@@ -0,0 +1,161 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+Import-time Benchmark
+
+Measures cold import cost of the ReguLens modules with
+`python -X importtime` in fresh subprocesses (what every Streamlit rerun
+of a new process and every batch worker pays), appends the results to a
+history file so they can be tracked over time, and optionally compares
+against a saved baseline.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --save-baseline benchmarks/import_baseline.json
+    python benchmarks/import_time.py --baseline benchmarks/import_baseline.json
+
+Exit code is 1 when any module regressed beyond the tolerance.
+"""
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join('.regulens', 'benchmarks', 'import_times.jsonl')
+
+MODULES = [
+    'agents.enhanced_agent',
+    'agents.vertex_ai_services',
+    'utils.document_utils',
+    'utils.pdf_extractor',
+    'utils.profiling',
+]
+
+# Differences below this are process start-up noise, never regressions
+NOISE_FLOOR_MS = 5.0
+
+
+def _parse_importtime(stderr: str) -> list:
+    """Parse `-X importtime` lines into (name, depth, self_us, cumulative_us)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        head, cumulative_us, raw_name = line.split('|', 2)
+        self_us = int(head.split(':', 1)[1])
+        depth = (len(raw_name) - len(raw_name.lstrip(' ')) - 1) // 2
+        rows.append((raw_name.strip(), depth, self_us, int(cumulative_us)))
+    return rows
+
+
+def measure(module: str, repeat: int) -> dict:
+    """Import `module` in `repeat` fresh interpreters and summarize the cost"""
+    totals = []
+    heaviest = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed'}
+
+        rows = _parse_importtime(proc.stderr)
+        # Output is post-order: the module's own imports are listed right
+        # before its depth-0 row, after interpreter start-up imports
+        end = next((i for i, row in enumerate(rows) if row[0] == module and row[1] == 0), None)
+        if end is None:
+            return {'error': f'{module} not found in -X importtime output'}
+        start = max((i for i in range(end) if rows[i][1] == 0), default=-1) + 1
+        totals.append(rows[end][3] / 1000)
+
+        # Biggest packages pulled in directly by the module
+        heaviest = sorted(
+            ((name, cum / 1000) for name, depth, _, cum in rows[start:end] if depth == 1),
+            key=lambda row: row[1],
+            reverse=True
+        )[:5]
+
+    return {
+        'median_ms': round(statistics.median(totals), 2),
+        'min_ms': round(min(totals), 2),
+        'repeat': repeat,
+        'heaviest_imports_ms': {name: round(ms, 2) for name, ms in heaviest or []}
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='ReguLens import-time benchmark')
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSONL file results are appended to')
+    parser.add_argument('--baseline', help='Baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown vs baseline (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', help='Also write the results as a new baseline')
+    args = parser.parse_args(argv)
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'modules': {}
+    }
+
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        results['modules'][module] = result
+        if 'error' in result:
+            print(f"   {module:<30} failed: {result['error']}")
+        else:
+            print(f"   {module:<30} {result['median_ms']:>8.1f} ms")
+
+    history_path = os.path.join(REPO_ROOT, args.history) if not os.path.isabs(args.history) else args.history
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    with open(history_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(results) + '\n')
+    print(f"\n📄 Appended to {history_path}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = []
+        for module, result in results['modules'].items():
+            before = baseline.get('modules', {}).get(module, {})
+            if 'median_ms' not in result or 'median_ms' not in before:
+                continue
+            now, then = result['median_ms'], before['median_ms']
+            if now - then > NOISE_FLOOR_MS and now > then * (1 + args.tolerance):
+                regressions.append((module, then, now))
+        if regressions:
+            print(f"\n❌ {len(regressions)} import-time regression(s) vs baseline:")
+            for module, then, now in regressions:
+                print(f"   {module}: {then:.1f} ms -> {now:.1f} ms")
+            return 1
+        print("\n✅ No import-time regressions vs baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
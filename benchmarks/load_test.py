@@ -0,0 +1,194 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+HTTP Service Load Test
+
+Starts the analysis service (server.py) with the offline stand-in AI
+backends, or targets a running one with --url, then has concurrent
+clients submit synthetic regulation/policy pairs and poll for the
+results. A client that gets a 429 waits for Retry-After and resubmits.
+
+Reports end-to-end latency percentiles, throughput, the number of 429
+responses and the service's own /metrics.
+
+Usage:
+    python benchmarks/load_test.py --clients 8 --jobs 40 --workers 2 --queue-size 4
+    python benchmarks/load_test.py --url http://127.0.0.1:8600 --clients 4 --jobs 20
+"""
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import statistics
+import urllib.error
+import urllib.request
+
+from benchmarks.corpus import generate_documents
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _request(url: str, data: bytes = None, content_type: str = None):
+    """(status, headers, body) of one HTTP request; HTTP errors are returned, not raised"""
+    request = urllib.request.Request(url, data=data, method='POST' if data is not None else 'GET')
+    if content_type:
+        request.add_header('Content-Type', content_type)
+    try:
+        with urllib.request.urlopen(request, timeout=300) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def _multipart(fields: dict):
+    """(body, content type) of a multipart/form-data upload of text files"""
+    boundary = f"regulens{time.time_ns()}"
+    lines = []
+    for name, (filename, content) in fields.items():
+        lines.append(f"--{boundary}\r\n"
+                     f"Content-Disposition: form-data; name=\"{name}\"; filename=\"{filename}\"\r\n"
+                     f"Content-Type: text/plain\r\n\r\n".encode('utf-8') + content + b"\r\n")
+    body = b''.join(lines) + f"--{boundary}--\r\n".encode('utf-8')
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def run_job(base_url: str, docs: dict, poll_interval: float, stats: dict, lock: threading.Lock):
+    """Submit one analysis (retrying on 429) and wait for its report"""
+    body, content_type = _multipart({
+        'regulation': ('regulation.txt', docs['regulation'].encode('utf-8')),
+        'policy': ('policy.txt', docs['policy'].encode('utf-8')),
+    })
+    start = time.perf_counter()
+    while True:
+        status, headers, payload = _request(f"{base_url}/jobs", body, content_type)
+        if status != 429:
+            break
+        with lock:
+            stats['rejected'] += 1
+        time.sleep(float(headers.get('Retry-After', 1)))
+    if status != 202:
+        with lock:
+            stats['errors'] += 1
+        return
+
+    job_id = json.loads(payload)['job_id']
+    while True:
+        status, _, payload = _request(f"{base_url}/jobs/{job_id}/result")
+        if status != 409:
+            break
+        time.sleep(poll_interval)
+
+    with lock:
+        if status == 200:
+            stats['latencies'].append(time.perf_counter() - start)
+        else:
+            stats['errors'] += 1
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, queue_size: int):
+    """Start server.py with stand-in backends; returns (process, base URL)"""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        REGULENS_LLM_BACKEND='standin',
+        REGULENS_EMBEDDING_BACKEND='standin',
+        REGULENS_RECOMMENDATION_STORE='off'
+    )
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'server.py'), '--port', str(port),
+         '--workers', str(workers), '--queue-size', str(queue_size)],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if _request(f"{base_url}/health")[0] == 200:
+                return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Service did not start within 60s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='ReguLens HTTP service load test')
+    parser.add_argument('--url', help='Target a running service instead of starting one')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--jobs', type=int, default=40, help='Total analyses to submit')
+    parser.add_argument('--clauses', type=int, default=30, help='Synthetic clauses per document')
+    parser.add_argument('--workers', type=int, default=2, help='Service workers (when started here)')
+    parser.add_argument('--queue-size', type=int, default=4, help='Service queue size (when started here)')
+    parser.add_argument('--poll-interval', type=float, default=0.1)
+    parser.add_argument('--output', help='Write the results as JSON')
+    args = parser.parse_args(argv)
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        print(f"🔥 Starting service with stand-in backends ({args.workers} workers)...")
+        process, base_url = start_server(args.workers, args.queue_size)
+
+    try:
+        documents = [generate_documents(args.clauses, seed=i) for i in range(min(args.jobs, 10))]
+        stats = {'latencies': [], 'rejected': 0, 'errors': 0}
+        lock = threading.Lock()
+        remaining = iter(range(args.jobs))
+
+        def client():
+            for i in remaining:
+                run_job(base_url, documents[i % len(documents)], args.poll_interval, stats, lock)
+
+        print(f"🚀 {args.clients} clients submitting {args.jobs} analyses to {base_url}")
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(stats['latencies'])
+        results = {
+            'clients': args.clients,
+            'jobs': args.jobs,
+            'completed': len(latencies),
+            'errors': stats['errors'],
+            'rejected_429': stats['rejected'],
+            'elapsed_seconds': round(elapsed, 2),
+            'throughput_per_minute': round(len(latencies) / elapsed * 60, 1) if elapsed else 0.0,
+            'latency_seconds': {
+                'p50': round(statistics.median(latencies), 3),
+                'p95': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3),
+                'max': round(latencies[-1], 3),
+            } if latencies else {},
+            'service_metrics': json.loads(_request(f"{base_url}/metrics")[2]),
+        }
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print(f"   Completed: {results['completed']}/{args.jobs} | errors: {results['errors']} | "
+          f"429s: {results['rejected_429']}")
+    print(f"   Throughput: {results['throughput_per_minute']}/min | latency {results['latency_seconds']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0 if results['completed'] == args.jobs else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
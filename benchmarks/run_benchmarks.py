@@ -0,0 +1,232 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+ReguLens Benchmark Suite
+
+Times each pipeline stage on seeded synthetic documents with the offline
+stand-in AI backends, writes JSON results, and compares them against a saved
+baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 10 100 1000
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --tolerance 0.2
+
+Exit code is 1 when any stage regressed beyond the tolerance.
+"""
+import io
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+from datetime import datetime
+
+from benchmarks.corpus import generate_documents, write_pdf
+from agents.standin_backends import StandInLLMBackend, StandInEmbeddingBackend
+
+DEFAULT_OUTPUT_DIR = os.path.join('.regulens', 'benchmarks')
+
+# Differences below this are timer noise, never regressions
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def _time(fn, repeat: int):
+    """Run fn `repeat` times; return (last result, list of durations)"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return result, durations
+
+
+def _summarize(durations: list) -> dict:
+    return {
+        'median_seconds': round(statistics.median(durations), 6),
+        'min_seconds': round(min(durations), 6),
+        'repeat': len(durations)
+    }
+
+
+def _make_agent(matching: str):
+    """Agent wired to the offline stand-in backends"""
+    from agents.enhanced_agent import EnhancedComplianceAgent
+
+    agent = EnhancedComplianceAgent(
+        llm_backend=StandInLLMBackend(),
+        embedding_backend=StandInEmbeddingBackend() if matching == 'standin-embeddings' else None,
+        # Repeats must not be served from recommendations stored by earlier ones
+        recommendation_store=False
+    )
+    if matching == 'tfidf':
+        agent.vertex_service = None
+        agent.vertex_enabled = False
+    return agent
+
+
+def benchmark_size(num_clauses: int, seed: int, repeat: int, max_map_clauses: int,
+                   matching: str, workdir: str) -> dict:
+    """Benchmark every stage for one document size"""
+    from utils.records import GapTable, json_default
+    from utils.export import export_gaps
+    from utils.document_utils import extract_requirements
+    from utils.pdf_extractor import extract_text_from_pdf, find_page_number
+
+    docs = generate_documents(num_clauses, seed=seed)
+    pdf_path = os.path.join(workdir, f'regulation-{num_clauses}.pdf')
+    write_pdf(docs['regulation'], pdf_path)
+
+    stages = {}
+
+    extracted, durations = _time(lambda: extract_text_from_pdf(pdf_path, track_pages=True), repeat)
+    stages['pdf_extraction'] = _summarize(durations)
+    stages['pdf_extraction']['pages'] = extracted['total_pages']
+
+    requirements, durations = _time(lambda: extract_requirements(extracted['text']), repeat)
+    controls = extract_requirements(docs['policy'])
+    stages['requirement_extraction'] = _summarize(durations)
+    stages['requirement_extraction']['requirements'] = len(requirements)
+
+    _, durations = _time(
+        lambda: [find_page_number(req['text'], extracted['pages']) for req in requirements],
+        repeat
+    )
+    stages['page_lookup'] = _summarize(durations)
+
+    # map_gaps scores every requirement x control pair, so cap its size
+    if num_clauses > max_map_clauses:
+        stages['map_gaps'] = {'skipped': f'num_clauses > max_map_clauses ({max_map_clauses})'}
+        return {'num_clauses': num_clauses, 'stages': stages}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = _make_agent(matching)
+    reg_result = {'requirements': requirements, 'total': len(requirements), 'pages_data': None}
+    policy_result = {'controls': controls, 'total': len(controls), 'pages_data': None}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        gaps, durations = _time(lambda: agent.map_gaps(reg_result, policy_result), repeat)
+    stages['map_gaps'] = _summarize(durations)
+    stages['map_gaps']['pairs'] = len(requirements) * len(controls)
+    stages['map_gaps']['matching'] = matching
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        report, durations = _time(lambda: agent.generate_report(gaps), repeat)
+    stages['report_generation'] = _summarize(durations)
+
+    csv_path = os.path.join(workdir, f'gaps-{num_clauses}.csv')
+
+    def export():
+        export_gaps(GapTable(report['all_gaps']), csv_path, 'csv')
+        return os.path.getsize(csv_path) + len(json.dumps(report, default=json_default))
+
+    exported_bytes, durations = _time(export, repeat)
+    stages['export'] = _summarize(durations)
+    stages['export']['bytes'] = exported_bytes
+
+    return {'num_clauses': num_clauses, 'stages': stages}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare median stage timings against a baseline
+
+    Returns:
+        List of regression dicts (empty when nothing regressed)
+    """
+    regressions = []
+    for size, current in results['results'].items():
+        previous = baseline.get('results', {}).get(size)
+        if not previous:
+            continue
+        for stage, timing in current['stages'].items():
+            before = previous['stages'].get(stage, {})
+            if 'median_seconds' not in timing or 'median_seconds' not in before:
+                continue
+            now, then = timing['median_seconds'], before['median_seconds']
+            if now - then > NOISE_FLOOR_SECONDS and now > then * (1 + tolerance):
+                regressions.append({
+                    'size': size,
+                    'stage': stage,
+                    'baseline_seconds': then,
+                    'current_seconds': now,
+                    'ratio': round(now / then, 2) if then else None
+                })
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='ReguLens benchmark suite')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Regulation clause counts to benchmark (10 to 100000)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-map-clauses', type=int, default=100,
+                        help='Skip map_gaps and later stages above this size')
+    parser.add_argument('--matching', choices=['tfidf', 'standin-embeddings'], default='tfidf')
+    parser.add_argument('--output', help='Results JSON path')
+    parser.add_argument('--baseline', help='Baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown vs baseline (0.2 = 20%%)')
+    parser.add_argument('--save-baseline', help='Also write the results as a new baseline')
+    args = parser.parse_args(argv)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'matching': args.matching
+        },
+        'results': {}
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            print(f"⏱️ Benchmarking {size} clauses...")
+            result = benchmark_size(size, args.seed, args.repeat, args.max_map_clauses,
+                                    args.matching, workdir)
+            results['results'][str(size)] = result
+            for stage, timing in result['stages'].items():
+                if 'median_seconds' in timing:
+                    print(f"   {stage:<24} {timing['median_seconds'] * 1000:>10.1f} ms")
+                else:
+                    print(f"   {stage:<24} skipped")
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"results-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs baseline:")
+            for reg in regressions:
+                print(f"   {reg['size']} clauses / {reg['stage']}: "
+                      f"{reg['baseline_seconds'] * 1000:.1f} ms -> {reg['current_seconds'] * 1000:.1f} ms")
+            return 1
+        print("\n✅ No regressions vs baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
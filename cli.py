@@ -0,0 +1,285 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+"""
+ReguLens - command-line interface
+
+Usage:
+    python cli.py analyze [--regulation PATH] [--policy PATH] [--output report.json]
+                          [--deadline SECONDS] [--top-k K] [--profile]
+                          [--tfidf-engine pairwise|hashing] [--tfidf-model model.npz]
+                          [--lsa-model lsa.npz]
+    python cli.py fit-tfidf PATH [PATH ...] [--output model.npz] [--workers N]
+    python cli.py fit-lsa PATH [PATH ...] [--output lsa.npz] [--components N]
+    python cli.py fit-idf PATH [PATH ...] [--output domain_idf.npz]
+    python cli.py serve [--host HOST] [--port PORT] [--workers N] [--queue-size N]
+    python cli.py watch --regulations DIR --policies DIR [--output-dir DIR] [--workers N]
+                        [--poll-interval SECONDS] [--debounce SECONDS] [--once]
+    python cli.py export (--run ID | --report report.json) --output PATH
+                         [--format csv|jsonl|parquet|xlsx] [--split-texts]
+"""
+import json
+import argparse
+
+SAMPLE_REGULATION = os.path.join('data', 'regulations', 'rbi_regulation.txt')
+SAMPLE_POLICY = os.path.join('data', 'policies', 'company_policy.txt')
+DEFAULT_TFIDF_MODEL = os.path.join('.regulens', 'tfidf', 'model.npz')
+DEFAULT_LSA_MODEL = os.path.join('.regulens', 'lsa', 'model.npz')
+DEFAULT_DOMAIN_IDF = os.path.join('.regulens', 'idf', 'domain_idf.npz')
+
+
+def load_document(path: str):
+    """
+    Load a regulation/policy document from disk
+
+    Returns:
+        (text, pages_data) - pages_data is None for text files
+    """
+    from utils.pdf_extractor import extract_text_from_pdf, is_pdf
+
+    if is_pdf(path):
+        result = extract_text_from_pdf(path, track_pages=True)
+        return result['text'], result['pages']
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read(), None
+
+
+def cmd_analyze(args) -> int:
+    """Run one compliance analysis and print/save the report"""
+    if args.profile:
+        os.environ['REGULENS_PROFILE'] = '1'
+
+    from agents.enhanced_agent import EnhancedComplianceAgent
+    from utils.records import json_default
+
+    reg_text, reg_pages = load_document(args.regulation)
+    policy_text, policy_pages = load_document(args.policy)
+
+    agent = EnhancedComplianceAgent(
+        top_k=args.top_k,
+        tfidf_engine=args.tfidf_engine,
+        tfidf_model=args.tfidf_model,
+        lsa_model=args.lsa_model
+    )
+    report = agent.run_full_analysis(
+        reg_text,
+        policy_text,
+        reg_pages_data=reg_pages,
+        policy_pages_data=policy_pages,
+        deadline_seconds=args.deadline
+    )
+
+    summary = report['summary']
+    print(f"Compliance Score: {summary['compliance_score']:.1f}%")
+    print(f"Compliant: {summary['compliant']} | Partial: {summary['partial']} | Missing: {summary['missing']}")
+    print(f"Critical Risks: {summary['critical_risks']} | High Risks: {summary['high_risks']}")
+    print(f"\n{report['executive_summary']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=json_default)
+        print(f"\n📄 Report written to {args.output}")
+
+    return 0
+
+
+def find_documents(paths: list) -> list:
+    """Expand directories into the .txt/.pdf documents they contain"""
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                documents.extend(
+                    os.path.join(root, name) for name in sorted(files)
+                    if name.lower().endswith(('.txt', '.pdf'))
+                )
+        else:
+            documents.append(path)
+    return documents
+
+
+def cmd_fit_tfidf(args) -> int:
+    """Fit hashing TF-IDF document frequencies over a policy/regulation archive"""
+    import time
+    from utils.hashing_tfidf import fit_corpus
+
+    paths = find_documents(args.paths)
+    if not paths:
+        print("❌ No .txt or .pdf documents found")
+        return 1
+
+    start = time.perf_counter()
+    model = fit_corpus(paths, n_features=2 ** args.feature_bits, workers=args.workers,
+                       batch_size=args.batch_size)
+    model.save(args.output)
+    print(f"✅ {model.n_documents} clauses from {len(paths)} documents "
+          f"in {time.perf_counter() - start:.1f}s")
+    print(f"📄 TF-IDF model written to {args.output}")
+    return 0
+
+
+def cmd_fit_lsa(args) -> int:
+    """Fit the LSA matching model on a regulation/policy corpus"""
+    import time
+    from utils.hashing_tfidf import StreamingTfidf, read_clauses
+    from utils.lsa import LSAModel
+
+    paths = find_documents(args.paths)
+    if not paths:
+        print("❌ No .txt or .pdf documents found")
+        return 1
+
+    start = time.perf_counter()
+    clauses = [clause for path in paths for clause in read_clauses(path)]
+    tfidf = StreamingTfidf.load(args.tfidf_model) if args.tfidf_model else None
+    model = LSAModel.fit(clauses, n_components=args.components, tfidf=tfidf)
+    model.save(args.output)
+    print(f"✅ {model.n_components}-dimension LSA model from {len(clauses)} clauses "
+          f"in {time.perf_counter() - start:.1f}s")
+    print(f"📄 LSA model written to {args.output}")
+    return 0
+
+
+def cmd_fit_idf(args) -> int:
+    """Fit the domain vocabulary/IDF used by calculate_similarity"""
+    from utils.hashing_tfidf import read_clauses
+    from utils.domain_idf import DomainIDF
+
+    paths = find_documents(args.paths)
+    if not paths:
+        print("❌ No .txt or .pdf documents found")
+        return 1
+
+    model = DomainIDF.fit(
+        (clause for path in paths for clause in read_clauses(path)),
+        sources=[os.path.relpath(path) for path in paths]
+    )
+    model.save(args.output)
+    print(f"✅ {len(model)} terms from {model.n_documents} clauses (version {model.version})")
+    print(f"📄 Domain IDF written to {args.output}")
+    print(f"   Enable it with REGULENS_DOMAIN_IDF={args.output}")
+    return 0
+
+
+def cmd_serve(args) -> int:
+    """Run the HTTP analysis service (see server.py)"""
+    from server import serve
+
+    serve(args.host, args.port, args.workers, args.queue_size, args.verbose)
+    return 0
+
+
+def cmd_watch(args) -> int:
+    """Watch regulation/policy folders and re-analyze changed pairs (see watcher.py)"""
+    from watcher import watch
+
+    stats = watch(args.regulations, args.policies, args.output_dir, args.ledger, args.workers,
+                  args.poll_interval, args.debounce, args.max_attempts, args.deadline, args.once)
+    return 1 if stats['failed'] else 0
+
+
+def cmd_export(args) -> int:
+    """Stream a stored run (or a saved JSON report) to CSV/JSONL/Parquet/XLSX"""
+    from utils.export import export_gaps
+    from utils.records import GapTable
+
+    if args.report:
+        with open(args.report, 'r', encoding='utf-8') as f:
+            gap_table = GapTable(json.load(f)['all_gaps'])
+    else:
+        from utils.run_store import RunStore, StoredGapTable, DEFAULT_PATH
+
+        store = RunStore(args.run_store or os.getenv('REGULENS_RUN_STORE', DEFAULT_PATH))
+        if store.get_report(args.run) is None:
+            print(f"❌ Unknown run: {args.run}")
+            return 1
+        gap_table = StoredGapTable(store, args.run)
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip('.').lower() or 'csv'
+    try:
+        paths = export_gaps(gap_table, args.output, fmt, split_texts=args.split_texts)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+    for path in paths:
+        print(f"📄 Written {path}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='regulens', description='ReguLens - AI Compliance Copilot')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', help='Analyze a regulation against a policy')
+    analyze.add_argument('--regulation', default=SAMPLE_REGULATION, help='Regulation (.txt or .pdf)')
+    analyze.add_argument('--policy', default=SAMPLE_POLICY, help='Internal policy (.txt or .pdf)')
+    analyze.add_argument('--output', help='Write the full report as JSON')
+    analyze.add_argument('--deadline', type=float, default=None, help='Time budget in seconds')
+    analyze.add_argument('--top-k', type=int, default=None,
+                         help='Combine coverage of the k best policy controls per requirement')
+    analyze.add_argument('--profile', action='store_true',
+                         help='Write cProfile/tracemalloc artifacts (see utils/profiling.py)')
+    analyze.add_argument('--tfidf-engine', choices=('pairwise', 'hashing'), default=None,
+                         help='TF-IDF fallback engine (default: REGULENS_TFIDF_ENGINE or pairwise)')
+    analyze.add_argument('--tfidf-model', default=None,
+                         help='Corpus TF-IDF model from fit-tfidf (hashing engine)')
+    analyze.add_argument('--lsa-model', default=None,
+                         help='LSA model from fit-lsa, used when Vertex AI is unavailable')
+    analyze.set_defaults(func=cmd_analyze)
+
+    fit = subparsers.add_parser('fit-tfidf', help='Fit hashing TF-IDF on a document archive')
+    fit.add_argument('paths', nargs='+', help='Documents or directories (.txt/.pdf)')
+    fit.add_argument('--output', default=DEFAULT_TFIDF_MODEL, help='Model file (.npz)')
+    fit.add_argument('--workers', type=int, default=1, help='Worker processes')
+    fit.add_argument('--feature-bits', type=int, default=20, help='Hashed features = 2**bits')
+    fit.add_argument('--batch-size', type=int, default=1000, help='Clauses per batch')
+    fit.set_defaults(func=cmd_fit_tfidf)
+
+    fit_lsa = subparsers.add_parser('fit-lsa', help='Fit the offline LSA matching model')
+    fit_lsa.add_argument('paths', nargs='+', help='Documents or directories (.txt/.pdf)')
+    fit_lsa.add_argument('--output', default=DEFAULT_LSA_MODEL, help='Model file (.npz)')
+    fit_lsa.add_argument('--components', type=int, default=128, help='Latent dimensions')
+    fit_lsa.add_argument('--tfidf-model', default=None,
+                         help='Use IDF from a fit-tfidf model instead of fitting on these documents')
+    fit_lsa.set_defaults(func=cmd_fit_lsa)
+
+    fit_idf = subparsers.add_parser('fit-idf', help='Fit the domain IDF used by pairwise TF-IDF matching')
+    fit_idf.add_argument('paths', nargs='+', help='Documents or directories (.txt/.pdf)')
+    fit_idf.add_argument('--output', default=DEFAULT_DOMAIN_IDF,
+                         help='Model file (.npz); enable it with REGULENS_DOMAIN_IDF=PATH')
+    fit_idf.set_defaults(func=cmd_fit_idf)
+
+    from server import add_serve_arguments
+    serve = subparsers.add_parser('serve', help='Run the HTTP analysis service')
+    add_serve_arguments(serve)
+    serve.set_defaults(func=cmd_serve)
+
+    from watcher import add_watch_arguments
+    watch = subparsers.add_parser('watch', help='Re-analyze documents dropped into watched folders')
+    add_watch_arguments(watch)
+    watch.set_defaults(func=cmd_watch)
+
+    export = subparsers.add_parser('export', help='Export a report\'s gaps to a file')
+    source = export.add_mutually_exclusive_group(required=True)
+    source.add_argument('--run', type=int, help='Run ID in the run store')
+    source.add_argument('--report', help='Report JSON written by analyze --output')
+    export.add_argument('--output', required=True, help='Output file')
+    export.add_argument('--format', choices=('csv', 'jsonl', 'parquet', 'xlsx'), default=None,
+                        help='Default: from the output file extension')
+    export.add_argument('--split-texts', action='store_true',
+                        help='Write recommendation texts to a .<format>.texts.jsonl side file')
+    export.add_argument('--run-store', default=None, help='Run store database (default: REGULENS_RUN_STORE)')
+    export.set_defaults(func=cmd_export)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,448 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+"""
+ReguLens - HTTP analysis service
+
+A standalone job API around run_full_analysis for systems that can't
+drive the Streamlit UI. Analyses run in a bounded pool of worker
+processes, each holding one pre-warmed agent (backends built, scikit-learn
+imported), so a request never pays start-up costs.
+
+Endpoints:
+
+    POST /jobs               submit an analysis (202 + job ID)
+                             - multipart/form-data with `regulation` and
+                               `policy` files (.pdf or .txt), or
+                             - JSON {"regulation_text": ..., "policy_text": ...}
+                             optional fields: deadline_seconds, top_k
+                             429 + Retry-After when every worker is busy and
+                             the queue is full
+    GET  /jobs/<id>          job status
+    GET  /jobs/<id>/result   report JSON (409 until the job is done)
+    GET  /metrics            queue depth, job counts and latencies
+    GET  /health             liveness
+
+Usage:
+    python server.py [--host 127.0.0.1] [--port 8600] [--workers 2] [--queue-size 8]
+    python cli.py serve ...
+
+AI backends come from the environment as usual (REGULENS_LLM_BACKEND=standin
+and REGULENS_EMBEDDING_BACKEND=standin run the service fully offline).
+"""
+import io
+import json
+import time
+import uuid
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8600
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+# Finished jobs kept for status/result requests
+MAX_FINISHED_JOBS = 1000
+
+# Durations kept for the latency percentiles in /metrics
+LATENCY_WINDOW = 1000
+
+
+# ---------------------------------------------------------------- workers
+
+_agent = None
+
+
+def _init_worker():
+    """Build the worker's agent and import the heavy libraries up front"""
+    global _agent
+    from agents.enhanced_agent import EnhancedComplianceAgent
+    from utils.document_utils import calculate_similarity
+
+    _agent = EnhancedComplianceAgent()
+    calculate_similarity('warm up', 'warm up')
+
+
+def _warm() -> int:
+    return os.getpid()
+
+
+def _document_text(document: dict):
+    """(text, pages_data) of an uploaded document"""
+    if document.get('pdf') is not None:
+        from utils.pdf_extractor import extract_text_from_pdf
+        result = extract_text_from_pdf(io.BytesIO(document['pdf']), track_pages=True)
+        return result['text'], result['pages']
+    return document['text'], None
+
+
+def _run_job(payload: dict):
+    """
+    Worker: run one analysis
+
+    Returns:
+        (start time, report JSON, None), or (start time, None, error
+        message) when the analysis raised
+    """
+    started_at = time.time()
+    try:
+        return started_at, _analyze(payload), None
+    except Exception as e:
+        return started_at, None, f"{type(e).__name__}: {e}"
+
+
+def _analyze(payload: dict) -> str:
+    """Report JSON of one analysis (in the worker)"""
+    from utils.records import json_default
+
+    reg_text, reg_pages = _document_text(payload['regulation'])
+    policy_text, policy_pages = _document_text(payload['policy'])
+
+    # top_k applies to this job only; the worker's agent serves later jobs
+    default_top_k = _agent.top_k
+    _agent.top_k = payload.get('top_k') or default_top_k
+    try:
+        report = _agent.run_full_analysis(
+            reg_text,
+            policy_text,
+            reg_pages_data=reg_pages,
+            policy_pages_data=policy_pages,
+            deadline_seconds=payload.get('deadline_seconds')
+        )
+    finally:
+        _agent.top_k = default_top_k
+    return json.dumps(report, ensure_ascii=False, default=json_default)
+
+
+# ---------------------------------------------------------------- job queue
+
+class JobQueue:
+    """Jobs, their results and a bounded process pool"""
+
+    def __init__(self, workers: int = 2, queue_size: int = 8):
+        """
+        Args:
+            workers: Worker processes (concurrent analyses)
+            queue_size: Jobs allowed to wait for a worker; beyond
+                workers + queue_size outstanding jobs, submit() refuses
+        """
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.jobs = {}
+        self._finished = deque()
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self.started_at = time.time()
+        self.stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+        self._queue_seconds = deque(maxlen=LATENCY_WINDOW)
+        self._run_seconds = deque(maxlen=LATENCY_WINDOW)
+        self._pool = self._start_pool()
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        # Start (and warm) every worker now rather than on the first jobs
+        warm = [pool.submit(_warm) for _ in range(self.workers)]
+        for future in warm:
+            future.result()
+        return pool
+
+    def submit(self, payload: dict) -> dict:
+        """
+        Queue an analysis
+
+        Returns:
+            The job dict, or None when the queue is full
+        """
+        with self._lock:
+            if self._outstanding >= self.capacity:
+                self.stats['rejected'] += 1
+                return None
+            self._outstanding += 1
+            self.stats['submitted'] += 1
+            job = {
+                'job_id': uuid.uuid4().hex,
+                'status': 'queued',
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'error': None,
+            }
+            self.jobs[job['job_id']] = job
+
+        try:
+            with self._lock:
+                try:
+                    future = self._pool.submit(_run_job, payload)
+                except BrokenProcessPool:
+                    # A crashed worker broke the pool; replace it once
+                    self._pool = self._start_pool()
+                    future = self._pool.submit(_run_job, payload)
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = f"{type(e).__name__}: {e}"
+            with self._lock:
+                self._outstanding -= 1
+                self.stats['failed'] += 1
+                self._finished.append(job['job_id'])
+            raise
+        job['_future'] = future
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return job
+
+    def _finish(self, job: dict, future):
+        job['finished_at'] = time.time()
+        try:
+            job['started_at'], job['_result'], job['error'] = future.result()
+        except Exception as e:
+            # A crashed worker breaks the pool (submit() replaces it); its
+            # start time is lost with it
+            job['error'] = f"{type(e).__name__}: {e}"
+        job['status'] = 'failed' if job['error'] else 'done'
+
+        with self._lock:
+            self._outstanding -= 1
+            self.stats['completed' if job['status'] == 'done' else 'failed'] += 1
+            if job['started_at'] is not None:
+                self._queue_seconds.append(job['started_at'] - job['submitted_at'])
+                self._run_seconds.append(job['finished_at'] - job['started_at'])
+            self._finished.append(job['job_id'])
+            while len(self._finished) > MAX_FINISHED_JOBS:
+                self.jobs.pop(self._finished.popleft(), None)
+
+    def status(self, job_id: str) -> dict:
+        """Public fields of a job, or None if unknown"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        status = {key: value for key, value in job.items() if not key.startswith('_')}
+        # The pool reports a job as running once it is handed to the workers'
+        # call queue, which holds at most one job more than there are workers
+        if status['status'] == 'queued' and job.get('_future') and job['_future'].running():
+            status['status'] = 'running'
+        return status
+
+    def result(self, job_id: str) -> str:
+        """Report JSON of a finished job"""
+        return self.jobs[job_id].get('_result')
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait, from recent run times"""
+        with self._lock:
+            runs = list(self._run_seconds)
+        if not runs:
+            return 1
+        return max(1, round(sum(runs) / len(runs)))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            statuses = {}
+            for job_id in list(self.jobs):
+                status = self.status(job_id)['status']
+                statuses[status] = statuses.get(status, 0) + 1
+            return {
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'workers': self.workers,
+                'capacity': self.capacity,
+                'outstanding': self._outstanding,
+                'queue_depth': statuses.get('queued', 0),
+                'jobs': statuses,
+                'totals': dict(self.stats),
+                'queue_seconds': _summarize(self._queue_seconds),
+                'run_seconds': _summarize(self._run_seconds),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _summarize(durations) -> dict:
+    durations = sorted(durations)
+    if not durations:
+        return {'count': 0}
+
+    def percentile(p):
+        return round(durations[min(len(durations) - 1, int(p * len(durations)))], 3)
+
+    return {
+        'count': len(durations),
+        'mean': round(sum(durations) / len(durations), 3),
+        'p50': percentile(0.5),
+        'p95': percentile(0.95),
+        'max': round(durations[-1], 3),
+    }
+
+
+# ---------------------------------------------------------------- HTTP
+
+def _parse_multipart(content_type: str, body: bytes) -> dict:
+    """Form fields of a multipart/form-data body: name -> (filename, bytes)"""
+    from email.parser import BytesParser
+    from email.policy import HTTP
+
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if name:
+            fields[name] = (part.get_filename(), part.get_payload(decode=True) or b'')
+    return fields
+
+
+def _positive_int(value, name: str) -> int:
+    """Integer >= 1 from a JSON or form value; ValueError otherwise"""
+    try:
+        number = int(str(value))
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if number < 1:
+        raise ValueError(f"{name} must be at least 1")
+    return number
+
+
+def _document(fields: dict, name: str) -> dict:
+    filename, data = fields[name]
+    if (filename or '').lower().endswith('.pdf') or data.startswith(b'%PDF'):
+        return {'pdf': data}
+    return {'text': data.decode('utf-8', errors='replace')}
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    """Routes requests to the server's JobQueue"""
+
+    server_version = 'ReguLens/1.0'
+
+    def _send_json(self, status: int, body, headers: dict = None):
+        data = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, headers: dict = None):
+        self._send_json(status, {'error': message}, headers)
+
+    def do_GET(self):
+        queue = self.server.jobs
+        parts = [p for p in self.path.split('?', 1)[0].split('/') if p]
+
+        if parts == ['health']:
+            return self._send_json(200, {'status': 'ok'})
+        if parts == ['metrics']:
+            return self._send_json(200, queue.metrics())
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            status = queue.status(parts[1])
+            if status is None:
+                return self._error(404, 'Unknown job')
+            if len(parts) == 2:
+                return self._send_json(200, status)
+            if parts[2] == 'result':
+                if status['status'] == 'done':
+                    return self._send_json(200, queue.result(parts[1]))
+                if status['status'] == 'failed':
+                    return self._error(500, status['error'])
+                return self._error(409, f"Job is {status['status']}")
+        self._error(404, 'Not found')
+
+    def do_POST(self):
+        if self.path.split('?', 1)[0].rstrip('/') != '/jobs':
+            return self._error(404, 'Not found')
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_UPLOAD_BYTES:
+            return self._error(413, f'Request larger than {MAX_UPLOAD_BYTES} bytes')
+        body = self.rfile.read(length)
+        content_type = self.headers.get('Content-Type', '')
+
+        try:
+            if content_type.startswith('multipart/form-data'):
+                fields = _parse_multipart(content_type, body)
+                payload = {
+                    'regulation': _document(fields, 'regulation'),
+                    'policy': _document(fields, 'policy'),
+                }
+                options = {name: fields[name][1].decode() for name in ('deadline_seconds', 'top_k') if name in fields}
+            else:
+                data = json.loads(body or b'{}')
+                payload = {
+                    'regulation': {'text': data['regulation_text']},
+                    'policy': {'text': data['policy_text']},
+                }
+                options = data
+            if options.get('deadline_seconds'):
+                payload['deadline_seconds'] = float(options['deadline_seconds'])
+            if options.get('top_k') not in (None, ''):
+                payload['top_k'] = _positive_int(options['top_k'], 'top_k')
+        except KeyError as e:
+            return self._error(400, f'Missing field: {e.args[0]}')
+        except ValueError as e:
+            return self._error(400, f'Invalid request: {e}')
+
+        try:
+            job = self.server.jobs.submit(payload)
+        except Exception as e:
+            return self._error(503, f'Analysis workers unavailable: {e}')
+        if job is None:
+            return self._error(
+                429, 'Analysis queue is full',
+                {'Retry-After': str(self.server.jobs.retry_after())}
+            )
+        self._send_json(202, self.server.jobs.status(job['job_id']),
+                        {'Location': f"/jobs/{job['job_id']}"})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(host: str = '127.0.0.1', port: int = DEFAULT_PORT, workers: int = 2,
+          queue_size: int = 8, verbose: bool = False):
+    """Run the service until interrupted"""
+    print(f"🔥 Starting {workers} pre-warmed analysis workers...")
+    server = ThreadingHTTPServer((host, port), AnalysisHandler)
+    server.daemon_threads = True
+    server.jobs = JobQueue(workers, queue_size)
+    server.verbose = verbose
+    print(f"🌐 ReguLens service on http://{host}:{server.server_address[1]} "
+          f"({workers} workers, {queue_size} queued jobs max)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.jobs.shutdown()
+        print("👋 Service stopped")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='ReguLens HTTP analysis service')
+    add_serve_arguments(parser)
+    return parser
+
+
+def add_serve_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes')
+    parser.add_argument('--queue-size', type=int, default=8,
+                        help='Jobs allowed to wait for a worker before 429')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    serve(args.host, args.port, args.workers, args.queue_size, args.verbose)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
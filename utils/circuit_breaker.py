@@ -0,0 +1,160 @@
+"""
+Circuit Breaker - stop calling a failing AI service for the rest of a run
+"""
+import time
+import threading
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because the breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure / slow-call circuit breaker
+
+    CLOSED     -> calls go through; failures are counted
+    OPEN       -> calls are rejected so callers use their local fallback
+    HALF_OPEN  -> after `recovery_timeout`, one probe call is let through;
+                  success closes the breaker, failure re-opens it
+    """
+
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 latency_threshold: float = 10.0, recovery_timeout: float = 60.0):
+        """
+        Args:
+            name: Service name shown in status and reports
+            failure_threshold: Consecutive failures before tripping
+            latency_threshold: Seconds after which a successful call still
+                counts as a failure (None = no latency limit)
+            recovery_timeout: Seconds to stay open before probing again
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.short_circuited = 0
+        self.last_error = None
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (does not consume a probe)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at < self.recovery_timeout
+            return self._probe_in_flight
+
+    def allow_request(self) -> bool:
+        """Check if a call may go through, starting a recovery probe if due"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def record_success(self, latency: float = None):
+        """Record a completed call; slow calls count as failures"""
+        if self.latency_threshold is not None and latency is not None and latency > self.latency_threshold:
+            self.record_failure(f"slow call: {latency:.1f}s > {self.latency_threshold:.1f}s")
+            return
+
+        with self._lock:
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            if self.state != self.CLOSED:
+                print(f"   ✅ {self.name} recovered - circuit closed")
+            self.state = self.CLOSED
+            self.opened_at = None
+
+    def record_failure(self, error=None):
+        """Record a failed call, tripping the breaker when the threshold is hit"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = str(error) if error is not None else None
+
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    print(f"   🔌 {self.name} circuit OPEN after {self.consecutive_failures} "
+                          f"failures - using local fallback")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release(self):
+        """Hand back a probe slot without judging the service (e.g. call abandoned)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run a call through the breaker
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success(time.monotonic() - start)
+        return result
+
+    def get_status(self) -> dict:
+        """Get status information"""
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'trips': self.trips,
+                'short_circuited_calls': self.short_circuited,
+                'last_error': self.last_error,
+                'retry_in_seconds': round(retry_in, 1) if retry_in is not None else None
+            }
+
+
+# Process-wide breakers, shared by every client talking to the same service
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """
+    Get the shared breaker for a service, creating it on first use
+
+    Args:
+        name: Service name, e.g. 'vertex-ai' or 'gemini'
+        **kwargs: CircuitBreaker settings (only used on creation)
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
@@ -0,0 +1,109 @@
+"""
+Analysis Deadline - shared time budget for a single compliance run
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the analysis time budget has run out"""
+
+
+# Calls that outlive their budget are abandoned, not killed, so the pool is
+# shared process-wide and kept small
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=8,
+                thread_name_prefix="regulens-deadline"
+            )
+        return _executor
+
+
+class AnalysisDeadline:
+    """
+    Time budget for one analysis run
+
+    Every external call (embeddings, recommendations, executive summary)
+    goes through `call()`, which gives up once the budget is spent so the
+    agent can switch to its rule-based fallbacks.
+    """
+
+    def __init__(self, budget_seconds: float = None):
+        """
+        Args:
+            budget_seconds: Total seconds for the run (None = unlimited)
+        """
+        self.budget_seconds = budget_seconds if budget_seconds and budget_seconds > 0 else None
+        self.started_at = time.monotonic()
+        self.timed_out_calls = 0
+
+    def elapsed(self) -> float:
+        """Seconds spent since the run started"""
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        """Seconds left in the budget, or None when unlimited"""
+        if self.budget_seconds is None:
+            return None
+        return max(0.0, self.budget_seconds - self.elapsed())
+
+    def expired(self) -> bool:
+        """Check if the budget has run out"""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run an external call within the remaining budget
+
+        Raises:
+            DeadlineExceeded: If the budget is already spent or runs out
+                before the call returns
+        """
+        if self.budget_seconds is None:
+            return fn(*args, **kwargs)
+
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("analysis time budget exhausted")
+
+        future = _get_executor().submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeout:
+            future.cancel()
+            self.timed_out_calls += 1
+            raise DeadlineExceeded(f"call exceeded remaining budget of {remaining:.1f}s")
+
+    def to_dict(self, stage_seconds: dict = None) -> dict:
+        """
+        Budget breakdown for the report
+
+        Args:
+            stage_seconds: Wall-clock seconds per pipeline stage (from RunMetrics)
+        """
+        elapsed = self.elapsed()
+        # Shares are of the budget when one is set, otherwise of the run
+        total = self.budget_seconds or elapsed
+        return {
+            'budget_seconds': self.budget_seconds,
+            'elapsed_seconds': round(elapsed, 2),
+            'remaining_seconds': round(self.remaining(), 2) if self.budget_seconds else None,
+            'expired': self.expired(),
+            'timed_out_calls': self.timed_out_calls,
+            'stages': {
+                name: {
+                    'seconds': round(seconds, 2),
+                    'share': round(seconds / total, 3) if total > 0 else 0.0
+                }
+                for name, seconds in (stage_seconds or {}).items()
+            }
+        }
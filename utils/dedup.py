@@ -0,0 +1,122 @@
+"""
+Near-duplicate Requirement Detection (MinHash + LSH)
+
+Regulations restate the same obligation across sections and amendments.
+Each requirement is reduced to a set of word shingles, summarized with a
+MinHash signature, and the signatures are banded into LSH buckets, so
+only requirements sharing a bucket are ever compared. Candidates are then
+confirmed with their exact shingle Jaccard similarity. Total work is
+roughly linear in the number of requirements.
+"""
+import re
+import zlib
+
+# Shingle Jaccard similarity at or above which two requirements are duplicates
+DEFAULT_THRESHOLD = 0.8
+
+# 16 bands x 8 rows: pairs above ~0.7 Jaccard almost always share a bucket
+NUM_PERM = 128
+BANDS = 16
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """
+    Hashed word shingles of a text
+
+    Args:
+        text: Requirement text
+        size: Words per shingle
+
+    Returns:
+        Set of 31-bit shingle hashes
+    """
+    words = re.findall(r'\w+', text.lower())
+    if len(words) <= size:
+        grams = [' '.join(words)]
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {zlib.crc32(gram.encode('utf-8')) & _MERSENNE_PRIME for gram in grams}
+
+
+def jaccard(a: set, b: set) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash_signatures(shingle_sets: list, num_perm: int = NUM_PERM, seed: int = 1):
+    """
+    MinHash signature of each shingle set
+
+    Returns:
+        numpy uint32 array (len(shingle_sets) x num_perm)
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(shingle_sets), num_perm), _MERSENNE_PRIME, dtype=np.uint64)
+    for i, hashes in enumerate(shingle_sets):
+        if hashes:
+            x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            # (a*x + b) mod p for every shingle/permutation pair; values fit in 62 bits
+            signatures[i] = ((np.outer(x, a) + b) % _MERSENNE_PRIME).min(axis=0)
+    return signatures.astype(np.uint32)
+
+
+def cluster_duplicates(texts: list, threshold: float = DEFAULT_THRESHOLD,
+                       num_perm: int = NUM_PERM, bands: int = BANDS) -> list:
+    """
+    Group near-duplicate texts
+
+    Args:
+        texts: Requirement texts, in document order
+        threshold: Minimum shingle Jaccard similarity for duplicates
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must be divisible by bands)
+
+    Returns:
+        List of clusters (lists of indices into `texts`), one per distinct
+        requirement, each sorted so the first index is the representative
+    """
+    shingle_sets = [shingles(text) for text in texts]
+    signatures = minhash_signatures(shingle_sets, num_perm)
+    rows = num_perm // bands
+
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            # Lowest index (earliest in the document) stays the root
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    for band in range(bands):
+        buckets = {}
+        band_keys = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(len(texts)):
+            buckets.setdefault(band_keys[i].tobytes(), []).append(i)
+
+        for members in buckets.values():
+            # Compare against the bucket's first member only, so a bucket of
+            # identical clauses costs O(n), not O(n^2)
+            head = members[0]
+            for other in members[1:]:
+                if find(head) != find(other) and jaccard(shingle_sets[head], shingle_sets[other]) >= threshold:
+                    union(head, other)
+
+    clusters = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
@@ -3,8 +3,17 @@ Document Processing Utilities for ReguLens
 """
 import re
 from typing import List, Dict
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from utils.records import Requirement
+
+# Minimum match score for each gap status, per matching method. Vertex AI
+# embeddings are more accurate (and score higher) than TF-IDF, so they use
+# higher thresholds; LSA latent cosines sit in between.
+MATCH_THRESHOLDS = {
+    'vertex-ai': {'COMPLIANT': 0.7, 'PARTIAL': 0.4},
+    'lsa': {'COMPLIANT': 0.65, 'PARTIAL': 0.35},
+    'tfidf': {'COMPLIANT': 0.6, 'PARTIAL': 0.3},
+}
 
 
 def extract_requirements(text: str, pages_data: list = None, 
@@ -18,7 +27,7 @@ def extract_requirements(text: str, pages_data: list = None,
         document_name: Name of document for reference
     
     Returns:
-        List of requirements with metadata including page numbers
+        List of Requirement records (dict-compatible) including page numbers
     """
     requirements = []
     req_id = 1
@@ -60,15 +69,15 @@ def extract_requirements(text: str, pages_data: list = None,
                 from utils.pdf_extractor import find_page_number
                 page_num = find_page_number(sentence, pages_data)
             
-            requirements.append({
-                'id': f'REQ-{req_id:03d}',
-                'text': sentence,
-                'criticality': criticality,
-                'keywords': keywords,
-                'section': 'Unknown',
-                'page_number': page_num,
-                'document_name': document_name
-            })
+            requirements.append(Requirement(
+                id=f'REQ-{req_id:03d}',
+                text=sentence,
+                criticality=criticality,
+                keywords=keywords,
+                section='Unknown',
+                page_number=page_num,
+                document_name=document_name
+            ))
             req_id += 1
     
     return requirements
@@ -115,6 +124,16 @@ def calculate_similarity(text1: str, text2: str) -> float:
     if not text1 or not text2:
         return 0.0
     
+    # IDF fitted on the regulation library, when one has been trained
+    from utils.domain_idf import get_domain_idf
+    domain_idf = get_domain_idf()
+    if domain_idf is not None:
+        return domain_idf.similarity(text1, text2)
+    
+    # Imported on first use - scikit-learn dominates module import time
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    
     try:
         vectorizer = TfidfVectorizer(lowercase=True, stop_words='english')
         tfidf_matrix = vectorizer.fit_transform([text1, text2])
@@ -160,16 +179,105 @@ def categorize_risk(gap_status: str, criticality: str) -> str:
     return risk_matrix.get((gap_status, criticality), 'MEDIUM')
 
 
+def match_limits(method: str, thresholds: dict = None) -> dict:
+    """COMPLIANT/PARTIAL thresholds for a matching method (overrides first)"""
+    return (thresholds or {}).get(method) or MATCH_THRESHOLDS.get(method, MATCH_THRESHOLDS['tfidf'])
+
+
+def combine_match_scores(scores: list, method: str, thresholds: dict = None) -> float:
+    """
+    Combined coverage of a requirement by several policy controls
+    
+    Each control scoring at or above the PARTIAL threshold covers part of
+    the distance from PARTIAL to a perfect match; the parts combine as a
+    noisy-or, so two or three clauses that each partly match can together
+    reach COMPLIANT. A single score is returned unchanged.
+    
+    Args:
+        scores: Match scores of the candidate controls
+        method: Matching method that produced the scores
+        thresholds: Overrides for MATCH_THRESHOLDS
+    
+    Returns:
+        Combined score (0-1), never below the best single score
+    """
+    best = max(scores, default=0.0)
+    partial = match_limits(method, thresholds)['PARTIAL']
+    if best < partial or partial >= 1:
+        return best
+    
+    uncovered = 1.0
+    for score in scores:
+        if score >= partial:
+            uncovered *= 1 - (score - partial) / (1 - partial)
+    
+    return max(best, partial + (1 - uncovered) * (1 - partial))
+
+
+def classify_match(score: float, method: str, thresholds: dict = None) -> str:
+    """
+    Determine gap status from the best match score
+    
+    Args:
+        score: Best requirement-control match score (0-1)
+        method: Matching method that produced the score ('vertex-ai', 'lsa' or 'tfidf')
+        thresholds: Overrides for MATCH_THRESHOLDS, same shape
+    
+    Returns:
+        Gap status: COMPLIANT, PARTIAL, or MISSING
+    """
+    limits = match_limits(method, thresholds)
+    
+    if score >= limits['COMPLIANT']:
+        return 'COMPLIANT'
+    elif score >= limits['PARTIAL']:
+        return 'PARTIAL'
+    return 'MISSING'
+
+
+def generate_text(gemini_client, prompt: str, on_stream=None) -> str:
+    """
+    Run one Gemini prompt
+    
+    Args:
+        gemini_client: genai.Client-like client
+        prompt: Prompt text
+        on_stream: Optional callback receiving the text generated so far;
+            when given (and the client can stream) the response is streamed
+    
+    Returns:
+        Complete response text
+    """
+    models = gemini_client.models
+    if on_stream is None or not hasattr(models, 'generate_content_stream'):
+        response = models.generate_content(model='gemini-2.0-flash-exp', contents=prompt)
+        return response.text.strip()
+    
+    text = ''
+    for chunk in models.generate_content_stream(model='gemini-2.0-flash-exp', contents=prompt):
+        text += chunk.text or ''
+        on_stream(text)
+    return text.strip()
+
+
 def generate_recommendation(gap_status: str, requirement_text: str, 
                           matched_control: str = None, match_score: float = 0.0,
                           gemini_client=None, 
                           req_page: int = None, ctrl_page: int = None,
-                          req_doc: str = "Regulation", ctrl_doc: str = "Policy") -> dict:
+                          req_doc: str = "Regulation", ctrl_doc: str = "Policy",
+                          on_stream=None) -> dict:
     """
     Generate two-tier recommendations: simple summary + detailed remediation
     
+    Args:
+        on_stream: Optional callback receiving the quick summary as it is
+            generated (see generate_text)
+    
     Returns:
-        dict with 'quick_summary' and 'detailed_plan' keys
+        dict with 'quick_summary', 'detailed_plan' and 'source' keys
+        ('gemini' for AI-generated text, 'template' for rule-based text).
+        Number mismatches are handled before this by
+        EnhancedComplianceAgent._recommend (utils.numeric_facts).
     """
     
     if gemini_client:
@@ -192,11 +300,7 @@ Generate a simple 2-3 sentence explanation in plain language:
 
 Keep it simple and direct. No jargon. Start with emoji and severity: 🔴 CRITICAL or 🟠 HIGH."""
 
-                quick_response = gemini_client.models.generate_content(
-                    model='gemini-2.0-flash-exp',
-                    contents=quick_prompt
-                )
-                quick_summary = quick_response.text.strip()
+                quick_summary = generate_text(gemini_client, quick_prompt, on_stream)
                 
                 # TIER 2: Detailed Remediation
                 detailed_prompt = f"""You are a compliance expert advising a CA firm's compliance officer.
@@ -270,11 +374,7 @@ Generate a simple 2-3 sentence explanation:
 
 Plain language. Start with emoji: 🟡 UPDATE or 🟠 ENHANCE."""
 
-                quick_response = gemini_client.models.generate_content(
-                    model='gemini-2.0-flash-exp',
-                    contents=quick_prompt
-                )
-                quick_summary = quick_response.text.strip()
+                quick_summary = generate_text(gemini_client, quick_prompt, on_stream)
                 
                 # TIER 2: Detailed Remediation
                 detailed_prompt = f"""You are a compliance expert.
@@ -340,7 +440,8 @@ Your policy adequately addresses this regulatory requirement.
 
             return {
                 'quick_summary': quick_summary.replace('**', '').replace('*', ''),
-                'detailed_plan': detailed_plan.replace('###', '').replace('####', '')
+                'detailed_plan': detailed_plan.replace('###', '').replace('####', ''),
+                'source': 'template' if gap_status == 'COMPLIANT' else 'gemini'
             }
             
         except Exception as e:
@@ -389,7 +490,8 @@ Your policy adequately addresses this regulatory requirement.
     
     return {
         'quick_summary': quick,
-        'detailed_plan': detailed
+        'detailed_plan': detailed,
+        'source': 'template'
     }
 
 
@@ -0,0 +1,264 @@
+"""
+Domain IDF - a vocabulary and IDF weights fitted on the regulation library
+
+calculate_similarity otherwise fits TF-IDF on just the two strings being
+compared, where every shared word gets the same weight. A DomainIDF is
+fitted once on a corpus of regulations and policies (python cli.py
+fit-idf data/), so "beneficial" outweighs "shall", and every run only
+transforms text.
+
+It is opt-in, and only refines the pairwise TF-IDF engine. The agent's
+_score_matrix picks the first available of:
+
+    1. Vertex AI embeddings
+    2. LSA model (--lsa-model)
+    3. hashing TF-IDF model (--tfidf-engine hashing, fit-tfidf)
+    4. pairwise TF-IDF - with this domain IDF when REGULENS_DOMAIN_IDF is
+       set, otherwise fitted on each pair
+
+The artifact is an uncompressed .npz holding a sorted vocabulary array
+(terms found with a binary search), the float32 IDF per term, and JSON
+metadata with a content-hash version. Its arrays are memory-mapped on
+load, so worker processes that load the same file share one read-only
+copy through the page cache.
+
+Configuration:
+
+    REGULENS_DOMAIN_IDF   path to the model written by fit-idf (unset or "off":
+                          not used)
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import Counter
+
+FORMAT_VERSION = 1
+
+# Longer tokens (hashes, URLs) are never kept in the vocabulary
+MAX_TERM_BYTES = 32
+
+_analyzer = None
+
+
+def analyze(text: str) -> list:
+    """Tokens of a text, with the same analyzer calculate_similarity uses"""
+    global _analyzer
+    if _analyzer is None:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        _analyzer = TfidfVectorizer(lowercase=True, stop_words='english').build_analyzer()
+    return _analyzer(text or '')
+
+
+class DomainIDF:
+    """Read-only vocabulary + IDF model"""
+
+    def __init__(self, vocabulary, idf, n_documents: int, metadata: dict = None):
+        """
+        Args:
+            vocabulary: Sorted numpy bytes array of UTF-8 terms
+            idf: float32 array of smoothed IDF per term
+            n_documents: Clauses the model was fitted on
+            metadata: Extra JSON-serializable details (version, sources, ...)
+        """
+        import math
+
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.n_documents = n_documents
+        self.metadata = metadata or {}
+        # A term never seen in the corpus is as rare as a term can be
+        self.unseen_idf = math.log(1 + n_documents) + 1
+
+    @property
+    def version(self) -> str:
+        return self.metadata.get('version', '')
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    @classmethod
+    def fit(cls, texts, sources: list = None) -> 'DomainIDF':
+        """
+        Count document frequencies over a corpus of clauses
+
+        Args:
+            texts: Iterable of clause texts (each counts as one document)
+            sources: Corpus file names, recorded in the metadata
+
+        Returns:
+            Fitted DomainIDF
+        """
+        import numpy as np
+
+        counts = Counter()
+        n_documents = 0
+        for text in texts:
+            counts.update({
+                term for term in (t.encode('utf-8') for t in analyze(text))
+                if len(term) <= MAX_TERM_BYTES
+            })
+            n_documents += 1
+
+        terms = sorted(counts)
+        vocabulary = np.array(terms, dtype=f'S{max((len(t) for t in terms), default=1)}')
+        frequency = np.fromiter((counts[t] for t in terms), dtype=np.float64, count=len(terms))
+        idf = (np.log((1 + n_documents) / (1 + frequency)) + 1).astype(np.float32)
+
+        digest = hashlib.sha256(vocabulary.tobytes() + idf.tobytes()).hexdigest()[:12]
+        metadata = {
+            'format': FORMAT_VERSION,
+            'version': digest,
+            'terms': len(terms),
+            'documents': n_documents,
+            'sources': sources or [],
+        }
+        return cls(vocabulary, idf, n_documents, metadata)
+
+    def weights(self, text: str) -> dict:
+        """
+        Term -> TF-IDF weight of one text (unnormalized)
+
+        Terms outside the vocabulary get the unseen-term IDF, so two texts
+        sharing a rare new term still match on it.
+        """
+        import numpy as np
+
+        counts = Counter(analyze(text))
+        if not counts:
+            return {}
+        terms = list(counts)
+        encoded = [t.encode('utf-8') for t in terms]
+        idf = np.full(len(terms), self.unseen_idf, dtype=np.float32)
+        known = [i for i, term in enumerate(encoded) if len(term) <= MAX_TERM_BYTES]
+        if known and len(self.vocabulary):
+            lookup = np.array([encoded[i] for i in known], dtype=self.vocabulary.dtype)
+            positions = np.minimum(np.searchsorted(self.vocabulary, lookup), len(self.vocabulary) - 1)
+            found = self.vocabulary[positions] == lookup
+            idf[np.array(known)[found]] = self.idf[positions[found]]
+        return {term: counts[term] * float(weight) for term, weight in zip(terms, idf)}
+
+    def similarity(self, text1: str, text2: str) -> float:
+        """Cosine similarity of two texts under the domain IDF weights"""
+        a, b = self.weights(text1), self.weights(text2)
+        if not a or not b:
+            return 0.0
+        if len(a) > len(b):
+            a, b = b, a
+        dot = sum(weight * b[term] for term, weight in a.items() if term in b)
+        norm = (sum(w * w for w in a.values()) * sum(w * w for w in b.values())) ** 0.5
+        return float(dot / norm) if norm else 0.0
+
+    def similarity_matrix(self, texts_a: list, texts_b: list):
+        """
+        Cosine similarity of every text in texts_a to every text in texts_b
+
+        Returns:
+            numpy float32 array (len(texts_a) x len(texts_b))
+        """
+        import numpy as np
+        import scipy.sparse as sp
+        from sklearn.preprocessing import normalize
+
+        columns = {}
+        rows, cols, values = [], [], []
+        for row, text in enumerate(list(texts_a) + list(texts_b)):
+            for term, weight in self.weights(text).items():
+                rows.append(row)
+                cols.append(columns.setdefault(term, len(columns)))
+                values.append(weight)
+
+        matrix = sp.csr_matrix(
+            (np.array(values, dtype=np.float32), (rows, cols)),
+            shape=(len(texts_a) + len(texts_b), max(len(columns), 1))
+        )
+        matrix = normalize(matrix, norm='l2', copy=False)
+        return (matrix[:len(texts_a)] @ matrix[len(texts_a):].T).toarray().astype(np.float32)
+
+    def save(self, path: str):
+        """Write the model as an uncompressed (memory-mappable) .npz file"""
+        import numpy as np
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        metadata = dict(self.metadata, documents=self.n_documents)
+        np.savez(
+            path,
+            vocabulary=self.vocabulary,
+            idf=self.idf,
+            metadata=np.frombuffer(json.dumps(metadata).encode('utf-8'), dtype=np.uint8)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'DomainIDF':
+        """Memory-map a model written by save()"""
+        arrays = _mmap_npz(path)
+        metadata = json.loads(bytes(arrays['metadata']).decode('utf-8'))
+        if metadata.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported domain IDF format: {metadata.get('format')}")
+        return cls(arrays['vocabulary'], arrays['idf'], metadata['documents'], metadata)
+
+
+def _mmap_npz(path: str) -> dict:
+    """
+    Memory-map every array of an uncompressed .npz file
+
+    np.load(mmap_mode=...) ignores mmap_mode for .npz archives, but
+    np.savez stores members uncompressed, so each .npy member is mapped
+    in place at its offset inside the zip file.
+    """
+    import struct
+    import zipfile
+    import numpy as np
+
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(archive.open(info))
+                continue
+            # Local file header: 30 fixed bytes, then file name and extra field
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if not shape or 0 in shape:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(
+                path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                order='F' if fortran_order else 'C'
+            )
+    return arrays
+
+
+# Process-wide model, loaded once and shared read-only by every session
+_model = None
+_model_path = None
+_model_lock = threading.Lock()
+
+
+def get_domain_idf():
+    """
+    Shared domain IDF model configured from the environment
+
+    Returns:
+        DomainIDF, or None when REGULENS_DOMAIN_IDF is unset or "off"
+    """
+    global _model, _model_path
+    path = os.getenv('REGULENS_DOMAIN_IDF', '')
+    if path.lower() in ('', 'off', '0', 'false', 'none'):
+        return None
+    with _model_lock:
+        if _model_path != path:
+            _model_path = path
+            _model = DomainIDF.load(path) if os.path.exists(path) else None
+            if _model is not None:
+                print(f"✅ Domain IDF loaded ({len(_model)} terms, version {_model.version})")
+            else:
+                print(f"   ⚠️ Domain IDF not found at {path} - fitting TF-IDF per pair")
+        return _model
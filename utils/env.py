@@ -0,0 +1,30 @@
+"""
+Environment Loading - read .env on first use instead of at import time
+"""
+import threading
+
+_lock = threading.Lock()
+_loaded = False
+_overridden = False
+
+
+def load_env(override: bool = False):
+    """
+    Load variables from .env once per process
+
+    Args:
+        override: Let .env values win over variables already set in the
+            shell (applied at most once)
+    """
+    global _loaded, _overridden
+    with _lock:
+        if _loaded and (_overridden or not override):
+            return
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            _loaded = True
+            return
+        load_dotenv(override=override)
+        _loaded = True
+        _overridden = _overridden or override
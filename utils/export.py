@@ -0,0 +1,223 @@
+"""
+Streaming Report Export - CSV, JSONL, Parquet and Excel
+
+Gaps are written chunk by chunk from a GapTable or StoredGapTable
+(iter_chunks), so only one chunk of rows is in memory at a time and peak
+memory stays flat as reports grow. Nothing is generated until an export
+is requested.
+
+    csv       one row per gap (standard library)
+    jsonl     one JSON object per gap, lists kept as lists (standard library)
+    parquet   columnar, one row group per chunk (needs pyarrow)
+    xlsx      write-only workbook (needs openpyxl); cells are capped at
+              Excel's 32,767 characters
+
+With split_texts=True the long recommendation texts (quick summary and
+detailed plan) go to a side JSONL file keyed by requirement ID, keeping
+the main file small enough for spreadsheets and BI tools.
+"""
+import os
+import csv
+import json
+
+from utils.records import Gap, json_default
+
+FORMATS = {
+    'csv': {'extension': '.csv', 'mime': 'text/csv', 'requires': None},
+    'jsonl': {'extension': '.jsonl', 'mime': 'application/x-ndjson', 'requires': None},
+    'parquet': {'extension': '.parquet', 'mime': 'application/vnd.apache.parquet', 'requires': 'pyarrow'},
+    'xlsx': {
+        'extension': '.xlsx',
+        'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'requires': 'openpyxl'
+    },
+}
+
+TEXT_FIELDS = ('quick_summary', 'detailed_plan')
+
+CHUNK_SIZE = 1000
+
+# Longest text Excel accepts in one cell
+XLSX_CELL_LIMIT = 32767
+
+
+def available_formats() -> list:
+    """Export formats whose optional dependencies are installed"""
+    import importlib.util
+
+    return [
+        name for name, spec in FORMATS.items()
+        if spec['requires'] is None or importlib.util.find_spec(spec['requires']) is not None
+    ]
+
+
+def export_columns(split_texts: bool = False) -> list:
+    """Columns of the main export file"""
+    return [field for field in Gap._fields if not (split_texts and field in TEXT_FIELDS)]
+
+
+def side_file_path(path: str, fmt: str) -> str:
+    """
+    Path of the recommendation-text side file for a `fmt` export at `path`
+
+    The format is part of the name, so e.csv and e.jsonl exported side by
+    side get e.csv.texts.jsonl and e.jsonl.texts.jsonl.
+    """
+    return f"{os.path.splitext(path)[0]}.{fmt}.texts.jsonl"
+
+
+def _flat(value):
+    """Cell value for tabular formats (lists joined with ' | ')"""
+    if isinstance(value, (list, tuple)):
+        return ' | '.join(str(v) for v in value)
+    return value
+
+
+class _CsvWriter:
+    def __init__(self, path: str, columns: list):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.columns = columns
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows: list):
+        self.writer.writerows([_flat(row.get(c)) for c in self.columns] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _JsonlWriter:
+    def __init__(self, path: str, columns: list):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.columns = columns
+
+    def write(self, rows: list):
+        self.file.writelines(
+            json.dumps({c: row.get(c) for c in self.columns}, ensure_ascii=False, default=json_default) + '\n'
+            for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, columns: list):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([
+            (c, pa.float64() if c == 'match_score'
+             else pa.list_(pa.string()) if c == 'supporting_controls'
+             else pa.string())
+            for c in columns
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, rows: list):
+        data = {
+            c: [
+                list(row.get(c) or []) if c == 'supporting_controls'
+                else row.get(c) if c == 'match_score'
+                else (None if row.get(c) is None else str(row.get(c)))
+                for row in rows
+            ]
+            for c in self.columns
+        }
+        self.writer.write_table(self.pa.Table.from_pydict(data, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path: str, columns: list):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.columns = columns
+        # Write-only mode streams rows to a temporary file instead of keeping cells in memory
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Gaps')
+        self.sheet.append(columns)
+
+    def write(self, rows: list):
+        for row in rows:
+            values = [_flat(row.get(c)) for c in self.columns]
+            self.sheet.append([v[:XLSX_CELL_LIMIT] if isinstance(v, str) else v for v in values])
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+_WRITERS = {'csv': _CsvWriter, 'jsonl': _JsonlWriter, 'parquet': _ParquetWriter, 'xlsx': _XlsxWriter}
+
+
+def export_gaps(gap_table, path: str, fmt: str = 'csv', split_texts: bool = False,
+                chunk_size: int = CHUNK_SIZE) -> list:
+    """
+    Stream a report's gaps to a file
+
+    Args:
+        gap_table: GapTable or StoredGapTable of the report
+        path: Output file
+        fmt: One of FORMATS
+        split_texts: Write quick summaries and detailed plans to a side
+            JSONL file (side_file_path(path, fmt)) instead of the main file
+        chunk_size: Gaps held in memory at a time
+
+    Returns:
+        Paths of the files written (main file first)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt not in available_formats():
+        raise RuntimeError(f"{fmt} export needs the '{FORMATS[fmt]['requires']}' package")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    writer = _WRITERS[fmt](path, export_columns(split_texts))
+    side_path = side_file_path(path, fmt)
+    side_writer = _JsonlWriter(side_path, ['requirement_id', *TEXT_FIELDS]) if split_texts else None
+    try:
+        for rows in gap_table.iter_chunks(chunk_size):
+            writer.write(rows)
+            if side_writer:
+                side_writer.write(rows)
+    finally:
+        writer.close()
+        if side_writer:
+            side_writer.close()
+
+    return [path, side_path] if split_texts else [path]
+
+
+def export_archive(gap_table, fmt: str = 'csv', split_texts: bool = False,
+                   name: str = 'regulens_compliance_report') -> dict:
+    """
+    Export for download
+
+    The files are written to a temporary directory that is removed once
+    their bytes are read. A single file is returned as is; with
+    split_texts the main and side files are bundled into one .zip.
+
+    Returns:
+        Dict with file_name, mime and data (bytes)
+    """
+    import tempfile
+    import zipfile
+
+    with tempfile.TemporaryDirectory(prefix='regulens_export_') as directory:
+        paths = export_gaps(gap_table, os.path.join(directory, name + FORMATS[fmt]['extension']), fmt, split_texts)
+        if len(paths) == 1:
+            path, mime = paths[0], FORMATS[fmt]['mime']
+        else:
+            path, mime = os.path.join(directory, f"{name}_{fmt}.zip"), 'application/zip'
+            with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                for member in paths:
+                    zf.write(member, os.path.basename(member))
+        with open(path, 'rb') as f:
+            data = f.read()
+    return {'file_name': os.path.basename(path), 'mime': mime, 'data': data}
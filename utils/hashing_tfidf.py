@@ -0,0 +1,198 @@
+"""
+Out-of-core TF-IDF with a hashing vectorizer
+
+`calculate_similarity` fits a fresh TfidfVectorizer per pair, which needs
+the vocabulary and every document in memory. StreamingTfidf keeps the same
+tokenization (lowercase, English stop words, 2+ character words), smoothed
+IDF and L2 normalization, but:
+
+- terms are hashed into a fixed number of features (no vocabulary)
+- document frequencies are counted incrementally with partial_fit(), so a
+  corpus of any size is processed in chunks with constant memory
+- models fitted on different shards (e.g. in worker processes) are
+  combined with merge() and saved/loaded as a small .npz file
+
+Usage:
+    model = StreamingTfidf()
+    for batch in batches_of_clauses:
+        model.partial_fit(batch)
+    scores = model.similarity(requirement_texts, control_texts)
+"""
+import os
+
+DEFAULT_FEATURES = 2 ** 20
+
+
+class StreamingTfidf:
+    """Hashing TF-IDF with incremental document frequencies"""
+
+    def __init__(self, n_features: int = DEFAULT_FEATURES):
+        """
+        Args:
+            n_features: Hashed feature dimension (memory is ~8 bytes each)
+        """
+        import numpy as np
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.n_features = n_features
+        self.n_documents = 0
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features, lowercase=True, stop_words='english',
+            alternate_sign=False, norm=None
+        )
+        self._idf = None
+
+    def partial_fit(self, texts: list) -> 'StreamingTfidf':
+        """Count document frequencies for one batch of texts"""
+        import numpy as np
+
+        if not texts:
+            return self
+        counts = self._vectorizer.transform(texts)
+        counts.data[:] = 1
+        self.document_frequency += np.asarray(counts.sum(axis=0)).ravel().astype(np.int64)
+        self.n_documents += len(texts)
+        self._idf = None
+        return self
+
+    def merge(self, other: 'StreamingTfidf') -> 'StreamingTfidf':
+        """Add the document frequencies of a model fitted on another shard"""
+        if other.n_features != self.n_features:
+            raise ValueError(f"Cannot merge models with {other.n_features} and {self.n_features} features")
+        self.document_frequency += other.document_frequency
+        self.n_documents += other.n_documents
+        self._idf = None
+        return self
+
+    @property
+    def idf(self):
+        """Smoothed IDF per feature, as TfidfVectorizer computes it"""
+        import numpy as np
+
+        if self._idf is None:
+            self._idf = (
+                np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+            ).astype(np.float32)
+        return self._idf
+
+    def transform(self, texts: list):
+        """L2-normalized TF-IDF rows (scipy CSR matrix) for a batch of texts"""
+        import numpy as np
+        from sklearn.preprocessing import normalize
+
+        matrix = self._vectorizer.transform(texts).astype(np.float32)
+        matrix.data *= self.idf[matrix.indices]
+        return normalize(matrix, norm='l2', copy=False)
+
+    def transform_batches(self, texts, batch_size: int = 1000):
+        """Yield transform() of consecutive batches from any iterable of texts"""
+        batch = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) >= batch_size:
+                yield self.transform(batch)
+                batch = []
+        if batch:
+            yield self.transform(batch)
+
+    def similarity(self, texts_a: list, texts_b: list, batch_size: int = 1000):
+        """
+        Cosine similarity of every text in texts_a to every text in texts_b
+
+        Returns:
+            numpy float32 array (len(texts_a) x len(texts_b))
+        """
+        import numpy as np
+        import scipy.sparse as sp
+
+        if not texts_a or not texts_b:
+            return np.zeros((len(texts_a), len(texts_b)), dtype=np.float32)
+        matrix_b = sp.vstack(list(self.transform_batches(texts_b, batch_size))).T.tocsc()
+        rows = [
+            (block @ matrix_b).toarray()
+            for block in self.transform_batches(texts_a, batch_size)
+        ]
+        return np.vstack(rows).astype(np.float32)
+
+    def save(self, path: str):
+        """Write the model as a compressed .npz file"""
+        import numpy as np
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(
+            path,
+            n_features=self.n_features,
+            n_documents=self.n_documents,
+            document_frequency=self.document_frequency
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'StreamingTfidf':
+        """Read a model written by save()"""
+        import numpy as np
+
+        with np.load(path) as data:
+            model = cls(int(data['n_features']))
+            model.n_documents = int(data['n_documents'])
+            model.document_frequency = data['document_frequency'].astype(np.int64)
+        return model
+
+
+def read_clauses(path: str) -> list:
+    """
+    Clauses of a .txt or .pdf document, as the agent would extract them
+
+    Returns:
+        List of clause texts (the whole text when no clauses are found)
+    """
+    from utils.document_utils import extract_requirements
+    from utils.pdf_extractor import extract_text_from_pdf, is_pdf
+
+    if is_pdf(path):
+        text = extract_text_from_pdf(path)
+    else:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+    return [req['text'] for req in extract_requirements(text)] or [text]
+
+
+def _fit_shard(paths: list, n_features: int, batch_size: int) -> StreamingTfidf:
+    """Worker: fit one shard of documents, one clause per TF-IDF document"""
+    model = StreamingTfidf(n_features)
+    batch = []
+    for path in paths:
+        batch.extend(read_clauses(path))
+        if len(batch) >= batch_size:
+            model.partial_fit(batch)
+            batch = []
+    model.partial_fit(batch)
+    return model
+
+
+def fit_corpus(paths: list, n_features: int = DEFAULT_FEATURES, workers: int = 1,
+               batch_size: int = 1000) -> StreamingTfidf:
+    """
+    Fit document frequencies over a corpus of policy/regulation files
+
+    Args:
+        paths: .txt or .pdf files; every extracted clause counts as a document
+        n_features: Hashed feature dimension
+        workers: Worker processes; each fits a shard and the results are merged
+        batch_size: Clauses per partial_fit() batch
+
+    Returns:
+        Fitted StreamingTfidf
+    """
+    if workers <= 1 or len(paths) <= 1:
+        return _fit_shard(paths, n_features, batch_size)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    shards = [paths[i::workers] for i in range(workers)]
+    model = StreamingTfidf(n_features)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_fit_shard, shard, n_features, batch_size) for shard in shards if shard]
+        for future in futures:
+            model.merge(future.result())
+    return model
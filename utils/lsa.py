@@ -0,0 +1,135 @@
+"""
+Latent Semantic Analysis (LSA) matching engine
+
+A fully local middle tier between exact-word TF-IDF and Vertex AI
+embeddings. Truncated SVD of a TF-IDF matrix fitted on a regulation/policy
+corpus maps every clause to a dense, low-dimensional vector in which terms
+that co-occur across the corpus ("KYC" / "customer due diligence",
+"retain" / "preserve") end up close together, so paraphrases score well
+without any network call. A run scores all requirement/control pairs with
+one matrix product.
+
+The model is an artifact: fit it once (python cli.py fit-lsa data/ ...),
+then point the agent at it (REGULENS_LSA_MODEL or the lsa_model argument).
+
+Only the hashed features that occur in the corpus are kept in the SVD
+components, so the saved model stays small even with 2**20 features.
+"""
+import os
+
+from utils.hashing_tfidf import DEFAULT_FEATURES, StreamingTfidf
+
+DEFAULT_COMPONENTS = 128
+
+
+class LSAModel:
+    """TF-IDF (hashing) followed by truncated SVD"""
+
+    def __init__(self, tfidf: StreamingTfidf, features, components):
+        """
+        Args:
+            tfidf: Fitted StreamingTfidf
+            features: int array of the hashed feature columns used by the SVD
+            components: float32 array (n_components x len(features))
+        """
+        self.tfidf = tfidf
+        self.features = features
+        self.components = components
+
+    @property
+    def n_components(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, texts: list, n_components: int = DEFAULT_COMPONENTS,
+            tfidf: StreamingTfidf = None, n_features: int = DEFAULT_FEATURES,
+            seed: int = 0) -> 'LSAModel':
+        """
+        Fit the SVD on a corpus of clauses
+
+        Args:
+            texts: Corpus clauses (regulation requirements and policy controls)
+            n_components: Dimensions of the latent space (capped by corpus size)
+            tfidf: Already fitted StreamingTfidf (e.g. over a larger archive);
+                fitted on `texts` when None
+            n_features: Hashed feature dimension when fitting a new StreamingTfidf
+            seed: Seed of the randomized SVD
+
+        Returns:
+            Fitted LSAModel
+        """
+        import numpy as np
+        import scipy.sparse as sp
+        from sklearn.decomposition import TruncatedSVD
+
+        if tfidf is None:
+            tfidf = StreamingTfidf(n_features).partial_fit(texts)
+
+        matrix = sp.vstack(list(tfidf.transform_batches(texts))).tocsc()
+        features = np.flatnonzero(np.diff(matrix.indptr)).astype(np.int32)
+        matrix = matrix[:, features]
+
+        n_components = max(1, min(n_components, matrix.shape[0] - 1, len(features) - 1))
+        svd = TruncatedSVD(n_components=n_components, algorithm='randomized', random_state=seed)
+        svd.fit(matrix)
+        return cls(tfidf, features, svd.components_.astype(np.float32))
+
+    def transform(self, texts: list, batch_size: int = 1000):
+        """
+        L2-normalized latent vectors
+
+        Returns:
+            numpy float32 array (len(texts) x n_components)
+        """
+        import numpy as np
+
+        rows = [
+            block[:, self.features] @ self.components.T
+            for block in self.tfidf.transform_batches(texts, batch_size)
+        ]
+        if not rows:
+            return np.zeros((0, self.n_components), dtype=np.float32)
+        vectors = np.vstack(rows).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def similarity(self, texts_a: list, texts_b: list):
+        """
+        Latent cosine similarity of every text in texts_a to every text in texts_b
+
+        Negative similarities (unrelated topics) are clipped to 0, so scores
+        share the 0-1 range of the other engines.
+
+        Returns:
+            numpy float32 array (len(texts_a) x len(texts_b))
+        """
+        import numpy as np
+
+        scores = self.transform(texts_a) @ self.transform(texts_b).T
+        return np.clip(scores, 0.0, 1.0, out=scores)
+
+    def save(self, path: str):
+        """Write the model (TF-IDF statistics and SVD components) as a .npz file"""
+        import numpy as np
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(
+            path,
+            n_features=self.tfidf.n_features,
+            n_documents=self.tfidf.n_documents,
+            document_frequency=self.tfidf.document_frequency,
+            features=self.features,
+            components=self.components
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'LSAModel':
+        """Read a model written by save()"""
+        import numpy as np
+
+        with np.load(path) as data:
+            tfidf = StreamingTfidf(int(data['n_features']))
+            tfidf.n_documents = int(data['n_documents'])
+            tfidf.document_frequency = data['document_frequency'].astype(np.int64)
+            return cls(tfidf, data['features'], data['components'])
@@ -0,0 +1,145 @@
+"""
+Run Metrics - per-stage timers and counters for a compliance analysis
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+
+# Counters every report carries, even when they stay at zero
+DEFAULT_COUNTERS = (
+    'pairs_scored',
+    'embedding_calls',
+    'llm_calls',
+    'llm_tokens',
+    'cache_hits',
+    'fallbacks',
+)
+
+
+class MetricsHook:
+    """
+    Interface for external collectors (Prometheus, StatsD, logs, ...)
+
+    Subclass and override the callbacks you need, then pass the hook to
+    EnhancedComplianceAgent or call register_hook() for every run in the
+    process.
+    """
+
+    def on_stage(self, name: str, wall_seconds: float, cpu_seconds: float):
+        """Called when a pipeline stage finishes"""
+
+    def on_counter(self, name: str, amount: float, total: float):
+        """Called whenever a counter is incremented"""
+
+    def on_latency(self, name: str, seconds: float):
+        """Called for every latency observation (e.g. time to first token)"""
+
+    def on_run_complete(self, performance: dict):
+        """Called once with the final performance block"""
+
+
+_global_hooks = []
+
+
+def register_hook(hook: MetricsHook):
+    """Attach a collector to every run in this process"""
+    if hook not in _global_hooks:
+        _global_hooks.append(hook)
+
+
+class RunMetrics:
+    """Wall-clock/CPU stage timers and counters for one analysis run"""
+
+    def __init__(self, hooks: list = None):
+        """
+        Args:
+            hooks: Extra MetricsHook instances for this run only
+        """
+        self.hooks = list(_global_hooks) + list(hooks or [])
+        self.started_at = time.perf_counter()
+        self.stages = {}
+        self.counters = {name: 0 for name in DEFAULT_COUNTERS}
+        self.latencies = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as a pipeline stage (re-entering a stage accumulates)"""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            with self._lock:
+                stage = self.stages.setdefault(
+                    name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0}
+                )
+                stage['wall_seconds'] += wall
+                stage['cpu_seconds'] += cpu
+                stage['calls'] += 1
+            self._notify('on_stage', name, wall, cpu)
+
+    def incr(self, name: str, amount: float = 1):
+        """Increment a counter"""
+        with self._lock:
+            total = self.counters.get(name, 0) + amount
+            self.counters[name] = total
+        self._notify('on_counter', name, amount, total)
+
+    def observe(self, name: str, seconds: float):
+        """Record one latency observation"""
+        with self._lock:
+            latency = self.latencies.setdefault(
+                name, {'count': 0, 'total_seconds': 0.0, 'min_seconds': seconds, 'max_seconds': seconds}
+            )
+            latency['count'] += 1
+            latency['total_seconds'] += seconds
+            latency['min_seconds'] = min(latency['min_seconds'], seconds)
+            latency['max_seconds'] = max(latency['max_seconds'], seconds)
+        self._notify('on_latency', name, seconds)
+
+    def stage_seconds(self) -> dict:
+        """Wall-clock seconds per stage"""
+        with self._lock:
+            return {name: stage['wall_seconds'] for name, stage in self.stages.items()}
+
+    def to_dict(self) -> dict:
+        """Performance block for the report"""
+        with self._lock:
+            return {
+                'total_wall_seconds': round(time.perf_counter() - self.started_at, 3),
+                'stages': {
+                    name: {
+                        'wall_seconds': round(stage['wall_seconds'], 3),
+                        'cpu_seconds': round(stage['cpu_seconds'], 3),
+                        'calls': stage['calls']
+                    }
+                    for name, stage in self.stages.items()
+                },
+                'counters': dict(self.counters),
+                'latencies': {
+                    name: {
+                        'count': latency['count'],
+                        'mean_seconds': round(latency['total_seconds'] / latency['count'], 3),
+                        'min_seconds': round(latency['min_seconds'], 3),
+                        'max_seconds': round(latency['max_seconds'], 3)
+                    }
+                    for name, latency in self.latencies.items()
+                }
+            }
+
+    def finish(self) -> dict:
+        """Build the performance block and hand it to the hooks"""
+        performance = self.to_dict()
+        self._notify('on_run_complete', performance)
+        return performance
+
+    def _notify(self, method: str, *args):
+        for hook in self.hooks:
+            try:
+                getattr(hook, method)(*args)
+            except Exception as e:
+                print(f"   ⚠️ Metrics hook {type(hook).__name__}.{method} failed: {e}")
@@ -0,0 +1,284 @@
+"""
+Numeric Fact Extraction - amounts, durations and percentages
+
+Most PARTIAL gaps in AML/KYC policies are number mismatches: a ₹ threshold,
+a retention period or a reporting deadline that differs from the
+regulation. These are found here with regular expressions and compared
+directly, so the gap gets a deterministic side-by-side finding without an
+LLM call.
+
+Understands ₹ / Rs. / INR amounts with Indian digit grouping (2,00,000)
+and lakh/crore, durations in days/weeks/months/years (digits or words),
+and percentages.
+
+The words before a regulation's number decide which way it binds:
+
+    minimum   "at least", "not less than", retention ("retain/keep ... for")
+              - a longer period or larger value in the policy is stricter
+    maximum   caps and deadlines ("within", "up to", "not exceeding",
+              "every"), reporting thresholds ("above", "exceeding")
+              - a shorter period or lower value in the policy is stricter
+    exact     no such words - only the same value matches
+
+A stricter policy value satisfies the regulation and is never "corrected".
+"""
+import re
+
+_NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12,
+    'fifteen': 15, 'twenty': 20, 'thirty': 30, 'forty-five': 45, 'sixty': 60,
+    'ninety': 90,
+}
+
+_SCALES = {
+    'thousand': 1e3, 'k': 1e3,
+    'lakh': 1e5, 'lakhs': 1e5, 'lac': 1e5, 'lacs': 1e5,
+    'million': 1e6,
+    'crore': 1e7, 'crores': 1e7, 'cr': 1e7,
+}
+
+# Durations are measured in months when in months/years (so 1 year ==
+# 12 months exactly) and in days when in days/weeks; only facts with the
+# same unit are compared
+_DAYS_PER_UNIT = {'day': 1, 'week': 7}
+_MONTHS_PER_UNIT = {'month': 1, 'year': 12}
+
+# 2,00,000 / 200,000 / 50000 / 2.5
+_NUMBER = r'\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+_SCALE = r'(?:\s*(?P<scale>lakhs?|lacs?|crores?|cr\b\.?|thousand|million|k\b))?'
+
+_AMOUNT_PATTERNS = [
+    re.compile(r'(?:₹|\brs\.?|\binr)\s*(?P<number>' + _NUMBER + ')' + _SCALE, re.IGNORECASE),
+    re.compile(r'(?P<number>' + _NUMBER + ')' + _SCALE + r'\s*(?:rupees|inr)\b', re.IGNORECASE),
+]
+
+_DURATION_PATTERN = re.compile(
+    r'\b(?P<number>' + _NUMBER + '|' + '|'.join(_NUMBER_WORDS) + r')'
+    r'(?:\s*\(\d+\))?\s*(?:working\s+|business\s+|calendar\s+)?'
+    r'(?P<unit>day|week|month|year)s?\b',
+    re.IGNORECASE
+)
+
+_PERCENT_PATTERN = re.compile(
+    r'(?P<number>' + _NUMBER + r')\s*(?:%|per\s?cent\b|percent\b)',
+    re.IGNORECASE
+)
+
+# Words before a number that say which way it binds; the closest one wins
+_DIRECTION_CUES = re.compile(
+    r'(?P<minimum>\bat\s+least\b|\bminimum\b|\b(?:not|no)\s+less\s+than\b'
+    r'|\b(?:retain|retained|preserve|preserved|maintain|maintained|keep|kept|store|stored)\b)'
+    r'|(?P<maximum>\bwithin\b|\b(?:not|no)\s+later\s+than\b|\b(?:not|no)\s+more\s+than\b'
+    r'|\bnot\s+exceeding\b|\bup\s+to\b|\bat\s+most\b|\bmaximum\b|\blimit(?:ed)?\b|\bcap(?:ped)?\b'
+    r'|\bevery\b|\babove\b|\bexceed(?:s|ing)?\b|\bover\b|\bmore\s+than\b|\bin\s+excess\s+of\b)',
+    re.IGNORECASE
+)
+
+# Characters before a number searched for a cue (within the same clause)
+_CUE_WINDOW = 80
+
+
+def _to_number(text: str) -> float:
+    text = text.lower()
+    if text in _NUMBER_WORDS:
+        return float(_NUMBER_WORDS[text])
+    return float(text.replace(',', ''))
+
+
+def extract_numeric_facts(text: str) -> list:
+    """
+    Find amounts, durations and percentages in a text
+
+    Args:
+        text: Requirement or control text
+
+    Returns:
+        List of fact dicts with 'kind' ('amount', 'duration' or
+        'percentage'), 'unit' ('INR', 'days', 'months' or '%'), 'value'
+        in that unit, 'direction' ('minimum', 'maximum' or 'exact') and
+        the original 'text', in order of appearance
+    """
+    facts = []
+    taken = []
+
+    def add(kind, match, value, unit):
+        span = match.span()
+        if any(start < span[1] and span[0] < end for start, end in taken):
+            return
+        taken.append(span)
+        facts.append({
+            'kind': kind, 'unit': unit, 'value': value,
+            'direction': _direction(text, span[0]), 'text': match.group(0).strip(), 'start': span[0]
+        })
+
+    for pattern in _AMOUNT_PATTERNS:
+        for match in pattern.finditer(text):
+            scale = (match.group('scale') or '').lower().rstrip('.')
+            add('amount', match, _to_number(match.group('number')) * _SCALES.get(scale, 1), 'INR')
+
+    for match in _DURATION_PATTERN.finditer(text):
+        number, unit = _to_number(match.group('number')), match.group('unit').lower()
+        if unit in _MONTHS_PER_UNIT:
+            add('duration', match, number * _MONTHS_PER_UNIT[unit], 'months')
+        else:
+            add('duration', match, number * _DAYS_PER_UNIT[unit], 'days')
+
+    for match in _PERCENT_PATTERN.finditer(text):
+        add('percentage', match, _to_number(match.group('number')), '%')
+
+    facts.sort(key=lambda fact: fact['start'])
+    for fact in facts:
+        del fact['start']
+    return facts
+
+
+def _direction(text: str, start: int) -> str:
+    """'minimum', 'maximum' or 'exact' from the cue words closest before a number"""
+    window = re.split(r'[.;:\n]', text[max(0, start - _CUE_WINDOW):start])[-1]
+    cues = list(_DIRECTION_CUES.finditer(window))
+    return cues[-1].lastgroup if cues else 'exact'
+
+
+def numeric_key(text: str) -> tuple:
+    """The numbers of a text (unit and value, in order), for comparing two texts"""
+    return tuple((fact['unit'], fact['value']) for fact in extract_numeric_facts(text or ''))
+
+
+def compare_numeric_facts(requirement_text: str, control_text: str) -> list:
+    """
+    Compare the numbers a regulation requires with those a policy states
+
+    Facts are paired only with facts of the same kind and unit, in order
+    of appearance: the first amount with the first amount, the first
+    period in months with the first period in months, and so on.
+
+    Returns:
+        List of finding dicts: 'kind', 'direction', 'regulation' and
+        'policy' (original texts, policy None when the policy states no
+        number of that kind and unit) and 'status' ('match', 'stricter',
+        'mismatch' or 'not_stated'); 'stricter' satisfies the regulation
+    """
+    unpaired = extract_numeric_facts(control_text or '')
+    findings = []
+
+    for fact in extract_numeric_facts(requirement_text):
+        paired = next((c for c in unpaired if (c['kind'], c['unit']) == (fact['kind'], fact['unit'])), None)
+        finding = {'kind': fact['kind'], 'direction': fact['direction'], 'regulation': fact['text']}
+        if paired is None:
+            findings.append(dict(finding, policy=None, status='not_stated'))
+            continue
+        unpaired.remove(paired)
+        findings.append(dict(finding, policy=paired['text'], status=_status(fact, paired['value'])))
+
+    return findings
+
+
+def _status(fact: dict, policy_value: float) -> str:
+    """How a policy value compares with a regulation fact, in the fact's direction"""
+    if abs(policy_value - fact['value']) < 1e-9:
+        return 'match'
+    if fact['direction'] == 'minimum' and policy_value > fact['value']:
+        return 'stricter'
+    if fact['direction'] == 'maximum' and policy_value < fact['value']:
+        return 'stricter'
+    return 'mismatch'
+
+
+_ASPECTS = {'amount': 'Amount threshold', 'duration': 'Time period', 'percentage': 'Percentage'}
+
+
+def numeric_recommendation(requirement_text: str, matched_control: str,
+                           req_page: int = None, ctrl_page: int = None) -> dict:
+    """
+    Rule-based recommendation for a PARTIAL gap caused by number mismatches
+
+    Returns:
+        Recommendation dict (source 'rule-numeric'), or None when the numbers
+        don't explain the gap (no numbers in the requirement, or the policy
+        meets all of them) and it needs the LLM
+    """
+    findings = compare_numeric_facts(requirement_text, matched_control)
+    mismatches = [f for f in findings if f['status'] == 'mismatch']
+    if not mismatches:
+        return None
+
+    req_page_ref = f" (Regulation page {req_page})" if req_page else ""
+    ctrl_page_ref = f" (Your policy page {ctrl_page})" if ctrl_page else ""
+
+    changes = "; ".join(f"{f['policy']} → {f['regulation']}" for f in mismatches)
+    ctrl_page_info = f" (page {ctrl_page})" if ctrl_page else ""
+    req_page_info = f" (page {req_page})" if req_page else ""
+    quick = (f"🟡 UPDATE: Your policy{ctrl_page_info} states different numbers than the "
+             f"regulation{req_page_info}. Change {changes}.")
+
+    rows = []
+    for f in findings:
+        if f['status'] == 'mismatch':
+            action = f"Change to {f['regulation']}"
+        elif f['status'] == 'not_stated':
+            action = f"Add {f['regulation']}"
+        elif f['status'] == 'stricter':
+            action = "No change (policy is stricter)"
+        else:
+            action = "No change"
+        rows.append(f"| {_ASPECTS[f['kind']]} | {f['regulation']} | {f['policy'] or 'Not stated'} | {action} |")
+
+    steps = "\n".join(
+        f"{i}. Page {ctrl_page if ctrl_page else '[X]'}: Change \"{f['policy']}\" to \"{f['regulation']}\""
+        for i, f in enumerate(mismatches, 1)
+    )
+    table = "\n".join(rows)
+
+    detailed = f"""**GAP ANALYSIS:**
+The policy covers this requirement but states {len(mismatches)} value(s) that differ from the regulation.
+
+**WHAT REGULATION REQUIRES{req_page_ref}:**
+{requirement_text}
+
+**WHAT YOUR POLICY CURRENTLY STATES{ctrl_page_ref}:**
+{matched_control}
+
+**SIDE-BY-SIDE COMPARISON:**
+| Aspect | Regulation | Your Policy | Action |
+|--------|-----------|-------------|--------|
+{table}
+
+**SPECIFIC CHANGES REQUIRED:**
+{steps}
+
+**VALIDATION:** Confirm system limits and procedures use the updated values."""
+
+    return {
+        'quick_summary': quick,
+        'detailed_plan': detailed,
+        'source': 'rule-numeric',
+        'numeric_findings': findings
+    }
+
+
+if __name__ == "__main__":
+    # Regression checks: equal durations in months and years match, values
+    # are compared in the direction the regulation binds, and facts pair
+    # only by kind and unit
+    checks = [
+        ("Records must be kept for 5 years.", "Records are kept for 60 months.", 'match'),
+        ("Review must happen every 12 months.", "Reviews happen every 1 year.", 'match'),
+        ("Records must be kept for ten years.", "Records are kept for 5 years.", 'mismatch'),
+        ("Records must be kept for at least 5 years.", "Records are kept for 10 years.", 'stricter'),
+        ("Report within 7 days.", "Reports are filed within 1 week.", 'match'),
+        ("Report within 7 days.", "Reports are filed within 3 days.", 'stricter'),
+        ("Report within 7 days.", "Reports are filed within 10 days.", 'mismatch'),
+        ("Report within 7 days.", "Records are kept for 5 years.", 'not_stated'),
+        ("Transactions above INR 2,00,000 must be reported.", "We report above Rs. 2 lakh.", 'match'),
+        ("Transactions above INR 2,00,000 must be reported.", "We report above INR 1,00,000.", 'stricter'),
+        ("Transactions above INR 2,00,000 must be reported.", "We report above INR 5,00,000.", 'mismatch'),
+        ("Cash withdrawals are capped at INR 50,000.", "Withdrawals up to INR 75,000 are allowed.", 'mismatch'),
+        ("The fee is 2%.", "The fee is 1%.", 'mismatch'),
+    ]
+    for requirement, control, expected in checks:
+        status = compare_numeric_facts(requirement, control)[0]['status']
+        assert status == expected, (requirement, control, status)
+    assert numeric_recommendation("Keep records for 5 years.", "Records are kept for 60 months.") is None
+    assert numeric_recommendation("Keep records for at least 5 years.", "Records are kept for 10 years.") is None
+    print(f"✅ {len(checks)} numeric comparisons as expected")
@@ -1,45 +1,52 @@
 """
 PDF Text Extraction Utility with Page Tracking
 """
-import PyPDF2
 import re
+from utils.profiling import profiled
 
 
-def extract_text_from_pdf(pdf_file, track_pages=True) -> dict:
+@profiled('extract_text_from_pdf')
+def extract_text_from_pdf(pdf_file, track_pages=True, cancelled=None) -> dict:
     """
     Extract text from PDF file with page tracking
     
     Args:
         pdf_file: File object (from st.file_uploader or open())
         track_pages: If True, returns dict with page info
+        cancelled: Optional callable checked before each page; extraction
+            stops and returns None once it returns True
     
     Returns:
         If track_pages=True: {'text': str, 'pages': list of {page_num, text}}
         If track_pages=False: str (just text)
     """
+    import PyPDF2
+    
     try:
         # Handle both file paths and file objects
         if isinstance(pdf_file, str):
             # File path
             with open(pdf_file, 'rb') as f:
                 pdf_reader = PyPDF2.PdfReader(f)
-                return _extract_pages(pdf_reader, track_pages)
+                return _extract_pages(pdf_reader, track_pages, cancelled)
         else:
             # File object from Streamlit
             pdf_reader = PyPDF2.PdfReader(pdf_file)
-            return _extract_pages(pdf_reader, track_pages)
+            return _extract_pages(pdf_reader, track_pages, cancelled)
     
     except Exception as e:
         raise Exception(f"Failed to extract text from PDF: {e}")
 
 
-def _extract_pages(pdf_reader, track_pages):
+def _extract_pages(pdf_reader, track_pages, cancelled=None):
     """Internal function to extract pages"""
     if track_pages:
         pages_data = []
         full_text = ""
         
         for page_num, page in enumerate(pdf_reader.pages, start=1):
+            if cancelled is not None and cancelled():
+                return None
             page_text = page.extract_text()
             pages_data.append({
                 'page_num': page_num,
@@ -57,6 +64,8 @@ def _extract_pages(pdf_reader, track_pages):
     else:
         text = ""
         for page in pdf_reader.pages:
+            if cancelled is not None and cancelled():
+                return None
             text += page.extract_text() + "\n"
         return text.strip()
 
@@ -0,0 +1,175 @@
+"""
+Upload-Time Document Prefetch
+
+As soon as a regulation or policy is uploaded, a background worker
+extracts its text (PDF pages included) and its requirements, so clicking
+"Analyze Compliance" can start matching right away.
+
+Work is keyed by role and content hash: the same file uploaded again, or
+by another session, reuses the running or finished extraction. Replacing
+a file releases the old key; once no session holds it, queued work is
+cancelled and running PDF extraction stops at the next page. Finished
+results are kept for the most recently used documents.
+
+Configuration:
+
+    REGULENS_PREFETCH_WORKERS   Background extraction threads (default 2)
+"""
+import os
+import io
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Document names given to extracted records, as in
+# EnhancedComplianceAgent.analyze_regulation / analyze_policy
+DOCUMENT_NAMES = {'regulation': 'Regulation', 'policy': 'Internal Policy'}
+
+# Finished extractions kept for reuse
+MAX_RESULTS = 8
+
+
+class PrefetchCancelled(Exception):
+    """Raised by result() for work that was cancelled before it finished"""
+
+
+def content_key(role: str, data: bytes) -> str:
+    """Prefetch key of a document: its role and the SHA-256 of its content"""
+    return f"{role}:{hashlib.sha256(data).hexdigest()}"
+
+
+def extract_document(role: str, name: str, data: bytes, cancelled=None) -> dict:
+    """
+    Text, pages and requirements of an uploaded document
+
+    Args:
+        role: 'regulation' or 'policy'
+        name: File name (decides PDF vs text)
+        data: File content
+        cancelled: Optional callable; extraction stops early once it returns True
+
+    Returns:
+        Dict with text, pages (None for text files), total_pages,
+        requirements and seconds; None when cancelled
+    """
+    from utils.pdf_extractor import extract_text_from_pdf, is_pdf
+    from utils.document_utils import extract_requirements
+
+    start = time.perf_counter()
+    if is_pdf(name):
+        result = extract_text_from_pdf(io.BytesIO(data), track_pages=True, cancelled=cancelled)
+        if result is None:
+            return None
+        text, pages, total_pages = result['text'], result['pages'], result['total_pages']
+    else:
+        text, pages, total_pages = data.decode('utf-8'), None, None
+
+    if cancelled is not None and cancelled():
+        return None
+    requirements = extract_requirements(text, pages_data=pages, document_name=DOCUMENT_NAMES[role])
+    return {
+        'text': text,
+        'pages': pages,
+        'total_pages': total_pages,
+        'requirements': requirements,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+class DocumentPrefetcher:
+    """Background extraction of uploaded documents, shared by every session"""
+
+    def __init__(self, workers: int = 2, max_results: int = MAX_RESULTS):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='regulens-prefetch')
+        self.max_results = max_results
+        self._entries = OrderedDict()  # key -> {'future', 'cancel', 'holders'}
+        self._lock = threading.Lock()
+
+    def submit(self, role: str, name: str, data: bytes) -> str:
+        """
+        Start (or join) the extraction of a document
+
+        Every submit() must be paired with a release() of the returned key.
+
+        Returns:
+            Prefetch key, for result() / status() / release()
+        """
+        key = content_key(role, data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['cancel'].is_set():
+                cancel = threading.Event()
+                entry = {
+                    'future': self.executor.submit(extract_document, role, name, data, cancel.is_set),
+                    'cancel': cancel,
+                    'holders': 0,
+                }
+                self._entries[key] = entry
+            entry['holders'] += 1
+            self._entries.move_to_end(key)
+            self._evict()
+        return key
+
+    def release(self, key: str):
+        """Drop one holder of a key; unfinished work nobody holds is cancelled"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['holders'] = max(0, entry['holders'] - 1)
+            if entry['holders'] == 0 and not entry['future'].done():
+                entry['cancel'].set()
+                entry['future'].cancel()
+                del self._entries[key]
+
+    def status(self, key: str) -> str:
+        """'queued', 'running', 'done', 'failed' or None for an unknown key"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        future = entry['future']
+        if not future.done():
+            return 'running' if future.running() else 'queued'
+        return 'failed' if future.cancelled() or future.exception() is not None else 'done'
+
+    def result(self, key: str, timeout: float = None) -> dict:
+        """
+        Extraction result, waiting for it if still running
+
+        Raises:
+            KeyError: Unknown (or evicted) key
+            PrefetchCancelled: The work was cancelled
+            Exception: Whatever the extraction raised
+        """
+        with self._lock:
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+        result = entry['future'].result(timeout)
+        if result is None:
+            raise PrefetchCancelled(key)
+        return result
+
+    def _evict(self):
+        # Least recently used finished results go first (a session that
+        # loses its result extracts again); running work is never evicted
+        finished = [k for k, e in self._entries.items() if e['future'].done()]
+        for key in finished[:max(0, len(self._entries) - self.max_results)]:
+            del self._entries[key]
+
+
+# Process-wide prefetcher shared by every session
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> DocumentPrefetcher:
+    """Shared prefetcher configured from the environment"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = DocumentPrefetcher(workers=int(os.getenv('REGULENS_PREFETCH_WORKERS', '2')))
+        return _prefetcher
@@ -0,0 +1,204 @@
+"""
+On-demand Profiling - cProfile, tracemalloc and stack-sample artifacts
+
+Off by default. Turn it on with any of:
+- REGULENS_PROFILE=1 environment variable
+- `python cli.py analyze --profile`
+- the "Profile this run" toggle in the app (per session)
+
+Each profiled call writes into its own run directory under
+REGULENS_PROFILE_DIR (default: .regulens/profiles):
+- <name>.pstats              raw cProfile data (load with pstats/snakeviz)
+- <name>.pstats.txt          top functions by cumulative time
+- <name>.allocations.txt     top allocation sites from tracemalloc
+- <name>.collapsed.txt       sampled stacks in collapsed format for
+                             flamegraph.pl / speedscope
+
+tracemalloc (and, on newer Pythons, cProfile) is process-wide, so only one
+run is profiled at a time; a run started while another is being profiled
+runs unprofiled.
+"""
+import os
+import io
+import sys
+import time
+import threading
+import functools
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+
+DEFAULT_PROFILE_DIR = os.path.join('.regulens', 'profiles')
+
+_state = threading.local()
+
+# Held by the one run being profiled in this process
+_profile_lock = threading.Lock()
+
+
+def enable_profiling(enabled: bool = True):
+    """Turn profiling on/off for the current thread (e.g. one Streamlit session)"""
+    _state.enabled = enabled
+
+
+def profiling_enabled() -> bool:
+    """Check the per-thread toggle, then the REGULENS_PROFILE env var"""
+    enabled = getattr(_state, 'enabled', None)
+    if enabled is not None:
+        return enabled
+    return os.getenv('REGULENS_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def last_profile_dir() -> str:
+    """Run directory written by the most recent profile in this thread"""
+    return getattr(_state, 'last_dir', None)
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's stack at a fixed interval for flamegraphs"""
+
+    def __init__(self, target_ident: int, interval: float = 0.005):
+        super().__init__(name="regulens-stack-sampler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+@contextmanager
+def profile_run(name: str, enabled: bool = None, output_dir: str = None):
+    """
+    Profile a block of code and write artifacts to a fresh run directory
+
+    Args:
+        name: Artifact name prefix, e.g. 'run_full_analysis'
+        enabled: Force on/off (default: profiling_enabled())
+        output_dir: Parent directory for run directories
+
+    Yields:
+        The run directory path, or None when profiling is off
+    """
+    if enabled is None:
+        enabled = profiling_enabled()
+
+    # Nested profiled calls are covered by the outer profile
+    if not enabled or getattr(_state, 'active', False):
+        yield None
+        return
+
+    if not _profile_lock.acquire(blocking=False):
+        print(f"   🔬 Another run is being profiled - {name} runs unprofiled")
+        yield None
+        return
+    try:
+        with _profiled_run(name, output_dir) as run_dir:
+            yield run_dir
+    finally:
+        _profile_lock.release()
+
+
+@contextmanager
+def _profiled_run(name: str, output_dir: str = None):
+    """Body of profile_run, entered with _profile_lock held"""
+    # Profilers are only imported when actually profiling
+    import cProfile
+
+    output_dir = output_dir or os.getenv('REGULENS_PROFILE_DIR', DEFAULT_PROFILE_DIR)
+    run_dir = os.path.join(output_dir, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{name}")
+    os.makedirs(run_dir, exist_ok=True)
+
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(25)
+    snapshot_before = tracemalloc.take_snapshot()
+
+    sampler = _StackSampler(threading.get_ident())
+    profiler = cProfile.Profile()
+
+    _state.active = True
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield run_dir
+    finally:
+        profiler.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - start
+        snapshot_after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _state.active = False
+
+        _write_artifacts(run_dir, name, profiler, sampler, snapshot_before, snapshot_after, elapsed, peak)
+        _state.last_dir = run_dir
+        print(f"   🔬 Profile for {name} written to {run_dir}")
+
+
+def _write_artifacts(run_dir, name, profiler, sampler, snapshot_before, snapshot_after, elapsed, peak):
+    """Write pstats, allocation and collapsed-stack reports"""
+    import pstats
+
+    base = os.path.join(run_dir, name)
+
+    profiler.dump_stats(f"{base}.pstats")
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(50)
+    with open(f"{base}.pstats.txt", 'w', encoding='utf-8') as f:
+        f.write(f"{name}: {elapsed:.3f}s wall\n\n")
+        f.write(buffer.getvalue())
+
+    # Exclude our own bookkeeping from the allocation report
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    snapshot_before = snapshot_before.filter_traces(filters)
+    snapshot_after = snapshot_after.filter_traces(filters)
+    with open(f"{base}.allocations.txt", 'w', encoding='utf-8') as f:
+        f.write(f"{name}: peak traced memory {peak / 1024 / 1024:.1f} MiB\n\n")
+        f.write("Top 30 allocation growth by line:\n")
+        for stat in snapshot_after.compare_to(snapshot_before, 'lineno')[:30]:
+            f.write(f"  {stat}\n")
+        f.write("\nTop 5 live allocation sites (traceback):\n")
+        for stat in snapshot_after.statistics('traceback')[:5]:
+            f.write(f"\n  {stat.count} blocks, {stat.size / 1024:.1f} KiB\n")
+            for line in stat.traceback.format():
+                f.write(f"    {line}\n")
+
+    with open(f"{base}.collapsed.txt", 'w', encoding='utf-8') as f:
+        for stack, count in sampler.samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def profiled(name: str = None):
+    """Decorator: profile each call when profiling is enabled"""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile_run(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
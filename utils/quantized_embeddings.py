@@ -0,0 +1,220 @@
+"""
+Quantized Embedding Matrices - compact offline storage
+
+Embeddings are L2-normalized once and kept in one of three forms:
+
+    float32   4 bytes per dimension (reference)
+    float16   2 bytes per dimension
+    int8      1 byte per dimension plus one float32 scale per vector
+              (symmetric per-vector quantization: v ~= scale * q, |q| <= 127)
+
+float16 and int8 are storage formats for embedding sets that are kept
+(save/load), where they cut the file and resident size by 2x and ~4x.
+They do not make scoring faster. The live matching path scores vectors
+it has just embedded, so it uses float32 (which quantization would only
+make less precise). score_error() measures the cosine error of a format
+against float32 on real vectors before it is chosen for a store.
+"""
+import os
+
+DTYPES = ('float32', 'float16', 'int8')
+
+# Rows converted to float32 per matrix product
+BLOCK_ROWS = 4096
+
+
+class QuantizedEmbeddings:
+    """L2-normalized embedding matrix in float32, float16 or int8 form"""
+
+    def __init__(self, vectors, dtype: str = 'float32'):
+        """
+        Args:
+            vectors: Embeddings (list of lists or array, one row per text)
+            dtype: Storage format, one of DTYPES
+        """
+        import numpy as np
+
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown embedding dtype: {dtype}")
+        self.dtype = dtype
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1) if vectors.size else vectors.reshape(0, 0)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        self.scales = None
+        if dtype == 'int8':
+            scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.zeros(0)
+            scales = np.where(scales == 0, 1, scales).astype(np.float32)
+            self.values = np.rint(vectors / scales[:, None]).astype(np.int8)
+            self.scales = scales
+        else:
+            self.values = vectors.astype(dtype)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the stored matrix (and scales)"""
+        return self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def rows(self, start: int = 0, stop: int = None):
+        """Dequantized float32 rows [start:stop]"""
+        block = self.codes(start, stop)
+        if self.scales is not None:
+            block *= self.scales[start:stop, None]
+        return block
+
+    def codes(self, start: int = 0, stop: int = None):
+        """
+        Stored values of rows [start:stop] as float32, without int8 scales
+
+        The conversion is exact, and so are sums of int8 x int8 products
+        in float32 up to 1040 dimensions (127 * 127 * 1040 < 2 ** 24).
+        A float32 BLAS product of int8 codes is therefore the int8 dot
+        product; numpy has no int8 or float16 matrix product of its own.
+        """
+        import numpy as np
+
+        return self.values[start:stop].astype(np.float32)
+
+    def _product(self, codes_a, scales_a, start_b: int, stop_b: int):
+        """Scores of converted rows (codes_a, scales_a) against rows [start_b:stop_b] of self"""
+        block = codes_a @ self.codes(start_b, stop_b).T
+        if self.scales is not None:
+            # Per-vector int8 scales are applied once per score, not per element
+            block *= scales_a[:, None]
+            block *= self.scales[start_b:stop_b][None, :]
+        return block
+
+    def take(self, indices) -> 'QuantizedEmbeddings':
+        """New matrix holding the given rows, in the same format (no requantization)"""
+        subset = QuantizedEmbeddings.__new__(QuantizedEmbeddings)
+        subset.dtype = self.dtype
+        subset.values = self.values[indices]
+        subset.scales = self.scales[indices] if self.scales is not None else None
+        return subset
+
+    def dot(self, other: 'QuantizedEmbeddings'):
+        """
+        Cosine similarity of every row of self to every row of other
+
+        Both matrices must use the same format. Products are computed on the
+        stored codes and int8 scales applied to the scores.
+
+        Returns:
+            numpy float32 array (len(self) x len(other)), values -1 to 1
+        """
+        import numpy as np
+
+        if self.dtype != other.dtype:
+            raise ValueError(f"Cannot score {self.dtype} against {other.dtype} embeddings")
+        scores = np.empty((len(self), len(other)), dtype=np.float32)
+        if not len(self) or not len(other):
+            return scores
+        for start_a in range(0, len(self), BLOCK_ROWS):
+            stop_a = start_a + BLOCK_ROWS
+            codes_a = self.codes(start_a, stop_a)
+            scales_a = self.scales[start_a:stop_a] if self.scales is not None else None
+            for start_b in range(0, len(other), BLOCK_ROWS):
+                scores[start_a:stop_a, start_b:start_b + BLOCK_ROWS] = other._product(
+                    codes_a, scales_a, start_b, start_b + BLOCK_ROWS
+                )
+        return scores
+
+    def top_k(self, queries: 'QuantizedEmbeddings', k: int = 5):
+        """
+        k most similar rows of self for every query, best first
+
+        Only one block of scores is materialized at a time, so searching a
+        large store needs memory for (queries x BLOCK_ROWS) scores. The
+        queries are converted once, not once per block.
+
+        Returns:
+            (indices, scores) - int array and float32 array, (len(queries) x k)
+        """
+        import numpy as np
+
+        if self.dtype != queries.dtype:
+            raise ValueError(f"Cannot score {queries.dtype} queries against {self.dtype} embeddings")
+        k = min(k, len(self))
+        query_codes = queries.codes()
+        best_indices = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = self._product(query_codes, queries.scales, start, start + BLOCK_ROWS)
+            block_indices = np.broadcast_to(np.arange(start, start + block.shape[1]), block.shape)
+            indices = np.concatenate([best_indices, block_indices], axis=1)
+            scores = np.concatenate([best_scores, block], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                indices = np.take_along_axis(indices, keep, axis=1)
+                scores = np.take_along_axis(scores, keep, axis=1)
+            best_indices, best_scores = indices, scores
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best_indices, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def save(self, path: str):
+        """Write the matrix as a .npz file"""
+        import numpy as np
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        arrays = {'values': self.values, 'dtype': np.array(self.dtype)}
+        if self.scales is not None:
+            arrays['scales'] = self.scales
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'QuantizedEmbeddings':
+        """Read a matrix written by save()"""
+        import numpy as np
+
+        with np.load(path) as data:
+            matrix = cls.__new__(cls)
+            matrix.dtype = str(data['dtype'])
+            matrix.values = data['values']
+            matrix.scales = data['scales'] if 'scales' in data else None
+        return matrix
+
+
+def score_error(vectors_a, vectors_b, dtype: str, k: int = 5) -> dict:
+    """
+    Cosine score error of a storage format against float32
+
+    Args:
+        vectors_a: Query embeddings (e.g. requirements)
+        vectors_b: Stored embeddings (e.g. policy controls)
+        dtype: Format to evaluate
+        k: Depth of the top-k overlap check
+
+    Returns:
+        Dict with max/mean absolute score error, the share of queries whose
+        best match is unchanged, the top-k overlap, and bytes per vector
+    """
+    import numpy as np
+
+    reference_a, reference_b = QuantizedEmbeddings(vectors_a), QuantizedEmbeddings(vectors_b)
+    quantized_a, quantized_b = QuantizedEmbeddings(vectors_a, dtype), QuantizedEmbeddings(vectors_b, dtype)
+
+    reference = reference_a.dot(reference_b)
+    scores = quantized_a.dot(quantized_b)
+    error = np.abs(scores - reference)
+
+    reference_top, _ = reference_b.top_k(reference_a, k)
+    quantized_top, _ = quantized_b.top_k(quantized_a, k)
+    overlap = np.mean([
+        len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(reference_top.tolist(), quantized_top.tolist())
+    ]) if len(reference_top) else 1.0
+
+    return {
+        'dtype': dtype,
+        'max_abs_error': float(error.max()) if error.size else 0.0,
+        'mean_abs_error': float(error.mean()) if error.size else 0.0,
+        'top1_agreement': float(np.mean(reference_top[:, 0] == quantized_top[:, 0])) if reference_top.size else 1.0,
+        f'top{k}_overlap': float(overlap),
+        'bytes_per_vector': quantized_b.nbytes / max(len(quantized_b), 1),
+    }
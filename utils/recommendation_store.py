@@ -0,0 +1,197 @@
+"""
+Recommendation Store - reuse generated recommendations for similar gaps
+
+Many gaps, within one report and across clients, are paraphrases of the
+same obligation (PAN collection, record retention, ...). AI-generated
+recommendations are stored with a hashed TF-IDF-style vector of their
+requirement (and, for PARTIAL gaps, of the matched control). A later gap
+with the same status whose texts are similar enough reuses the stored
+plan, with its page references updated, instead of calling the LLM.
+
+Similar text is not enough when the numbers differ: "5 years" and
+"8 years" vectorize alike (single digits are not tokens), but a plan
+quoting the wrong period or ₹ threshold is wrong advice. An entry is only
+reused when its requirement (and, for PARTIAL gaps, its control) states
+the same amounts, periods and percentages as the new gap.
+
+Configuration:
+
+    REGULENS_RECOMMENDATION_STORE   directory for the store (default
+                                    .regulens/recommendations), or "off"
+    REGULENS_REUSE_SIMILARITY       minimum cosine similarity (default 0.9)
+"""
+import os
+import json
+import threading
+
+from utils.numeric_facts import numeric_key
+
+DEFAULT_DIRECTORY = os.path.join('.regulens', 'recommendations')
+DEFAULT_SIMILARITY = 0.9
+
+
+class RecommendationStore:
+    """Similarity-indexed store of generated recommendations"""
+
+    def __init__(self, directory: str = None, min_similarity: float = DEFAULT_SIMILARITY):
+        """
+        Args:
+            directory: Where store.jsonl is kept; None keeps the store in memory
+            min_similarity: Minimum cosine similarity of the requirement (and
+                matched control, for PARTIAL gaps) to reuse a recommendation
+        """
+        self.path = os.path.join(directory, 'store.jsonl') if directory else None
+        self.min_similarity = min_similarity
+        self.entries = []
+        self._requirement_vectors = []
+        self._control_vectors = []
+        self._numeric_keys = []
+        self._matrix = None
+        self._vectorizer = None
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'hits': 0, 'stored': 0}
+
+        if self.path and os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def _vectorize(self, text: str):
+        # Stateless hashing vectorizer: no fitting, nothing to persist, and
+        # the same text maps to the same vector in every process
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+            self._vectorizer = HashingVectorizer(
+                n_features=2 ** 18, ngram_range=(1, 2), alternate_sign=False,
+                norm='l2', stop_words='english'
+            )
+        return self._vectorizer.transform([text or ''])
+
+    def _index(self, entry: dict):
+        self.entries.append(entry)
+        self._requirement_vectors.append(self._vectorize(entry['requirement_text']))
+        self._control_vectors.append(self._vectorize(entry.get('matched_control')))
+        self._numeric_keys.append((
+            numeric_key(entry['requirement_text']), numeric_key(entry.get('matched_control'))
+        ))
+        self._matrix = None
+
+    def lookup(self, gap_status: str, requirement_text: str, matched_control: str = None,
+               model: str = None, req_page: int = None, ctrl_page: int = None) -> dict:
+        """
+        Find a stored recommendation for a similar gap
+
+        Args:
+            gap_status: MISSING or PARTIAL (must match the stored gap)
+            requirement_text: Requirement of the new gap
+            matched_control: Matched control text (compared for PARTIAL gaps)
+            model: LLM backend name the recommendation must come from
+            req_page: Requirement page, substituted into the stored plan
+            ctrl_page: Control page, substituted into the stored plan
+
+        Returns:
+            Recommendation dict (source 'reused') or None
+        """
+        import scipy.sparse as sp
+
+        requirement_numbers = numeric_key(requirement_text)
+        control_numbers = numeric_key(matched_control) if gap_status == 'PARTIAL' else ()
+        with self._lock:
+            self.stats['lookups'] += 1
+            if not self.entries:
+                return None
+            if self._matrix is None:
+                self._matrix = sp.vstack(self._requirement_vectors).tocsr()
+            similarities = (self._matrix @ self._vectorize(requirement_text).T).toarray().ravel()
+
+            best_entry, best_similarity = None, self.min_similarity
+            for i in similarities.argsort()[::-1]:
+                if similarities[i] < best_similarity:
+                    break
+                entry = self.entries[i]
+                if entry['gap_status'] != gap_status or entry.get('model') != model:
+                    continue
+                # The stored plan quotes its own numbers
+                if self._numeric_keys[i] != (requirement_numbers, control_numbers):
+                    continue
+                if gap_status == 'PARTIAL':
+                    control_similarity = (
+                        self._control_vectors[i] @ self._vectorize(matched_control).T
+                    ).toarray()[0, 0]
+                    if control_similarity < self.min_similarity:
+                        continue
+                best_entry, best_similarity = entry, similarities[i]
+                break
+
+            if best_entry is None:
+                return None
+            self.stats['hits'] += 1
+
+        return {
+            'quick_summary': _update_pages(best_entry['quick_summary'], best_entry, req_page, ctrl_page),
+            'detailed_plan': _update_pages(best_entry['detailed_plan'], best_entry, req_page, ctrl_page),
+            'source': 'reused',
+            'similarity': round(float(best_similarity), 3)
+        }
+
+    def add(self, gap_status: str, requirement_text: str, recommendation: dict,
+            matched_control: str = None, model: str = None,
+            req_page: int = None, ctrl_page: int = None):
+        """Store a generated recommendation (persisted when the store has a directory)"""
+        entry = {
+            'gap_status': gap_status,
+            'requirement_text': requirement_text,
+            'matched_control': matched_control if gap_status == 'PARTIAL' else None,
+            'model': model,
+            'req_page': req_page,
+            'ctrl_page': ctrl_page,
+            'quick_summary': recommendation['quick_summary'],
+            'detailed_plan': recommendation['detailed_plan']
+        }
+        with self._lock:
+            self._index(entry)
+            self.stats['stored'] += 1
+            if self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self.entries))
+
+
+def _update_pages(text: str, entry: dict, req_page: int, ctrl_page: int) -> str:
+    """Point page references in a stored plan at the new gap's pages"""
+    if entry.get('req_page') and req_page and entry['req_page'] != req_page:
+        text = text.replace(f"Regulation page {entry['req_page']}", f"Regulation page {req_page}")
+    if entry.get('ctrl_page') and ctrl_page and entry['ctrl_page'] != ctrl_page:
+        text = text.replace(f"policy page {entry['ctrl_page']}", f"policy page {ctrl_page}")
+        text = text.replace(f"Page {entry['ctrl_page']},", f"Page {ctrl_page},")
+    return text
+
+
+# Process-wide store shared by every session (and, on disk, every run)
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_recommendation_store():
+    """
+    Shared store configured from the environment
+
+    Returns:
+        RecommendationStore, or None when REGULENS_RECOMMENDATION_STORE is "off"
+    """
+    global _store
+    directory = os.getenv('REGULENS_RECOMMENDATION_STORE', DEFAULT_DIRECTORY)
+    if directory.lower() in ('off', '0', 'false', 'none'):
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = RecommendationStore(
+                directory,
+                min_similarity=float(os.getenv('REGULENS_REUSE_SIMILARITY', DEFAULT_SIMILARITY))
+            )
+        return _store
@@ -0,0 +1,293 @@
+"""
+Compact Record Types for Requirements, Controls and Gaps
+
+Requirement and Gap are slotted records: no per-instance __dict__ and no
+repeated string keys, with categorical fields (status, risk, criticality,
+method, source) interned so every record shares the same string objects.
+They are read-only Mappings, so existing code using `req['text']`,
+`gap.get('page_number')`, `pd.DataFrame(gaps)` or `dict(gap)` keeps working.
+
+GapTable is a columnar view of a report's gaps for the dashboard: status
+and risk are small integer codes, the sort orders are computed once and
+requirement text gets a word index on the first search, so filtering,
+searching, sorting and paging on every Streamlit rerun is a vectorized
+mask instead of re-sorting a list of dicts.
+"""
+import re
+import sys
+from collections.abc import Mapping
+
+STATUSES = ('MISSING', 'PARTIAL', 'COMPLIANT')
+RISK_LEVELS = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _Record(Mapping):
+    """Slotted, read-only mapping over a fixed set of fields"""
+
+    __slots__ = ()
+    _fields = ()
+    _categorical = ()
+
+    def __init__(self, **values):
+        for field in self._fields:
+            value = values.pop(field, None)
+            if field in self._categorical:
+                value = _intern(value)
+            object.__setattr__(self, field, value)
+        if values:
+            raise TypeError(f"Unknown {type(self).__name__} fields: {', '.join(values)}")
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Build a record from a dict (or another record), ignoring unknown keys"""
+        if isinstance(data, cls):
+            return data
+        return cls(**{field: data.get(field) for field in cls._fields})
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only; use replace()")
+
+    def replace(self, **changes):
+        """Copy of the record with some fields changed"""
+        values = {field: getattr(self, field) for field in self._fields}
+        values.update(changes)
+        return type(self)(**values)
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self._fields}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (_rebuild, (type(self), self.to_dict()))
+
+
+def _rebuild(cls, values):
+    return cls(**values)
+
+
+class Requirement(_Record):
+    """A requirement (regulation) or control (policy) extracted from a document"""
+
+    _fields = ('id', 'text', 'criticality', 'keywords', 'section', 'page_number', 'document_name')
+    _categorical = ('criticality', 'section', 'document_name')
+    __slots__ = _fields
+
+
+class Gap(_Record):
+    """Result of mapping one requirement to its best matching control"""
+
+    _fields = (
+        'requirement_id', 'requirement_text', 'requirement_criticality',
+        'matched_control', 'match_score', 'gap_status', 'risk_level',
+        'quick_summary', 'detailed_plan', 'recommendation_source', 'matching_method',
+        'supporting_controls', 'duplicate_of'
+    )
+    _categorical = (
+        'requirement_criticality', 'gap_status', 'risk_level',
+        'recommendation_source', 'matching_method'
+    )
+    __slots__ = _fields
+
+
+def json_default(obj):
+    """`default=` hook for json.dump so reports containing records serialize"""
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    return str(obj)
+
+
+class GapTable:
+    """
+    Columnar, read-only view of a report's gaps
+
+    Build it once per report (e.g. cached in st.session_state), then call
+    select() on every rerun.
+    """
+
+    SORT_KEYS = ('Risk Level', 'Match Score', 'Requirement ID')
+
+    def __init__(self, gaps: list):
+        """
+        Args:
+            gaps: Gap records or gap dicts, in report order
+        """
+        import numpy as np
+
+        self.gaps = [Gap.from_dict(g) for g in gaps]
+        status_index = {s: i for i, s in enumerate(STATUSES)}
+        risk_index = {r: i for i, r in enumerate(RISK_LEVELS)}
+
+        self.status = np.fromiter(
+            (status_index.get(g.gap_status, len(STATUSES)) for g in self.gaps),
+            dtype=np.int8, count=len(self.gaps)
+        )
+        self.risk = np.fromiter(
+            (risk_index.get(g.risk_level, len(RISK_LEVELS)) for g in self.gaps),
+            dtype=np.int8, count=len(self.gaps)
+        )
+        self.match_score = np.fromiter(
+            (g.match_score or 0.0 for g in self.gaps),
+            dtype=np.float32, count=len(self.gaps)
+        )
+
+        # Stable sorts, so ties keep report (requirement) order
+        self._orders = {
+            'Risk Level': np.argsort(self.risk, kind='stable'),
+            'Match Score': np.argsort(self.match_score, kind='stable'),
+            'Requirement ID': np.arange(len(self.gaps)),
+        }
+        self._words = None
+        self._word_rows = None
+
+    def __len__(self):
+        return len(self.gaps)
+
+    def __getitem__(self, index: int) -> Gap:
+        return self.gaps[index]
+
+    def select(self, statuses=STATUSES, sort_by: str = 'Requirement ID',
+               risks=RISK_LEVELS, search: str = None):
+        """
+        Row indices with one of `statuses` and `risks`, in `sort_by` order
+
+        Args:
+            statuses: Gap statuses to keep
+            sort_by: One of SORT_KEYS
+            risks: Risk levels to keep
+            search: Words that must all start a word of the requirement text
+
+        Returns:
+            numpy array of row indices
+        """
+        import numpy as np
+
+        codes = [STATUSES.index(s) for s in statuses if s in STATUSES]
+        risk_codes = [RISK_LEVELS.index(r) for r in risks if r in RISK_LEVELS]
+        order = self._orders[sort_by]
+        keep = np.isin(self.status, codes) & np.isin(self.risk, risk_codes)
+        if search and search.strip():
+            keep &= self._search_mask(search)
+        return order[keep[order]]
+
+    def _search_mask(self, search: str):
+        """Rows whose requirement text has a word starting with every search word"""
+        import numpy as np
+
+        if self._words is None:
+            # Sorted vocabulary with the rows of each word, built on first search
+            index = {}
+            for row, gap in enumerate(self.gaps):
+                for word in set(re.findall(r'\w+', (gap.requirement_text or '').lower())):
+                    index.setdefault(word, []).append(row)
+            self._words = np.array(sorted(index), dtype=str)
+            self._word_rows = [np.array(index[word], dtype=np.int64) for word in self._words]
+
+        mask = np.ones(len(self.gaps), dtype=bool)
+        for term in re.findall(r'\w+', search.lower()):
+            # Words with `term` as prefix form one contiguous range of the vocabulary
+            start = np.searchsorted(self._words, term, side='left')
+            stop = np.searchsorted(self._words, term + '\U0010ffff', side='left')
+            term_mask = np.zeros(len(self.gaps), dtype=bool)
+            for rows in self._word_rows[start:stop]:
+                term_mask[rows] = True
+            mask &= term_mask
+        return mask
+
+    def rows(self, indices) -> list:
+        """Gap records for the given row indices"""
+        return [self.gaps[i] for i in indices]
+
+    def texts(self, index: int) -> dict:
+        """Quick summary and detailed plan of one gap"""
+        gap = self.gaps[index]
+        return {'quick_summary': gap.quick_summary, 'detailed_plan': gap.detailed_plan}
+
+    def iter_chunks(self, chunk_size: int = 1000):
+        """Gap records in report order, `chunk_size` at a time (for streaming export)"""
+        for start in range(0, len(self.gaps), chunk_size):
+            yield self.gaps[start:start + chunk_size]
+
+    def statuses(self) -> list:
+        """Gap status of every gap, in report order"""
+        return [gap.gap_status for gap in self.gaps]
+
+
+class MatchCandidates:
+    """
+    Per-requirement top-k matching controls from a run's score matrix
+
+    Kept so gaps can be reclassified under new thresholds without scoring
+    (or calling any AI service) again.
+    """
+
+    def __init__(self, top_indices, top_scores, methods: list):
+        """
+        Args:
+            top_indices: int array (requirements x k) of control indices,
+                best first; -1 where there are fewer than k controls
+            top_scores: float array (requirements x k) of matching scores
+            methods: Matching method per requirement ('vertex-ai', 'lsa' or 'tfidf')
+        """
+        self.top_indices = top_indices
+        self.top_scores = top_scores
+        self.methods = [_intern(m) for m in methods]
+
+    @classmethod
+    def from_matrix(cls, scores, methods: list, k: int = 5) -> 'MatchCandidates':
+        """
+        Keep the k best controls of each row of a requirements x controls matrix
+
+        Uses argpartition, so picking the candidates is O(controls) per row
+        and only the k survivors are sorted (best first, ties by control order).
+        """
+        import numpy as np
+
+        scores = np.asarray(scores, dtype=np.float32)
+        k = min(k, scores.shape[1])
+        if 0 < k < scores.shape[1]:
+            order = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            order = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_scores = np.take_along_axis(scores, order, axis=1)
+        ranking = np.lexsort((order, -top_scores), axis=1) if k else order
+        order = np.take_along_axis(order, ranking, axis=1)
+        top_scores = np.take_along_axis(top_scores, ranking, axis=1)
+        if k == 0:
+            order = np.full((len(methods), 1), -1)
+            top_scores = np.zeros((len(methods), 1), dtype=np.float32)
+        return cls(order.astype(np.int32), top_scores, methods)
+
+    def __len__(self):
+        return len(self.methods)
+
+    def best(self, row: int):
+        """(control index or None, score, method) of a requirement's best match"""
+        index = int(self.top_indices[row, 0])
+        score = float(self.top_scores[row, 0])
+        # No overlap at all counts as no match
+        if index < 0 or score <= 0:
+            return None, 0.0, self.methods[row]
+        return index, score, self.methods[row]
+
+    def top(self, row: int, k: int):
+        """(control indices, scores) of a requirement's k best matches, best first"""
+        indices = self.top_indices[row, :k]
+        keep = (indices >= 0) & (self.top_scores[row, :k] > 0)
+        return indices[keep].tolist(), self.top_scores[row, :k][keep].tolist()
@@ -0,0 +1,451 @@
+"""
+Run Store - SQLite history of analysis runs
+
+Every finished analysis is saved as:
+
+    runs        one row per run: summary numbers, executive summary and the
+                rest of the report (JSON) except its gaps
+    gaps        one row per gap, indexed by (run, status, risk), (run, score)
+                and requirement hash, without the long recommendation text
+    gap_texts   quick summary and detailed plan per gap, read only when a
+                gap is displayed
+    gap_search  FTS5 index of requirement text (prefix search), when the
+                SQLite build has FTS5
+
+The dashboard keeps just a run ID and a StoredGapTable per session, so
+filtering and sorting run in SQL and past runs survive restarts, can be
+reopened, compared and plotted as a score trend.
+
+Configuration:
+
+    REGULENS_RUN_STORE   database file (default .regulens/runs.sqlite3), or "off"
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+from utils.records import Gap, STATUSES, RISK_LEVELS, json_default
+
+DEFAULT_PATH = os.path.join('.regulens', 'runs.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    label TEXT,
+    regulation_name TEXT,
+    policy_name TEXT,
+    compliance_score REAL,
+    total_requirements INTEGER,
+    compliant INTEGER,
+    partial INTEGER,
+    missing INTEGER,
+    critical_risks INTEGER,
+    high_risks INTEGER,
+    matching_engine TEXT,
+    report_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at);
+
+CREATE TABLE IF NOT EXISTS gaps (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    requirement_id TEXT,
+    requirement_hash TEXT,
+    requirement_text TEXT,
+    requirement_criticality TEXT,
+    matched_control TEXT,
+    supporting_controls TEXT,
+    match_score REAL,
+    gap_status TEXT,
+    status_code INTEGER,
+    risk_level TEXT,
+    risk_code INTEGER,
+    recommendation_source TEXT,
+    matching_method TEXT,
+    duplicate_of TEXT,
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS gaps_status_risk ON gaps (run_id, status_code, risk_code, position);
+CREATE INDEX IF NOT EXISTS gaps_score ON gaps (run_id, match_score, position);
+CREATE INDEX IF NOT EXISTS gaps_requirement ON gaps (requirement_hash, run_id);
+
+CREATE TABLE IF NOT EXISTS gap_texts (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    quick_summary TEXT,
+    detailed_plan TEXT,
+    PRIMARY KEY (run_id, position)
+);
+"""
+
+# Gap fields stored in the gaps table (everything but the long texts)
+_GAP_COLUMNS = (
+    'requirement_id', 'requirement_text', 'requirement_criticality', 'matched_control',
+    'supporting_controls', 'match_score', 'gap_status', 'risk_level',
+    'recommendation_source', 'matching_method', 'duplicate_of'
+)
+
+_ORDER_BY = {
+    'Risk Level': 'risk_code, position',
+    'Match Score': 'match_score, position',
+    'Requirement ID': 'position',
+}
+
+
+def requirement_hash(text: str) -> str:
+    """Stable key of a requirement's text, ignoring case and whitespace"""
+    normalized = re.sub(r'\s+', ' ', (text or '').strip().lower())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+class RunStore:
+    """SQLite-backed history of analysis runs"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        """
+        Args:
+            path: Database file (created with its directory if missing)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS gap_search "
+                    "USING fts5(run_id UNINDEXED, position UNINDEXED, requirement_text)"
+                )
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # No FTS5 in this SQLite build: search falls back to LIKE
+                self.full_text = False
+            if self.full_text:
+                # Index runs saved before the search table existed
+                conn.execute(
+                    """INSERT INTO gap_search (run_id, position, requirement_text)
+                       SELECT run_id, position, requirement_text FROM gaps
+                       WHERE run_id NOT IN (SELECT DISTINCT run_id FROM gap_search)"""
+                )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call: Streamlit reruns each session
+        # on its own thread, and sqlite3 connections are per-thread
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys=ON')
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_run(self, report: dict, regulation_name: str = None, policy_name: str = None,
+                 label: str = None) -> int:
+        """
+        Store a report
+
+        Args:
+            report: Report from run_full_analysis() or reclassify()
+            regulation_name: Regulation document name, for the history list
+            policy_name: Policy document name, for the history list
+            label: Optional note (e.g. "Reclassified from run 3")
+
+        Returns:
+            The new run ID
+        """
+        summary = report['summary']
+        rest = {key: value for key, value in report.items() if key != 'all_gaps'}
+        status_index = {s: i for i, s in enumerate(STATUSES)}
+        risk_index = {r: i for i, r in enumerate(RISK_LEVELS)}
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """INSERT INTO runs (created_at, label, regulation_name, policy_name, compliance_score,
+                                     total_requirements, compliant, partial, missing, critical_risks,
+                                     high_risks, matching_engine, report_json)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    datetime.now().isoformat(timespec='seconds'), label, regulation_name, policy_name,
+                    summary['compliance_score'], summary['total_requirements'], summary['compliant'],
+                    summary['partial'], summary['missing'], summary['critical_risks'],
+                    summary['high_risks'], (report.get('technology_used') or {}).get('matching_engine'),
+                    json.dumps(rest, ensure_ascii=False, default=json_default)
+                )
+            )
+            run_id = cursor.lastrowid
+            conn.executemany(
+                f"""INSERT INTO gaps (run_id, position, requirement_hash, status_code, risk_code,
+                                      {', '.join(_GAP_COLUMNS)})
+                    VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(_GAP_COLUMNS))})""",
+                [
+                    (
+                        run_id, position, requirement_hash(gap['requirement_text']),
+                        status_index.get(gap['gap_status'], len(STATUSES)),
+                        risk_index.get(gap['risk_level'], len(RISK_LEVELS)),
+                        *(
+                            json.dumps(gap.get(column) or []) if column == 'supporting_controls'
+                            else gap.get(column)
+                            for column in _GAP_COLUMNS
+                        )
+                    )
+                    for position, gap in enumerate(report['all_gaps'])
+                ]
+            )
+            conn.executemany(
+                "INSERT INTO gap_texts (run_id, position, quick_summary, detailed_plan) VALUES (?, ?, ?, ?)",
+                [
+                    (run_id, position, gap.get('quick_summary'), gap.get('detailed_plan'))
+                    for position, gap in enumerate(report['all_gaps'])
+                ]
+            )
+            if self.full_text:
+                conn.execute(
+                    """INSERT INTO gap_search (run_id, position, requirement_text)
+                       SELECT run_id, position, requirement_text FROM gaps WHERE run_id = ?""",
+                    (run_id,)
+                )
+        return run_id
+
+    def list_runs(self, limit: int = 50) -> list:
+        """Summary rows of the most recent runs, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT run_id, created_at, label, regulation_name, policy_name, compliance_score,
+                          total_requirements, compliant, partial, missing, critical_risks,
+                          high_risks, matching_engine
+                   FROM runs ORDER BY run_id DESC LIMIT ?""",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_report(self, run_id: int, with_gaps: bool = False) -> dict:
+        """
+        A stored report
+
+        Args:
+            run_id: Run to load
+            with_gaps: Include 'all_gaps' with their recommendation texts
+                (needed e.g. to reclassify); otherwise the report holds
+                everything but its gaps
+
+        Returns:
+            Report dict, or None for an unknown run
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT report_json FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            report = json.loads(row['report_json'])
+            if with_gaps:
+                rows = conn.execute(
+                    f"""SELECT {', '.join('g.' + c for c in _GAP_COLUMNS)}, t.quick_summary, t.detailed_plan
+                        FROM gaps g JOIN gap_texts t USING (run_id, position)
+                        WHERE g.run_id = ? ORDER BY g.position""",
+                    (run_id,)
+                ).fetchall()
+                report['all_gaps'] = [_gap(row) for row in rows]
+        return report
+
+    def compare_runs(self, old_run_id: int, new_run_id: int) -> list:
+        """
+        Requirements whose status differs between two runs
+
+        Requirements are matched by text (requirement_hash) and, for text
+        that appears more than once, by occurrence in document order, so
+        runs of different document versions compare clause by clause.
+
+        Returns:
+            List of dicts: requirement_id, requirement_text, old_status and
+            new_status (None when the requirement is absent from that run)
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """WITH o AS (
+                       SELECT *, ROW_NUMBER() OVER (PARTITION BY requirement_hash ORDER BY position) AS occurrence
+                       FROM gaps WHERE run_id = :old
+                   ), n AS (
+                       SELECT *, ROW_NUMBER() OVER (PARTITION BY requirement_hash ORDER BY position) AS occurrence
+                       FROM gaps WHERE run_id = :new
+                   )
+                   SELECT n.requirement_id, n.requirement_text, o.gap_status AS old_status,
+                          n.gap_status AS new_status, n.position
+                   FROM n
+                   LEFT JOIN o ON o.requirement_hash = n.requirement_hash AND o.occurrence = n.occurrence
+                   WHERE n.gap_status IS NOT o.gap_status
+                   UNION ALL
+                   SELECT o.requirement_id, o.requirement_text, o.gap_status, NULL, o.position
+                   FROM o
+                   WHERE NOT EXISTS (
+                       SELECT 1 FROM n WHERE n.requirement_hash = o.requirement_hash AND n.occurrence = o.occurrence
+                   )
+                   ORDER BY position""",
+                {'old': old_run_id, 'new': new_run_id}
+            ).fetchall()
+        return [
+            {key: row[key] for key in ('requirement_id', 'requirement_text', 'old_status', 'new_status')}
+            for row in rows
+        ]
+
+    # Gap queries used by StoredGapTable
+
+    def select_positions(self, run_id: int, statuses=STATUSES, sort_by: str = 'Requirement ID',
+                         risks=RISK_LEVELS, search: str = None) -> list:
+        codes = [STATUSES.index(s) for s in statuses if s in STATUSES]
+        risk_codes = [RISK_LEVELS.index(r) for r in risks if r in RISK_LEVELS]
+        where = [
+            'run_id = ?',
+            f"status_code IN ({', '.join('?' * len(codes))})",
+            f"risk_code IN ({', '.join('?' * len(risk_codes))})",
+        ]
+        params = [run_id, *codes, *risk_codes]
+
+        terms = re.findall(r'\w+', (search or '').lower())
+        if terms and self.full_text:
+            # Every word must start a word of the requirement text
+            where.append(
+                "position IN (SELECT position FROM gap_search WHERE gap_search MATCH ? AND run_id = ?)"
+            )
+            params += [' AND '.join(f'"{term}"*' for term in terms), run_id]
+        else:
+            for term in terms:
+                where.append("requirement_text LIKE ?")
+                params.append(f'%{term}%')
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT position FROM gaps WHERE {' AND '.join(where)} ORDER BY {_ORDER_BY[sort_by]}",
+                params
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def gap_rows(self, run_id: int, positions: list) -> list:
+        """Gap records (without recommendation texts), in the order of positions"""
+        positions = [int(p) for p in positions]
+        if not positions:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""SELECT position, {', '.join(_GAP_COLUMNS)} FROM gaps
+                    WHERE run_id = ? AND position IN ({', '.join('?' * len(positions))})""",
+                (run_id, *positions)
+            ).fetchall()
+        by_position = {row['position']: _gap(row) for row in rows}
+        return [by_position[p] for p in positions if p in by_position]
+
+    def gap_texts(self, run_id: int, position: int) -> dict:
+        """Quick summary and detailed plan of one gap"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT quick_summary, detailed_plan FROM gap_texts WHERE run_id = ? AND position = ?",
+                (run_id, int(position))
+            ).fetchone()
+        return dict(row) if row else {'quick_summary': None, 'detailed_plan': None}
+
+    def gap_statuses(self, run_id: int) -> list:
+        """Gap status of every gap of a run, in report order"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT gap_status FROM gaps WHERE run_id = ? ORDER BY position", (run_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_gaps(self, run_id: int, chunk_size: int = 1000):
+        """
+        Gap records of a run with their recommendation texts, in report
+        order, `chunk_size` at a time (one cursor, so only one chunk is in
+        memory)
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"""SELECT {', '.join('g.' + c for c in _GAP_COLUMNS)}, t.quick_summary, t.detailed_plan
+                    FROM gaps g JOIN gap_texts t USING (run_id, position)
+                    WHERE g.run_id = ? ORDER BY g.position""",
+                (run_id,)
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [_gap(row) for row in rows]
+
+    def gap_count(self, run_id: int) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM gaps WHERE run_id = ?", (run_id,)).fetchone()[0]
+
+
+def _gap(row) -> Gap:
+    values = {column: row[column] for column in row.keys() if column in Gap._fields}
+    values['supporting_controls'] = json.loads(values.get('supporting_controls') or '[]')
+    return Gap(**values)
+
+
+class StoredGapTable:
+    """
+    GapTable interface over one stored run
+
+    Filtering and sorting run in SQL; rows come without their
+    recommendation texts, which texts() loads one gap at a time.
+    """
+
+    SORT_KEYS = ('Risk Level', 'Match Score', 'Requirement ID')
+
+    def __init__(self, store: RunStore, run_id: int):
+        self.store = store
+        self.run_id = run_id
+        self._len = store.gap_count(run_id)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index: int) -> Gap:
+        return self.store.gap_rows(self.run_id, [index])[0]
+
+    def select(self, statuses=STATUSES, sort_by: str = 'Requirement ID',
+               risks=RISK_LEVELS, search: str = None):
+        """Row positions matching the filters, in `sort_by` order (see GapTable.select)"""
+        import numpy as np
+
+        positions = self.store.select_positions(self.run_id, statuses, sort_by, risks, search)
+        return np.array(positions, dtype=np.int64)
+
+    def rows(self, indices) -> list:
+        return self.store.gap_rows(self.run_id, list(indices))
+
+    def texts(self, index: int) -> dict:
+        return self.store.gap_texts(self.run_id, index)
+
+    def iter_chunks(self, chunk_size: int = 1000):
+        return self.store.iter_gaps(self.run_id, chunk_size)
+
+    def statuses(self) -> list:
+        return self.store.gap_statuses(self.run_id)
+
+
+# Process-wide store shared by every session
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_run_store():
+    """
+    Shared run store configured from the environment
+
+    Returns:
+        RunStore, or None when REGULENS_RUN_STORE is "off"
+    """
+    global _store
+    path = os.getenv('REGULENS_RUN_STORE', DEFAULT_PATH)
+    if path.lower() in ('off', '0', 'false', 'none'):
+        return None
+    with _store_lock:
+        if _store is None or _store.path != path:
+            _store = RunStore(path)
+        return _store
@@ -0,0 +1,481 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+"""
+ReguLens - watch-folder daemon
+
+Watches a regulation directory and a policy directory and re-analyzes
+every affected regulation x policy pair when documents are added or
+changed, so new regulation versions and updated client policies are
+picked up without anyone re-running them by hand.
+
+    - Directories are polled (portable, works on network shares). A file is
+      picked up once its size and modification time have been unchanged
+      for the debounce period, so bursts of writes and copies in progress
+      trigger one analysis.
+    - Pairs are keyed by the SHA-256 of both documents. A SQLite work ledger
+      records every pair's status, so a restart skips pairs already
+      analyzed and re-runs ones that were interrupted or failed (up to
+      --max-attempts).
+    - Analyses run in a bounded pool of worker processes, each holding one
+      pre-warmed agent. At most --workers analyses (and AI calls from them)
+      run at once; further pairs wait in the daemon's queue, deduplicated.
+    - Each report is written to <output-dir>/<regulation>__<policy>.json,
+      named from the documents' paths relative to the watched directories
+      (replaced atomically), and saved to the run store when enabled.
+
+Usage:
+    python watcher.py --regulations regs/ --policies policies/ [--output-dir reports/]
+                      [--workers 2] [--poll-interval 5] [--debounce 10] [--once]
+    python cli.py watch ...
+"""
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+DOCUMENT_EXTENSIONS = ('.txt', '.pdf')
+DEFAULT_OUTPUT_DIR = os.path.join('.regulens', 'watch', 'reports')
+DEFAULT_LEDGER = os.path.join('.regulens', 'watch', 'ledger.sqlite3')
+
+
+# ---------------------------------------------------------------- workers
+
+_agent = None
+
+
+def _init_worker():
+    """Build the worker's agent and import the heavy libraries up front"""
+    global _agent
+    from agents.enhanced_agent import EnhancedComplianceAgent
+    from utils.document_utils import calculate_similarity
+
+    _agent = EnhancedComplianceAgent()
+    calculate_similarity('warm up', 'warm up')
+
+
+def _analyze_pair(job: dict) -> str:
+    """
+    Worker: analyze one regulation/policy pair
+
+    Returns:
+        Report JSON
+    """
+    from utils.prefetch import extract_document
+    from utils.records import json_default
+
+    regulation = extract_document('regulation', job['regulation_path'], job['regulation'])
+    policy = extract_document('policy', job['policy_path'], job['policy'])
+    report = _agent.run_full_analysis(
+        regulation['text'],
+        policy['text'],
+        reg_pages_data=regulation['pages'],
+        policy_pages_data=policy['pages'],
+        deadline_seconds=job.get('deadline_seconds'),
+        reg_requirements=regulation['requirements'],
+        policy_controls=policy['requirements']
+    )
+    return json.dumps(report, ensure_ascii=False, default=json_default)
+
+
+# ---------------------------------------------------------------- ledger
+
+_LEDGER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_key         TEXT PRIMARY KEY,
+    regulation_path TEXT NOT NULL,
+    policy_path     TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    report_path     TEXT,
+    run_id          INTEGER,
+    error           TEXT,
+    started_at      TEXT,
+    finished_at     TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+
+class WorkLedger:
+    """
+    SQLite record of every analyzed pair, keyed by both documents' hashes
+
+    Statuses: running, done, failed. A job found 'running' at start-up was
+    interrupted (or crashed the daemon) and is run again, counting towards
+    the same attempt limit as failures.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_LEDGER_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, job_key: str) -> dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_key = ?", (job_key,)).fetchone()
+        return dict(row) if row else None
+
+    def start(self, job_key: str, regulation_path: str, policy_path: str):
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO jobs (job_key, regulation_path, policy_path, status, attempts, started_at)
+                   VALUES (?, ?, ?, 'running', 1, ?)
+                   ON CONFLICT (job_key) DO UPDATE SET
+                       status = 'running', attempts = attempts + 1, error = NULL,
+                       regulation_path = excluded.regulation_path,
+                       policy_path = excluded.policy_path,
+                       started_at = excluded.started_at""",
+                (job_key, regulation_path, policy_path, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def finish(self, job_key: str, report_path: str, run_id: int = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', report_path = ?, run_id = ?, finished_at = ? WHERE job_key = ?",
+                (report_path, run_id, datetime.now().isoformat(timespec='seconds'), job_key)
+            )
+
+    def fail(self, job_key: str, error: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE job_key = ?",
+                (error, datetime.now().isoformat(timespec='seconds'), job_key)
+            )
+
+    def counts(self) -> dict:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {row[0]: row[1] for row in rows}
+
+
+# ---------------------------------------------------------------- scanning
+
+class FolderScanner:
+    """Polls a directory and reports documents that changed and then stayed unchanged"""
+
+    def __init__(self, directory: str, debounce: float = 10.0):
+        self.directory = directory
+        self.debounce = debounce
+        self._seen = {}      # path -> ((mtime_ns, size), time that signature was first seen)
+        self._hashes = {}    # path -> content hash last reported
+
+    def _signatures(self) -> dict:
+        signatures = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.lower().endswith(DOCUMENT_EXTENSIONS) or name.startswith(('.', '~')):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # removed while scanning
+                signatures[path] = ((stat.st_mtime_ns, stat.st_size), stat.st_mtime)
+        return signatures
+
+    def poll(self) -> dict:
+        """
+        Documents whose content changed since the last report
+
+        Returns:
+            Dict path -> (sha256, content) for documents that are new or
+            changed and have been stable for the debounce period
+        """
+        now = time.time()
+        signatures = self._signatures()
+        for path in set(self._seen) - set(signatures):
+            del self._seen[path]
+            self._hashes.pop(path, None)
+
+        ready = {}
+        for path, (signature, mtime) in signatures.items():
+            previous = self._seen.get(path)
+            if previous is None or previous[0] != signature:
+                # Files already on disk count from their modification time
+                self._seen[path] = (signature, min(now, mtime) if previous is None else now)
+                previous = self._seen[path]
+            if now - previous[1] < self.debounce:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha256(content).hexdigest()
+            if self._hashes.get(path) != digest:
+                self._hashes[path] = digest
+                ready[path] = (digest, content)
+        return ready
+
+    def documents(self) -> dict:
+        """Path -> content hash of every document reported so far"""
+        return dict(self._hashes)
+
+    def pending(self) -> bool:
+        """Whether a document is still waiting out its debounce period"""
+        now = time.time()
+        return any(now - since < self.debounce for _, since in self._seen.values())
+
+
+# ---------------------------------------------------------------- daemon
+
+def report_path(output_dir: str, regulation_name: str, policy_name: str) -> str:
+    """
+    Report file of a regulation/policy pair
+
+    Args:
+        regulation_name, policy_name: Document paths relative to their
+            watched directory, extension included (so regs/a/x.pdf,
+            regs/b/x.pdf and regs/x.txt all get their own report)
+    """
+    def flat(name):
+        return name.replace(os.sep, '~').replace('/', '~')
+    return os.path.join(output_dir, f"{flat(regulation_name)}__{flat(policy_name)}.json")
+
+
+class WatchDaemon:
+    """Scans, debounces, queues affected pairs and runs them in a bounded pool"""
+
+    def __init__(self, regulations_dir: str, policies_dir: str, output_dir: str = DEFAULT_OUTPUT_DIR,
+                 ledger_path: str = DEFAULT_LEDGER, workers: int = 2, poll_interval: float = 5.0,
+                 debounce: float = 10.0, max_attempts: int = 3, deadline_seconds: float = None):
+        """
+        Args:
+            regulations_dir, policies_dir: Watched directories (.txt/.pdf, recursive)
+            output_dir: Where report JSON files are written
+            ledger_path: Work ledger database
+            workers: Concurrent analyses (worker processes)
+            poll_interval: Seconds between directory scans
+            debounce: Seconds a file must stay unchanged before it is analyzed
+            max_attempts: Runs of a failing pair before it is left alone
+            deadline_seconds: Optional time budget per analysis
+        """
+        self.scanners = {
+            'regulation': FolderScanner(regulations_dir, debounce),
+            'policy': FolderScanner(policies_dir, debounce),
+        }
+        self.output_dir = output_dir
+        self.ledger = WorkLedger(ledger_path)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.deadline_seconds = deadline_seconds
+        self.queue = OrderedDict()   # job key -> job, waiting for a worker
+        self.running = {}            # job key -> (job, future)
+        self.contents = {}           # path -> content of the version last reported
+        self.stats = {'queued': 0, 'skipped': 0, 'completed': 0, 'failed': 0}
+        self._stop = threading.Event()
+        self._pool = None
+
+        from utils.run_store import get_run_store
+        self.run_store = get_run_store()
+
+    # -- scheduling
+
+    def scan(self):
+        """Poll both directories and queue the pairs affected by changes"""
+        changed = {role: scanner.poll() for role, scanner in self.scanners.items()}
+        for role in changed:
+            for path, (_, content) in changed[role].items():
+                self.contents[path] = content
+                print(f"📥 {role.capitalize()} changed: {path}")
+
+        regulations = self.scanners['regulation'].documents()
+        policies = self.scanners['policy'].documents()
+        for path in set(self.contents) - set(regulations) - set(policies):
+            del self.contents[path]  # deleted
+        for regulation_path, regulation_hash in regulations.items():
+            for policy_path, policy_hash in policies.items():
+                if regulation_path in changed['regulation'] or policy_path in changed['policy']:
+                    self._schedule(regulation_path, regulation_hash, policy_path, policy_hash)
+
+    def _schedule(self, regulation_path: str, regulation_hash: str, policy_path: str, policy_hash: str):
+        job_key = f"{regulation_hash}:{policy_hash}"
+        if job_key in self.queue or job_key in self.running:
+            return
+        entry = self.ledger.get(job_key)
+        if entry is not None and (
+            entry['status'] == 'done'
+            or (entry['status'] in ('failed', 'running') and entry['attempts'] >= self.max_attempts)
+        ):
+            self.stats['skipped'] += 1
+            return
+        # Superseded versions of the same pair are dropped from the queue
+        for key in [k for k, job in self.queue.items()
+                    if (job['regulation_path'], job['policy_path']) == (regulation_path, policy_path)]:
+            del self.queue[key]
+        self.queue[job_key] = {
+            'job_key': job_key,
+            'regulation_path': regulation_path,
+            'policy_path': policy_path,
+            'regulation': self.contents[regulation_path],
+            'policy': self.contents[policy_path],
+            'deadline_seconds': self.deadline_seconds,
+        }
+        self.stats['queued'] += 1
+
+    def dispatch(self):
+        """Start queued jobs while a worker is free"""
+        while self.queue and len(self.running) < self.workers:
+            job_key, job = next(iter(self.queue.items()))
+            try:
+                future = self._pool.submit(_analyze_pair, job)
+            except BrokenProcessPool:
+                # A worker crashed (e.g. out of memory in PDF extraction):
+                # record the jobs it took down, start a fresh pool and
+                # dispatch again on the next pass
+                broken = self._pool
+                self.collect()
+                if self._pool is broken:
+                    self._restart_pool()
+                break
+            del self.queue[job_key]
+            self.ledger.start(job_key, job['regulation_path'], job['policy_path'])
+            print(f"🚀 Analyzing {os.path.basename(job['regulation_path'])} x "
+                  f"{os.path.basename(job['policy_path'])}")
+            self.running[job_key] = (job, future)
+
+    def _restart_pool(self):
+        print("⚠️ Analysis worker crashed - restarting the worker pool")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def collect(self):
+        """Write the reports of finished jobs and record them in the ledger"""
+        pool_broken = False
+        for job_key in [k for k, (_, future) in self.running.items() if future.done()]:
+            job, future = self.running.pop(job_key)
+            try:
+                report = json.loads(future.result())
+            except Exception as e:
+                pool_broken = pool_broken or isinstance(e, BrokenProcessPool)
+                self.ledger.fail(job_key, f"{type(e).__name__}: {e}")
+                self.stats['failed'] += 1
+                print(f"❌ Failed {os.path.basename(job['regulation_path'])} x "
+                      f"{os.path.basename(job['policy_path'])}: {e}")
+                continue
+
+            path = report_path(
+                self.output_dir,
+                os.path.relpath(job['regulation_path'], self.scanners['regulation'].directory),
+                os.path.relpath(job['policy_path'], self.scanners['policy'].directory)
+            )
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            os.replace(path + '.tmp', path)
+
+            run_id = None
+            if self.run_store is not None:
+                run_id = self.run_store.save_run(
+                    report, os.path.basename(job['regulation_path']),
+                    os.path.basename(job['policy_path']), label='watch'
+                )
+            self.ledger.finish(job_key, path, run_id)
+            self.stats['completed'] += 1
+            print(f"✅ {path} (compliance {report['summary']['compliance_score']:.1f}%)")
+
+        if pool_broken and not self._stop.is_set():
+            self._restart_pool()
+
+    # -- main loop
+
+    def run(self, once: bool = False):
+        """
+        Watch until stop() (or Ctrl+C)
+
+        Args:
+            once: Process the documents present now, wait for their
+                analyses and return
+        """
+        print(f"🔥 Starting {self.workers} pre-warmed analysis workers...")
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        print(f"👀 Watching {self.scanners['regulation'].directory} (regulations) and "
+              f"{self.scanners['policy'].directory} (policies)")
+        try:
+            while not self._stop.is_set():
+                self.scan()
+                self.dispatch()
+                self.collect()
+                if once and not self.queue and not self.running and not any(
+                    scanner.pending() for scanner in self.scanners.values()
+                ):
+                    break
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Running analyses are finished and recorded; queued pairs are
+            # not in the ledger yet and are picked up again on the next start
+            if self.running:
+                print(f"⏳ Finishing {len(self.running)} running analyses...")
+            self._stop.set()
+            self._pool.shutdown(wait=True)
+            self.collect()
+            print(f"👋 Watcher stopped: {self.stats}")
+        return self.stats
+
+    def stop(self):
+        self._stop.set()
+
+
+def watch(regulations_dir: str, policies_dir: str, output_dir: str = DEFAULT_OUTPUT_DIR,
+          ledger_path: str = DEFAULT_LEDGER, workers: int = 2, poll_interval: float = 5.0,
+          debounce: float = 10.0, max_attempts: int = 3, deadline_seconds: float = None,
+          once: bool = False) -> dict:
+    """Run the watch-folder daemon (see WatchDaemon)"""
+    daemon = WatchDaemon(regulations_dir, policies_dir, output_dir, ledger_path, workers,
+                         poll_interval, debounce, max_attempts, deadline_seconds)
+    return daemon.run(once=once)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='ReguLens watch-folder daemon')
+    add_watch_arguments(parser)
+    return parser
+
+
+def add_watch_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--regulations', required=True, help='Regulation directory to watch')
+    parser.add_argument('--policies', required=True, help='Policy directory to watch')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help='Report directory')
+    parser.add_argument('--ledger', default=DEFAULT_LEDGER, help='Work ledger database')
+    parser.add_argument('--workers', type=int, default=2, help='Concurrent analyses')
+    parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds between scans')
+    parser.add_argument('--debounce', type=float, default=10.0,
+                        help='Seconds a file must stay unchanged before it is analyzed')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Runs of a failing pair')
+    parser.add_argument('--deadline', type=float, default=None, help='Time budget per analysis (seconds)')
+    parser.add_argument('--once', action='store_true',
+                        help='Analyze what is there now and exit instead of watching')
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    stats = watch(args.regulations, args.policies, args.output_dir, args.ledger, args.workers,
+                  args.poll_interval, args.debounce, args.max_attempts, args.deadline, args.once)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())